@@ -0,0 +1,35 @@
+"""Add event search vectors
+
+Revision ID: 2c80a2efbc56
+Revises: e76529798826
+Create Date: 2026-10-17 07:15:33.434290
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '2c80a2efbc56'
+down_revision: Union[str, Sequence[str], None] = 'e76529798826'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Stored generated columns: adding them rewrites the events table.
+    op.add_column('events', sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed("to_tsvector('simple'::regconfig, (title || ' ') || coalesce(description, ''))", ), nullable=True))
+    op.add_column('events', sa.Column('location_vector', postgresql.TSVECTOR(), sa.Computed("to_tsvector('simple'::regconfig, location)", ), nullable=True))
+    op.create_index('ix_events_location_search', 'events', ['location_vector'], unique=False, postgresql_using='gin')
+    op.create_index('ix_events_search', 'events', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_events_search', table_name='events', postgresql_using='gin')
+    op.drop_index('ix_events_location_search', table_name='events', postgresql_using='gin')
+    op.drop_column('events', 'location_vector')
+    op.drop_column('events', 'search_vector')
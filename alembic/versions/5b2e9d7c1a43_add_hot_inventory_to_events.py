@@ -0,0 +1,28 @@
+"""Add hot_inventory flag to events
+
+Revision ID: 5b2e9d7c1a43
+Revises: 4c072e1cf1ed
+Create Date: 2026-10-17 09:12:41.508213
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b2e9d7c1a43'
+down_revision: Union[str, Sequence[str], None] = '4c072e1cf1ed'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('events', sa.Column('hot_inventory', sa.Boolean(), server_default=sa.false(), nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('events', 'hot_inventory')
@@ -0,0 +1,42 @@
+"""Add event capacity shards
+
+Revision ID: 9a4f3c81d2e6
+Revises: 5b2e9d7c1a43
+Create Date: 2026-10-17 10:03:18.774120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4f3c81d2e6'
+down_revision: Union[str, Sequence[str], None] = '5b2e9d7c1a43'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('events', sa.Column('capacity_shards', sa.Integer(), server_default='0', nullable=False))
+    op.create_table('event_capacity_shards',
+    sa.Column('event_id', sa.Uuid(), nullable=False),
+    sa.Column('shard', sa.Integer(), nullable=False),
+    sa.Column('remaining', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['event_id'], ['events.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('event_id', 'shard')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Fold any sharded seats back into the event row before dropping them.
+    op.execute(
+        "UPDATE events SET capacity = capacity + COALESCE(("
+        "SELECT SUM(remaining) FROM event_capacity_shards "
+        "WHERE event_capacity_shards.event_id = events.id), 0)"
+    )
+    op.drop_table('event_capacity_shards')
+    op.drop_column('events', 'capacity_shards')
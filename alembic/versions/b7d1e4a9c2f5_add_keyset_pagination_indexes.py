@@ -0,0 +1,29 @@
+"""Add keyset pagination indexes
+
+Revision ID: b7d1e4a9c2f5
+Revises: 9a4f3c81d2e6
+Create Date: 2026-10-17 11:42:05.318822
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d1e4a9c2f5'
+down_revision: Union[str, Sequence[str], None] = '9a4f3c81d2e6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_events_date_id', 'events', ['date', 'id'], unique=False)
+    op.create_index('ix_bookings_user_id_created_at_id', 'bookings', ['user_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_bookings_user_id_created_at_id', table_name='bookings')
+    op.drop_index('ix_events_date_id', table_name='events')
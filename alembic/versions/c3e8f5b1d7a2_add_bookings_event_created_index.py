@@ -0,0 +1,27 @@
+"""Add bookings event/created_at index
+
+Revision ID: c3e8f5b1d7a2
+Revises: b7d1e4a9c2f5
+Create Date: 2026-10-17 13:05:47.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e8f5b1d7a2'
+down_revision: Union[str, Sequence[str], None] = 'b7d1e4a9c2f5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_bookings_event_id_created_at_id', 'bookings', ['event_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_bookings_event_id_created_at_id', table_name='bookings')
@@ -0,0 +1,29 @@
+"""Add foreign key indexes
+
+Revision ID: caaa1dac48b2
+Revises: 2c80a2efbc56
+Create Date: 2026-10-17 07:39:19.569072
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'caaa1dac48b2'
+down_revision: Union[str, Sequence[str], None] = '2c80a2efbc56'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # bookings.user_id and bookings.event_id already lead
+    # ix_bookings_user_id_created_at_id and ix_bookings_event_id_created_at_id.
+    op.create_index('ix_events_organizer_id_date_id', 'events', ['organizer_id', 'date', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_events_organizer_id_date_id', table_name='events')
@@ -0,0 +1,30 @@
+"""Add booking checkout id
+
+Revision ID: e4b7c1a9f3d2
+Revises: d9f2a6c4e8b1
+Create Date: 2026-10-17 18:04:12.540913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b7c1a9f3d2'
+down_revision: Union[str, Sequence[str], None] = 'd9f2a6c4e8b1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('bookings', sa.Column('checkout_id', sa.Uuid(), nullable=True))
+    op.create_index('ix_bookings_checkout_id', 'bookings', ['checkout_id'], unique=False, postgresql_where=sa.text('checkout_id IS NOT NULL'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_bookings_checkout_id', table_name='bookings', postgresql_where=sa.text('checkout_id IS NOT NULL'))
+    op.drop_column('bookings', 'checkout_id')
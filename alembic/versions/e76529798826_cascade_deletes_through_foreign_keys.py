@@ -0,0 +1,37 @@
+"""Cascade deletes through foreign keys
+
+Revision ID: e76529798826
+Revises: e4b7c1a9f3d2
+Create Date: 2026-10-17 06:58:48.800044
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e76529798826'
+down_revision: Union[str, Sequence[str], None] = 'e4b7c1a9f3d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_constraint(op.f('bookings_event_id_fkey'), 'bookings', type_='foreignkey')
+    op.drop_constraint(op.f('bookings_user_id_fkey'), 'bookings', type_='foreignkey')
+    op.create_foreign_key(op.f('bookings_event_id_fkey'), 'bookings', 'events', ['event_id'], ['id'], ondelete='CASCADE')
+    op.create_foreign_key(op.f('bookings_user_id_fkey'), 'bookings', 'users', ['user_id'], ['id'], ondelete='CASCADE')
+    op.drop_constraint(op.f('events_organizer_id_fkey'), 'events', type_='foreignkey')
+    op.create_foreign_key(op.f('events_organizer_id_fkey'), 'events', 'users', ['organizer_id'], ['id'], ondelete='CASCADE')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint(op.f('events_organizer_id_fkey'), 'events', type_='foreignkey')
+    op.create_foreign_key(op.f('events_organizer_id_fkey'), 'events', 'users', ['organizer_id'], ['id'])
+    op.drop_constraint(op.f('bookings_user_id_fkey'), 'bookings', type_='foreignkey')
+    op.drop_constraint(op.f('bookings_event_id_fkey'), 'bookings', type_='foreignkey')
+    op.create_foreign_key(op.f('bookings_user_id_fkey'), 'bookings', 'users', ['user_id'], ['id'])
+    op.create_foreign_key(op.f('bookings_event_id_fkey'), 'bookings', 'events', ['event_id'], ['id'])
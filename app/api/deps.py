@@ -1,5 +1,6 @@
-from typing import Generator, Optional
-from fastapi import Depends, HTTPException, status
+import math
+from typing import AsyncIterator, Generator, Optional
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 from jose import jwt, JWTError
@@ -9,17 +10,45 @@ import uuid
 
 from app.core import security
 from app.core.config import settings
-from app.core.database import get_db
-from app.models.user import User, UserRole
+from app.core.database import get_db, replica_router
+from app.core.ratelimit import default_limit, limiter, route_limits
+from app.models.user import UserRole
 from app.schemas.token import TokenPayload
 from app.crud import user as crud_user
+from app.services.auth_cache import AuthUser, auth_cache
+from app.services.write_tracker import write_tracker
 
 reusable_oauth2 = HTTPBearer()
+optional_oauth2 = HTTPBearer(auto_error=False)
+
+def _token_subject(token: str) -> Optional[uuid.UUID]:
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[security.ALGORITHM])
+        return uuid.UUID(TokenPayload(**payload).sub)
+    except (JWTError, ValidationError, TypeError, ValueError):
+        return None
+
+async def get_read_db(
+    token: Optional[HTTPAuthorizationCredentials] = Depends(optional_oauth2),
+) -> AsyncIterator[AsyncSession]:
+    """
+    Session for read-only routes: a replica, unless the caller wrote recently
+    and must see their own changes.
+    """
+    primary = False
+    if token and replica_router.engines:
+        user_id = _token_subject(token.credentials)
+        primary = user_id is not None and await write_tracker.wrote_recently(user_id)
+    session = await replica_router.session(primary=primary)
+    try:
+        yield session
+    finally:
+        await session.close()
 
 async def get_current_user(
     db: AsyncSession = Depends(get_db),
     token: HTTPAuthorizationCredentials = Depends(reusable_oauth2)
-) -> User:
+) -> AuthUser:
     try:
         payload = jwt.decode(
             token.credentials, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
@@ -30,23 +59,56 @@ async def get_current_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    user = await crud_user.get(db, id=uuid.UUID(token_data.sub))
-    if not user:
+    user_id = uuid.UUID(token_data.sub)
+    user = auth_cache.get(user_id)
+    if user is not None:
+        return user
+    generation = auth_cache.generation
+    db_user = await crud_user.get(db, id=user_id)
+    if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
+    user = AuthUser.from_user(db_user)
+    auth_cache.put(user, generation=generation)
     return user
 
 async def get_current_active_user(
-    current_user: User = Depends(get_current_user),
-) -> User:
+    current_user: AuthUser = Depends(get_current_user),
+) -> AuthUser:
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
 async def get_current_active_organizer(
-    current_user: User = Depends(get_current_active_user),
-) -> User:
+    current_user: AuthUser = Depends(get_current_active_user),
+) -> AuthUser:
     if current_user.role != UserRole.ORGANIZER:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions"
         )
     return current_user
+
+async def rate_limit(request: Request) -> None:
+    """
+    Apply the route's configured limit per user, or per client address for
+    anonymous requests and invalid tokens.
+    """
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    endpoint = request.scope["endpoint"]
+    route = f"{endpoint.__module__.rsplit('.', 1)[-1]}.{endpoint.__name__}"
+    limit = route_limits.get(route, default_limit)
+    if limit is None:
+        return
+    scheme, _, credentials = request.headers.get("authorization", "").partition(" ")
+    user_id = _token_subject(credentials) if scheme.lower() == "bearer" else None
+    if user_id is not None:
+        identity = f"user:{user_id}"
+    else:
+        identity = f"ip:{request.client.host if request.client else 'unknown'}"
+    retry_after = await limiter.acquire(f"{route}:{identity}", limit)
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Rate limit exceeded",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
@@ -1,15 +1,25 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import update
 import uuid
 
 from app.api import deps
+from app.core.config import settings
+from app.core.responses import render
 from app.crud import booking as crud_booking
-from app.crud import event as crud_event
-from app.schemas.booking import Booking, BookingCreate, BookingUpdate
+from app.crud.base import InvalidCursorError
+from app.crud.crud_booking import (
+    BookingConflictError,
+    EventNotFoundError,
+    HotInventoryError,
+    SoldOutError,
+)
+from app.schemas.booking import Booking, BookingCheckout, BookingCreate, BookingUpdate
 from app.models.user import User, UserRole
-from app.services.booking_notifications import queue_booking_confirmation
+from app.services.booking_coalescer import booking_coalescer
+from app.services.event_cache import event_cache
+from app.services.hot_inventory import hot_inventory
+from app.services.write_tracker import write_tracker
 from app.utils.logger import get_logger
 
 router = APIRouter()
@@ -18,23 +28,29 @@ logger = get_logger(__name__)
 
 @router.get("/", response_model=List[Booking])
 async def read_bookings(
-    db: AsyncSession = Depends(deps.get_db),
-    skip: int = 0,
-    limit: int = 100,
+    db: AsyncSession = Depends(deps.get_read_db),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    Retrieve bookings for current user.
+    Retrieve bookings for current user, oldest first. The next page's cursor
+    is returned in the X-Next-Cursor header.
     """
     if current_user.role != UserRole.USER:
         logger.warning("User %s with role %s attempted to list bookings", current_user.id, current_user.role)
         raise HTTPException(status_code=403, detail="Only users can view their bookings")
     logger.info("Listing bookings for user %s", current_user.id)
-    bookings = await crud_booking.get_multi_by_user(
-        db, user_id=current_user.id, skip=skip, limit=limit
-    )
+    try:
+        bookings, next_cursor = await crud_booking.get_page_by_user(
+            db, user_id=current_user.id, limit=limit, cursor=cursor
+        )
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     logger.info("Fetched %d bookings for user %s", len(bookings), current_user.id)
-    return bookings
+    return render(
+        List[Booking], bookings, headers={"X-Next-Cursor": next_cursor} if next_cursor else None
+    )
 
 @router.post("/", response_model=Booking)
 async def create_booking(
@@ -50,80 +66,104 @@ async def create_booking(
         logger.warning("User %s with role %s attempted to create booking", current_user.id, current_user.role)
         raise HTTPException(status_code=403, detail="Only users can book events")
 
-    event = await crud_event.get(db=db, id=booking_in.event_id)
-    if not event:
-        logger.warning("Event %s not found for booking", booking_in.event_id)
-        raise HTTPException(status_code=404, detail="Event not found")
-    if event.capacity < booking_in.tickets_count:
-        logger.warning(
-            "Insufficient capacity for event %s: requested %d, available %d",
-            booking_in.event_id,
-            booking_in.tickets_count,
-            event.capacity,
-        )
-        raise HTTPException(status_code=400, detail="Not enough tickets available")
-
     logger.info(
         "Creating booking for user %s on event %s with %d tickets",
         current_user.id,
         booking_in.event_id,
         booking_in.tickets_count,
     )
-    # Extract data before commit (which expires objects)
-    event_title = event.title
-    event_date = event.date
-    event_location = event.location
-    event_description = event.description
-    user_email = booking_in.user_email or current_user.email
-    # Use provided user_name (guest name) or fallback to account name
-    user_name = booking_in.user_name or current_user.name or 'User'
-    tickets_count = booking_in.tickets_count
+    if settings.HOT_EVENTS_ENABLED:
+        try:
+            booking = await hot_inventory.claim(
+                obj_in=booking_in,
+                user_id=current_user.id,
+            )
+        except SoldOutError:
+            logger.warning(
+                "Hot event %s sold out: requested %d",
+                booking_in.event_id,
+                booking_in.tickets_count,
+            )
+            raise HTTPException(status_code=400, detail="Not enough tickets available")
+        if booking is not None:
+            # Persisted, and its confirmation written to the outbox, once the
+            # reconciler picks it up.
+            await write_tracker.mark(current_user.id)
+            logger.info("Booking %s claimed on hot event %s", booking.id, booking_in.event_id)
+            return render(Booking, booking)
 
-    booking = await crud_booking.create_with_user(
-        db=db, obj_in=booking_in, user_id=current_user.id
-    )
+    try:
+        if settings.BOOKING_COALESCE_ENABLED:
+            # The batch is booked on the coalescer's own session; hand this
+            # request's connection back to the pool while waiting for it.
+            await db.close()
+            booking, _ = await booking_coalescer.submit(
+                obj_in=booking_in, user_id=current_user.id
+            )
+        else:
+            booking, _ = await crud_booking.reserve(
+                db=db, obj_in=booking_in, user_id=current_user.id
+            )
+    except EventNotFoundError:
+        logger.warning("Event %s not found for booking", booking_in.event_id)
+        raise HTTPException(status_code=404, detail="Event not found")
+    except SoldOutError:
+        logger.warning(
+            "Insufficient capacity for event %s: requested %d",
+            booking_in.event_id,
+            booking_in.tickets_count,
+        )
+        raise HTTPException(status_code=400, detail="Not enough tickets available")
+    await event_cache.invalidate_capacity(booking_in.event_id)
+    await write_tracker.mark(current_user.id)
+    # The confirmation email was committed to the outbox with the booking.
     logger.info("Booking %s created for user %s", booking.id, current_user.id)
+    return render(Booking, booking)
 
-    # Save data before commit (which expires objects)
-    booking_id = booking.id
-    booking_user_id = booking.user_id
-    booking_event_id = booking.event_id
-    booking_status = booking.status
-    booking_tickets_count = booking.tickets_count
-    booking_guest_name = booking.guest_name
-    booking_guest_email = booking.guest_email
-    booking_created_at = booking.created_at
+@router.post("/checkout", response_model=List[Booking])
+async def checkout_bookings(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    checkout_in: BookingCheckout,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Book several events, or several ticket groups, at once. Either every item
+    is booked or none is, and one confirmation email covers them all.
+    """
+    if current_user.role != UserRole.USER:
+        logger.warning("User %s with role %s attempted to check out", current_user.id, current_user.role)
+        raise HTTPException(status_code=403, detail="Only users can book events")
 
-    # Decrease event capacity
-    await db.execute(
-        update(crud_event.model)
-        .where(crud_event.model.id == event.id)
-        .values(capacity=crud_event.model.capacity - tickets_count)
+    logger.info(
+        "Checking out %d items for user %s", len(checkout_in.items), current_user.id
     )
-    await db.commit()
-
-    # Send confirmation email via service
-    queue_booking_confirmation(
-        booking_id=booking_id,
-        user_email=user_email,
-        user_name=user_name,
-        event_title=event_title,
-        event_date=event_date,
-        event_location=event_location,
-        event_description=event_description,
-        tickets_count=tickets_count,
+    try:
+        bookings = await crud_booking.checkout(db, obj_in=checkout_in, user_id=current_user.id)
+    except EventNotFoundError as exc:
+        logger.warning("Event %s not found for checkout", exc.args[0])
+        raise HTTPException(status_code=404, detail=f"Event {exc.args[0]} not found")
+    except SoldOutError as exc:
+        logger.warning("Insufficient capacity for event %s in checkout", exc.args[0])
+        raise HTTPException(
+            status_code=400, detail=f"Not enough tickets available for event {exc.args[0]}"
+        )
+    except HotInventoryError as exc:
+        logger.warning("Hot event %s in checkout", exc.args[0])
+        raise HTTPException(
+            status_code=400, detail=f"Event {exc.args[0]} must be booked on its own"
+        )
+    for event_id in {booking.event_id for booking in bookings}:
+        await event_cache.invalidate_capacity(event_id)
+    await write_tracker.mark(current_user.id)
+    # The combined confirmation was committed to the outbox with the bookings.
+    logger.info(
+        "Checkout %s created %d bookings for user %s",
+        bookings[0].checkout_id,
+        len(bookings),
+        current_user.id,
     )
-
-    return {
-        "id": booking_id,
-        "user_id": booking_user_id,
-        "event_id": booking_event_id,
-        "status": booking_status,
-        "tickets_count": booking_tickets_count,
-        "guest_name": booking_guest_name,
-        "guest_email": booking_guest_email,
-        "created_at": booking_created_at
-    }
+    return render(List[Booking], bookings)
 
 @router.put("/{id}", response_model=Booking)
 async def update_booking(
@@ -160,29 +200,34 @@ async def update_booking(
             logger.warning("Invalid tickets count %s for booking %s", new_tickets_count, id)
             raise HTTPException(status_code=400, detail="Tickets count must be greater than zero")
 
-        ticket_diff = new_tickets_count - booking.tickets_count
-        if ticket_diff != 0:
-            event = await crud_event.get(db=db, id=booking.event_id)
-            if not event:
-                logger.error("Event %s not found while updating booking %s", booking.event_id, id)
-                raise HTTPException(status_code=500, detail="Related event not found")
-            if ticket_diff > 0 and event.capacity < ticket_diff:
-                logger.warning(
-                    "Insufficient capacity for event %s: requested change %d, available %d",
-                    booking.event_id,
-                    ticket_diff,
-                    event.capacity,
-                )
-                raise HTTPException(status_code=400, detail="Not enough tickets available")
-            await db.execute(
-                update(crud_event.model)
-                .where(crud_event.model.id == booking.event_id)
-                .values(capacity=crud_event.model.capacity - ticket_diff)
-            )
-
-    booking = await crud_booking.update(db=db, db_obj=booking, obj_in=booking_in)
+    # Rollback expires loaded objects, so keep what the error paths log.
+    event_id = booking.event_id
+    ticket_diff = update_data.get("tickets_count", booking.tickets_count) - booking.tickets_count
+    hot_claimed = False
+    try:
+        if settings.HOT_EVENTS_ENABLED and ticket_diff != 0:
+            hot_claimed = await hot_inventory.adjust(event_id=event_id, tickets=ticket_diff)
+        booking = await crud_booking.change_tickets(db=db, db_obj=booking, obj_in=update_data)
+    except SoldOutError:
+        if hot_claimed:
+            await hot_inventory.adjust(event_id=event_id, tickets=-ticket_diff)
+        logger.warning(
+            "Insufficient capacity for event %s: requested %d tickets on booking %s",
+            event_id,
+            update_data["tickets_count"],
+            id,
+        )
+        raise HTTPException(status_code=400, detail="Not enough tickets available")
+    except BookingConflictError:
+        if hot_claimed:
+            await hot_inventory.adjust(event_id=event_id, tickets=-ticket_diff)
+        logger.warning("Booking %s changed concurrently during update", id)
+        raise HTTPException(status_code=409, detail="Booking was modified, please retry")
+    if ticket_diff != 0:
+        await event_cache.invalidate_capacity(event_id)
+    await write_tracker.mark(current_user.id)
     logger.info("Booking %s updated by user %s", id, current_user.id)
-    return booking
+    return render(Booking, booking)
 
 @router.delete("/{id}", response_model=Booking)
 async def cancel_booking(
@@ -210,5 +255,6 @@ async def cancel_booking(
         )
         raise HTTPException(status_code=403, detail="Not enough permissions")
     booking = await crud_booking.remove(db=db, id=id)
+    await write_tracker.mark(current_user.id)
     logger.info("Booking %s cancelled by user %s", id, current_user.id)
-    return booking
+    return render(Booking, booking)
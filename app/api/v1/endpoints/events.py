@@ -1,33 +1,110 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, Request
+import csv
+import enum
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, UploadFile
+from fastapi.responses import StreamingResponse
 
 from sqlalchemy.ext.asyncio import AsyncSession
 import uuid
 
 from app.api import deps
+from app.core.database import replica_router
+from app.crud import booking as crud_booking
 from app.crud import event as crud_event
-from app.schemas.event import Event, EventCreate, EventUpdate
+from app.crud.crud_booking import ATTENDEE_COLUMNS, SoldOutError
+from app.crud.base import InvalidCursorError
+from app.schemas.booking import BookingExportFormat
+from app.schemas.event import Event, EventCapacityShards, EventCreate, EventImportResult, EventUpdate
 from app.models.user import User
 from app.utils.logger import get_logger
-from app.core.ratelimit import limiter
+from app.core.config import settings
+from app.core.responses import dump_json, render, render_serialized
+from app.services import event_import
+from app.services.event_cache import event_cache
+from app.services.hot_inventory import hot_inventory
 
 router = APIRouter()
 
 logger = get_logger(__name__)
 
+async def _stream_events() -> AsyncIterator[str]:
+    # Own session: the response body is produced after the endpoint returns.
+    async with await replica_router.session() as db:
+        yield "["
+        separator = ""
+        async for events in crud_event.iter_pages(db):
+            # Each batch encodes as a JSON array; splice its items into ours.
+            yield separator + dump_json(List[Event], events)[1:-1].decode()
+            separator = ","
+        yield "]"
+
 @router.get("/all", response_model=List[Event])
-@limiter.limit("10/minute")
-async def read_all_events(
-    request: Request,
-    db: AsyncSession = Depends(deps.get_db),
+async def read_all_events() -> Any:
+    """
+    Retrieve all events without pagination, streamed in batches. Rate limited
+    through RATE_LIMITS.
+    """
+    logger.info("Streaming all events")
+    return StreamingResponse(_stream_events(), media_type="application/json")
+
+@router.get("/", response_model=List[Event])
+async def read_events(
+    *,
+    db: AsyncSession = Depends(deps.get_read_db),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
 ) -> Any:
     """
-    Retrieve all events without pagination.
+    Retrieve events in date order. The next page's cursor is returned in the
+    X-Next-Cursor header.
     """
-    logger.info("Fetching all events")
-    events = await crud_event.get_all(db)
+    try:
+        events, next_cursor = await crud_event.get_page(db, limit=limit, cursor=cursor)
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     logger.info("Fetched %d events", len(events))
-    return events
+    return render(
+        List[Event], events, headers={"X-Next-Cursor": next_cursor} if next_cursor else None
+    )
+
+@router.get("/search", response_model=List[Event])
+async def search_events(
+    *,
+    db: AsyncSession = Depends(deps.get_read_db),
+    q: Optional[str] = Query(None, min_length=1, max_length=200),
+    location: Optional[str] = Query(None, min_length=1, max_length=200),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    available: bool = False,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+) -> Any:
+    """
+    Search events in date order. `q` matches words (or their beginnings) in
+    the title and description, `location` in the location; `date_from` and
+    `date_to` bound the event date and `available` keeps events with seats
+    left. The next page's cursor is returned in the X-Next-Cursor header.
+    """
+    try:
+        events, next_cursor = await crud_event.search(
+            db,
+            q=q,
+            location=location,
+            date_from=date_from,
+            date_to=date_to,
+            available=available,
+            limit=limit,
+            cursor=cursor,
+        )
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    logger.info("Search returned %d events", len(events))
+    return render(
+        List[Event], events, headers={"X-Next-Cursor": next_cursor} if next_cursor else None
+    )
 
 @router.post("/", response_model=Event)
 async def create_event(
@@ -44,23 +121,72 @@ async def create_event(
         db=db, obj_in=event_in, organizer_id=current_user.id
     )
     logger.info("Event '%s' created with id %s", event.title, event.id)
-    return event
+    return render(Event, event)
+
+async def _upload_chunks(upload: UploadFile) -> AsyncIterator[bytes]:
+    while chunk := await upload.read(64 * 1024):
+        yield chunk
+
+async def _import_records(request: Request) -> AsyncIterator[Any]:
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type == "multipart/form-data":
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400, detail="Missing file field")
+        content_type = (upload.content_type or "").lower()
+        if content_type not in event_import.PARSERS:
+            content_type = "text/csv" if (upload.filename or "").lower().endswith(".csv") else "application/json"
+        return event_import.PARSERS[content_type](_upload_chunks(upload))
+    if content_type not in event_import.PARSERS:
+        raise HTTPException(
+            status_code=415, detail="Send a JSON array, a CSV file or a multipart form with a file field"
+        )
+    return event_import.PARSERS[content_type](request.stream())
+
+@router.post("/import", response_model=EventImportResult)
+async def import_events(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    request: Request,
+    current_user: User = Depends(deps.get_current_active_organizer),
+) -> Any:
+    """
+    Create events in bulk from a JSON array or a CSV file of event records,
+    sent as the body (application/json or text/csv) or as the `file` field of
+    a multipart form. The upload is validated as it streams in; rows that fail
+    validation are skipped and reported, the rest are imported together.
+    """
+    logger.info("Organizer %s importing events", current_user.id)
+    records = await _import_records(request)
+    try:
+        result = await event_import.import_events(
+            db, records=records, organizer_id=current_user.id
+        )
+    except event_import.ImportFormatError as exc:
+        await db.rollback()
+        logger.warning("Rejected event import from organizer %s: %s", current_user.id, exc)
+        raise HTTPException(status_code=400, detail=str(exc))
+    except event_import.ImportTooLargeError as exc:
+        await db.rollback()
+        raise HTTPException(status_code=413, detail=str(exc))
+    return render(EventImportResult, result)
 
 @router.get("/{id}", response_model=Event)
 async def read_event(
     *,
-    db: AsyncSession = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_read_db),
     id: uuid.UUID,
 ) -> Any:
     """
     Get event by ID.
     """
-    event = await crud_event.get(db=db, id=id)
+    event = await event_cache.get(db, event_id=id)
     if not event:
         logger.warning("Event %s not found", id)
         raise HTTPException(status_code=404, detail="Event not found")
     logger.info("Event %s retrieved", id)
-    return event
+    return render_serialized(event)
 
 @router.put("/{id}", response_model=Event)
 async def update_event(
@@ -85,9 +211,20 @@ async def update_event(
             id,
         )
         raise HTTPException(status_code=403, detail="Not enough permissions")
-    event = await crud_event.update(db=db, db_obj=event, obj_in=event_in)
+    if event_in.capacity is None:
+        event = await crud_event.update(db=db, db_obj=event, obj_in=event_in)
+    else:
+        try:
+            async with hot_inventory.capacity_change(db, event_id=id, capacity=event_in.capacity):
+                event = await crud_event.update(db=db, db_obj=event, obj_in=event_in)
+        except SoldOutError:
+            logger.warning("Capacity of hot event %s cut below the seats already sold", id)
+            raise HTTPException(
+                status_code=409, detail="More seats are already sold than the new capacity allows"
+            )
+    await event_cache.invalidate(id)
     logger.info("Event %s updated", id)
-    return event
+    return render(Event, event)
 
 @router.delete("/{id}", response_model=Event)
 async def delete_event(
@@ -111,6 +248,177 @@ async def delete_event(
             id,
         )
         raise HTTPException(status_code=403, detail="Not enough permissions")
+    if event.hot_inventory:
+        # Stop claims first, or bookings keep succeeding against the counter.
+        try:
+            await hot_inventory.disable(db, event=event)
+        except TimeoutError:
+            logger.warning("Hot inventory for event %s still has pending claims", id)
+            raise HTTPException(status_code=409, detail="Bookings are still being reconciled, please retry")
     event = await crud_event.remove(db=db, id=id)
+    await event_cache.invalidate(id)
     logger.info("Event %s deleted", id)
-    return event
+    return render(Event, event)
+
+@router.post("/{id}/hot", response_model=Event)
+async def enable_hot_inventory(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    id: uuid.UUID,
+    current_user: User = Depends(deps.get_current_active_organizer),
+) -> Any:
+    """
+    Serve bookings for an event from the Redis seat counter.
+    """
+    if not settings.HOT_EVENTS_ENABLED:
+        raise HTTPException(status_code=400, detail="Hot events are disabled")
+    event = await crud_event.get(db=db, id=id)
+    if not event:
+        logger.warning("Event %s not found for hot inventory", id)
+        raise HTTPException(status_code=404, detail="Event not found")
+    if event.organizer_id != current_user.id:
+        logger.warning(
+            "Organizer %s lacks permission to enable hot inventory for event %s",
+            current_user.id,
+            id,
+        )
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    if event.capacity_shards:
+        raise HTTPException(status_code=400, detail="Sharded events cannot use hot inventory")
+    await hot_inventory.enable(db, event=event)
+    await event_cache.invalidate(id)
+    await db.refresh(event)
+    logger.info("Hot inventory enabled for event %s", id)
+    return render(Event, event)
+
+@router.delete("/{id}/hot", response_model=Event)
+async def disable_hot_inventory(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    id: uuid.UUID,
+    current_user: User = Depends(deps.get_current_active_organizer),
+) -> Any:
+    """
+    Return an event's bookings to the database engine.
+    """
+    event = await crud_event.get(db=db, id=id)
+    if not event:
+        logger.warning("Event %s not found for hot inventory", id)
+        raise HTTPException(status_code=404, detail="Event not found")
+    if event.organizer_id != current_user.id:
+        logger.warning(
+            "Organizer %s lacks permission to disable hot inventory for event %s",
+            current_user.id,
+            id,
+        )
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    try:
+        await hot_inventory.disable(db, event=event)
+    except TimeoutError:
+        logger.warning("Hot inventory for event %s still has pending claims", id)
+        raise HTTPException(status_code=409, detail="Bookings are still being reconciled, please retry")
+    await event_cache.invalidate(id)
+    await db.refresh(event)
+    logger.info("Hot inventory disabled for event %s", id)
+    return render(Event, event)
+
+@router.put("/{id}/shards", response_model=Event)
+async def set_capacity_shards(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    id: uuid.UUID,
+    shards_in: EventCapacityShards,
+    current_user: User = Depends(deps.get_current_active_organizer),
+) -> Any:
+    """
+    Mark an event as high-demand by splitting its capacity over counter shards.
+    Zero shards merges them back into the event.
+    """
+    event = await crud_event.get(db=db, id=id)
+    if not event:
+        logger.warning("Event %s not found for sharding", id)
+        raise HTTPException(status_code=404, detail="Event not found")
+    if event.organizer_id != current_user.id:
+        logger.warning(
+            "Organizer %s lacks permission to shard event %s",
+            current_user.id,
+            id,
+        )
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    if event.hot_inventory:
+        raise HTTPException(status_code=400, detail="Hot events cannot be sharded")
+    event = await crud_event.set_capacity_shards(db=db, event_id=id, shards=shards_in.shards)
+    await event_cache.invalidate(id)
+    logger.info("Event %s capacity split over %d shards", id, shards_in.shards)
+    return render(Event, event)
+
+def _attendee_record(row: Any) -> Dict[str, Any]:
+    record = {}
+    for field, value in row._mapping.items():
+        if isinstance(value, enum.Enum):
+            value = value.value
+        elif isinstance(value, datetime):
+            value = value.isoformat()
+        elif isinstance(value, uuid.UUID):
+            value = str(value)
+        record[field] = value
+    return record
+
+async def _stream_attendees(event_id: uuid.UUID, format: BookingExportFormat) -> AsyncIterator[str]:
+    # Each chunk is written to the client before the next one is fetched, so a
+    # slow reader holds back the cursor instead of filling memory.
+    async with await replica_router.session() as db:
+        buffer = io.StringIO()
+        writer = None
+        if format == BookingExportFormat.CSV:
+            writer = csv.DictWriter(buffer, fieldnames=[c.name for c in ATTENDEE_COLUMNS])
+            writer.writeheader()
+            yield buffer.getvalue()
+        async for rows in crud_booking.stream_attendees(
+            db, event_id=event_id, chunk_size=settings.BOOKING_EXPORT_CHUNK_SIZE
+        ):
+            buffer.seek(0)
+            buffer.truncate()
+            for row in rows:
+                record = _attendee_record(row)
+                if writer:
+                    writer.writerow(record)
+                else:
+                    buffer.write(json.dumps(record))
+                    buffer.write("\n")
+            yield buffer.getvalue()
+
+@router.get("/{id}/bookings/export")
+async def export_event_bookings(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    id: uuid.UUID,
+    format: BookingExportFormat = BookingExportFormat.NDJSON,
+    current_user: User = Depends(deps.get_current_active_organizer),
+) -> Any:
+    """
+    Stream an event's attendee list as NDJSON or CSV.
+    """
+    event = await crud_event.get(db=db, id=id)
+    if not event:
+        logger.warning("Event %s not found for export", id)
+        raise HTTPException(status_code=404, detail="Event not found")
+    if event.organizer_id != current_user.id:
+        logger.warning(
+            "Organizer %s lacks permission to export bookings of event %s",
+            current_user.id,
+            id,
+        )
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    # Release this request's connection; the export reads on its own session.
+    await db.close()
+    logger.info("Organizer %s exporting bookings of event %s as %s", current_user.id, id, format.value)
+    if format == BookingExportFormat.CSV:
+        media_type = "text/csv"
+    else:
+        media_type = "application/x-ndjson"
+    return StreamingResponse(
+        _stream_attendees(id, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="event-{id}-bookings.{format.value}"'},
+    )
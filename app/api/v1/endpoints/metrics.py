@@ -0,0 +1,26 @@
+from typing import Any
+from fastapi import APIRouter, Depends
+
+from app.api import deps
+from app.core.cache import cache
+from app.core.database import engine, pool_metrics, replica_router
+
+router = APIRouter()
+
+@router.get("/cache", dependencies=[Depends(deps.get_current_active_organizer)])
+async def read_cache_metrics() -> Any:
+    """
+    Cache hits and misses per key namespace for this process. Organizers only.
+    """
+    return cache.stats()
+
+@router.get("/db", dependencies=[Depends(deps.get_current_active_organizer)])
+async def read_db_metrics() -> Any:
+    """
+    Connection pool usage and checkout wait times for this process. Organizers
+    only.
+    """
+    return {
+        "primary": pool_metrics(engine),
+        "replicas": [pool_metrics(replica) for replica in replica_router.engines],
+    }
@@ -4,9 +4,11 @@ from sqlalchemy.ext.asyncio import AsyncSession
 import uuid
 
 from app.api import deps
+from app.core.responses import render
 from app.crud import user as crud_user
 from app.models.user import User, UserRole
 from app.schemas.user import User as UserSchema, UserCreate, UserUpdate
+from app.services.auth_cache import auth_cache
 from app.utils.logger import get_logger
 
 router = APIRouter()
@@ -33,7 +35,7 @@ async def create_user(
         )
     user = await crud_user.create(db, obj_in=user_in)
     logger.info("Organizer %s created user %s with role %s", current_user.id, user.id, user.role)
-    return user
+    return render(UserSchema, user)
 
 @router.put("/{id}", response_model=UserSchema)
 async def update_user(
@@ -52,8 +54,9 @@ async def update_user(
         logger.warning("User %s not found for update", id)
         raise HTTPException(status_code=404, detail="User not found")
     user = await crud_user.update(db=db, db_obj=user, obj_in=user_in)
+    await auth_cache.invalidate(id)
     logger.info("User %s updated by organizer %s", id, current_user.id)
-    return user
+    return render(UserSchema, user)
 
 @router.delete("/{id}", response_model=UserSchema)
 async def delete_user(
@@ -84,5 +87,6 @@ async def delete_user(
             detail="Organizers cannot delete other organizers",
         )
     user = await crud_user.remove(db=db, id=id)
+    await auth_cache.invalidate(id)
     logger.info("User %s deleted by organizer %s", id, current_user.id)
-    return user
+    return render(UserSchema, user)
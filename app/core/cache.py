@@ -1,22 +1,62 @@
 import redis.asyncio as redis
+from redis.exceptions import RedisError
 from app.core.config import settings
+from app.utils.logger import get_logger
 import json
-from typing import Any, Optional
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+logger = get_logger(__name__)
 
 class Cache:
+    """
+    JSON values in Redis. Lookups are counted per key namespace (the part of
+    the key before the first ':') so hit ratios can be watched per use.
+    Redis errors are logged and treated as misses; the cache never fails a
+    request.
+    """
+
     def __init__(self):
         self.redis = redis.from_url(settings.REDIS_URL, encoding="utf-8", decode_responses=True)
+        self.hits: Dict[str, int] = defaultdict(int)
+        self.misses: Dict[str, int] = defaultdict(int)
+
+    def _count(self, key: str, value: Optional[str]) -> None:
+        namespace = key.split(":", 1)[0]
+        if value is None:
+            self.misses[namespace] += 1
+        else:
+            self.hits[namespace] += 1
 
     async def get(self, key: str) -> Optional[Any]:
-        value = await self.redis.get(key)
-        if value:
-            return json.loads(value)
-        return None
+        return (await self.get_many([key]))[0]
+
+    async def get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        try:
+            values = await self.redis.mget(keys)
+        except RedisError as exc:
+            logger.warning("Cache read failed for %s: %s", keys, exc)
+            values = [None] * len(keys)
+        for key, value in zip(keys, values):
+            self._count(key, value)
+        return [json.loads(value) if value is not None else None for value in values]
 
     async def set(self, key: str, value: Any, expire: int = 60):
-        await self.redis.set(key, json.dumps(value), ex=expire)
+        try:
+            await self.redis.set(key, json.dumps(value), ex=expire)
+        except RedisError as exc:
+            logger.warning("Cache write failed for %s: %s", key, exc)
+
+    async def delete(self, *keys: str):
+        try:
+            await self.redis.delete(*keys)
+        except RedisError as exc:
+            logger.warning("Cache delete failed for %s: %s", keys, exc)
 
-    async def delete(self, key: str):
-        await self.redis.delete(key)
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            namespace: {"hits": self.hits[namespace], "misses": self.misses[namespace]}
+            for namespace in sorted(set(self.hits) | set(self.misses))
+        }
 
 cache = Cache()
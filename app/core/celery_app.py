@@ -1,7 +1,29 @@
+import logging
 from celery import Celery
+from celery.signals import setup_logging, worker_process_shutdown
 from app.core.config import settings
+from app.utils.logger import configure_logging, shutdown_logging
 
 celery_app = Celery("worker", broker=settings.REDIS_URL, include=["app.worker"])
 
 
-celery_app.conf.update(task_track_started=True)
+celery_app.conf.update(
+    task_track_started=True,
+    # Templated emails travel as msgpack; everything else stays JSON.
+    accept_content=["json", "msgpack"],
+)
+
+
+@setup_logging.connect
+def _setup_logging(loglevel=None, **kwargs):
+    # Connecting this signal keeps Celery from installing its own handlers;
+    # its loggers go through the same queue as the app's.
+    configure_logging()
+    if loglevel:
+        logging.getLogger("celery").setLevel(loglevel)
+
+
+@worker_process_shutdown.connect
+def _flush_logs(**kwargs):
+    # Pool processes exit without running atexit hooks.
+    shutdown_logging()
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import Optional
+from typing import Dict, List, Optional
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Event Booking API"
@@ -12,15 +12,91 @@ class Settings(BaseSettings):
     POSTGRES_PORT: int = 5432
     POSTGRES_DB: str
     DATABASE_URL: Optional[str] = None
+    DB_ECHO: bool = False
+    # Per process: size the pool so that uvicorn workers x (pool size +
+    # overflow) stays below the server's max_connections
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Connections opened at startup; 0 disables warm-up
+    DB_POOL_WARMUP: int = 10
+    # asyncpg prepared statements cached per connection; set 0 behind
+    # pgbouncer in transaction mode
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # Comma-separated read replica URLs for read-only routes
+    DATABASE_REPLICA_URLS: str = ""
+    DB_REPLICA_RETRY_SECONDS: float = 10.0
+    # After a user writes, their reads stay on the primary for this long
+    READ_YOUR_WRITES_SECONDS: float = 5.0
 
     # Security
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+
+    # Argon2 cost; stored hashes are upgraded on login when these change
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536
+    ARGON2_PARALLELISM: int = 4
+    # Hashing runs in a process pool; beyond this many waiting jobs new
+    # logins and signups are rejected with 503 instead of queueing
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 32
     
     # Redis
     REDIS_URL: str
 
+    # Rate limits, enforced across all processes through Redis. Keys name the
+    # endpoint as "<module>.<function>" under app/api/v1/endpoints, values are
+    # like "10/minute"; the default applies to every other API route when set
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMITS: Dict[str, str] = {"events.read_all_events": "10/minute"}
+    RATE_LIMIT_DEFAULT: Optional[str] = None
+    # Tokens a process takes from Redis at once and how long it may keep them
+    RATE_LIMIT_LEASE_SIZE: int = 10
+    RATE_LIMIT_LEASE_SECONDS: float = 1.0
+    RATE_LIMIT_LOCAL_MAX_KEYS: int = 10000
+
+    # Hot events: seat inventory held in Redis, reconciled to Postgres in batches
+    HOT_EVENTS_ENABLED: bool = False
+    HOT_EVENTS_RECONCILE_BATCH_SIZE: int = 500
+    HOT_EVENTS_RECONCILE_INTERVAL_MS: int = 200
+    HOT_EVENTS_CLAIM_IDLE_MS: int = 30000
+
+    # Booking coalescer: concurrent bookings per event share one transaction
+    BOOKING_COALESCE_ENABLED: bool = False
+    BOOKING_COALESCE_WINDOW_MS: int = 5
+    BOOKING_COALESCE_MAX_BATCH: int = 100
+
+    # Event read cache: bodies live for the TTL, remaining capacity is never
+    # served staler than the staleness bound
+    EVENT_CACHE_ENABLED: bool = True
+    EVENT_CACHE_TTL_SECONDS: int = 300
+    EVENT_CACHE_CAPACITY_STALENESS_SECONDS: int = 2
+
+    # Per-process cache of authenticated users, invalidated over Redis pub/sub
+    AUTH_CACHE_ENABLED: bool = True
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+    AUTH_CACHE_TTL_SECONDS: int = 60
+
+    # Responses larger than this are gzipped for clients that accept it; 0 disables
+    RESPONSE_GZIP_MIN_BYTES: int = 1024
+    RESPONSE_GZIP_LEVEL: int = 5
+
+    # Rows fetched per round trip when streaming attendee exports
+    BOOKING_EXPORT_CHUNK_SIZE: int = 1000
+
+    # Bulk event import: valid rows are inserted this many at a time (COPY on
+    # PostgreSQL); only the first EVENT_IMPORT_MAX_ERRORS rejected rows are
+    # described in the response
+    EVENT_IMPORT_BATCH_SIZE: int = 5000
+    EVENT_IMPORT_MAX_ROWS: int = 200000
+    EVENT_IMPORT_MAX_ERRORS: int = 1000
+    # Largest single JSON item or CSV record accepted, in characters
+    EVENT_IMPORT_MAX_RECORD_SIZE: int = 65536
+
     # Email
     MAIL_USERNAME: str
     MAIL_PASSWORD: str
@@ -33,6 +109,29 @@ class Settings(BaseSettings):
     USE_CREDENTIALS: bool = True
     VALIDATE_CERTS: bool = True
     SUPPRESS_SEND: int = 0
+    # SMTP connections kept open per worker process
+    SMTP_POOL_SIZE: int = 4
+    SMTP_POOL_MAX_IDLE_SECONDS: float = 60.0
+    SMTP_TIMEOUT_SECONDS: float = 30.0
+    # Redelivered email tasks with an already-sent id are dropped for this long
+    EMAIL_DEDUP_TTL_SECONDS: int = 86400
+
+    # Transactional outbox: messages committed with bookings are relayed to the
+    # worker by a loop inside each API process (or `python -m app.services.outbox`)
+    OUTBOX_RELAY_ENABLED: bool = True
+    OUTBOX_RELAY_BATCH_SIZE: int = 100
+    OUTBOX_RELAY_INTERVAL_MS: int = 500
+    OUTBOX_RELAY_MAX_BACKOFF_SECONDS: int = 300
+
+    # Logging: records are formatted and written to stdout by a background
+    # thread; "json" emits one object per line, "text" the plain format
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"
+    # Records waiting for the writer beyond this many are dropped and counted
+    LOG_QUEUE_SIZE: int = 10000
+    # Fraction of INFO and lower records kept per logger (and its children),
+    # e.g. {"app.core.middleware": 0.1} for one in ten access log lines
+    LOG_SAMPLING: Dict[str, float] = {}
 
     model_config = SettingsConfigDict(env_file=".env", case_sensitive=True)
 
@@ -41,4 +140,7 @@ class Settings(BaseSettings):
             return self.DATABASE_URL
         return f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
 
+    def get_replica_urls(self) -> List[str]:
+        return [url.strip() for url in self.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+
 settings = Settings()
@@ -1,8 +1,80 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+import asyncio
+import time
+from typing import Any, Dict, List
+
+from sqlalchemy import event, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.core.config import settings
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long checkouts wait for a connection."""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self.checkouts += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+
+def engine_options(url: str) -> Dict[str, Any]:
+    """Engine keyword arguments for `url` from the DB_* settings."""
+    options: Dict[str, Any] = {"echo": settings.DB_ECHO}
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        # In-memory SQLite lives in one connection; keep SQLAlchemy's default pool.
+        return options
+    options.update(
+        poolclass=TimedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+    if parsed.get_driver_name() == "asyncpg":
+        options["connect_args"] = {
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        }
+    return options
+
+
+def _enable_sqlite_foreign_keys(dbapi_connection: Any, connection_record: Any) -> None:
+    # SQLite ignores foreign keys, and so their ON DELETE CASCADE, unless asked.
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
 
-engine = create_async_engine(settings.get_database_url(), echo=True)
+
+def create_engine(url: str) -> AsyncEngine:
+    created = create_async_engine(url, **engine_options(url))
+    if created.dialect.name == "sqlite":
+        event.listen(created.sync_engine, "connect", _enable_sqlite_foreign_keys)
+    return created
+
+
+engine = create_engine(settings.get_database_url())
 
 AsyncSessionLocal = async_sessionmaker(
     bind=engine,
@@ -20,3 +92,76 @@ async def get_db():
             yield session
         finally:
             await session.close()
+
+class ReplicaRouter:
+    """
+    Hands out read-only sessions on the replicas in round robin. A replica
+    that cannot be connected to is skipped for DB_REPLICA_RETRY_SECONDS; when
+    none is available, or there are none, the primary is used.
+    """
+
+    def __init__(self, urls: List[str], *, retry_seconds: float):
+        self.engines = [create_engine(url) for url in urls]
+        self.sessionmakers = [
+            async_sessionmaker(bind=e, class_=AsyncSession, expire_on_commit=False, autoflush=False)
+            for e in self.engines
+        ]
+        self.retry_seconds = retry_seconds
+        self._down_until = [0.0] * len(self.engines)
+        self._next = 0
+
+    async def session(self, *, primary: bool = False) -> AsyncSession:
+        if primary or not self.engines:
+            return AsyncSessionLocal()
+        now = time.monotonic()
+        for _ in range(len(self.engines)):
+            index = self._next
+            self._next = (index + 1) % len(self.engines)
+            if self._down_until[index] > now:
+                continue
+            session = self.sessionmakers[index]()
+            try:
+                # Check out the connection now so a dead replica is caught
+                # here rather than in the middle of the endpoint.
+                await session.connection()
+            except (DBAPIError, OSError) as exc:
+                await session.close()
+                self._down_until[index] = now + self.retry_seconds
+                logger.warning("Replica %d unavailable, skipping for %ss: %s", index, self.retry_seconds, exc)
+                continue
+            return session
+        return AsyncSessionLocal()
+
+    async def dispose(self) -> None:
+        for e in self.engines:
+            await e.dispose()
+
+replica_router = ReplicaRouter(
+    settings.get_replica_urls(), retry_seconds=settings.DB_REPLICA_RETRY_SECONDS
+)
+
+async def warm_up(engine: AsyncEngine, connections: int) -> None:
+    """Open `connections` pooled connections up front so the first requests don't pay for them."""
+    opened = await asyncio.gather(*[engine.connect().start() for _ in range(connections)])
+    for conn in opened:
+        await conn.execute(text("SELECT 1"))
+        await conn.close()
+
+def pool_metrics(engine: AsyncEngine) -> Dict[str, Any]:
+    """Usage and checkout wait times of `engine`'s pool."""
+    pool = engine.pool
+    if not isinstance(pool, TimedQueuePool):
+        return {"pool": type(pool).__name__}
+    return {
+        "pool": type(pool).__name__,
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "checkouts": pool.checkouts,
+        "timeouts": pool.timeouts,
+        "wait_ms_total": round(pool.wait_seconds * 1000, 3),
+        "wait_ms_avg": round(pool.wait_seconds * 1000 / pool.checkouts, 3) if pool.checkouts else 0.0,
+        "wait_ms_max": round(pool.max_wait_seconds * 1000, 3),
+    }
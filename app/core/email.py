@@ -1,34 +1,158 @@
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
-from pydantic import EmailStr
-from typing import List
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from email.message import EmailMessage
+from email.utils import formataddr
 from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import aiosmtplib
+from jinja2 import Environment, FileSystemLoader, StrictUndefined, Template, select_autoescape
+from pydantic import EmailStr
 
 from app.core.config import settings
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Errors after which a connection is dropped and the send retried on a new one.
+CONNECTION_ERRORS = (
+    aiosmtplib.SMTPServerDisconnected,
+    aiosmtplib.SMTPConnectError,
+    aiosmtplib.SMTPTimeoutError,
+    ConnectionError,
+    TimeoutError,
+)
+
 
-conf = ConnectionConfig(
-    MAIL_USERNAME=settings.MAIL_USERNAME,
-    MAIL_PASSWORD=settings.MAIL_PASSWORD,
-    MAIL_FROM=settings.MAIL_FROM,
-    MAIL_PORT=settings.MAIL_PORT,
-    MAIL_SERVER=settings.MAIL_SERVER,
-    MAIL_FROM_NAME=settings.MAIL_FROM_NAME,
-    MAIL_STARTTLS=settings.MAIL_STARTTLS,
-    MAIL_SSL_TLS=settings.MAIL_SSL_TLS,
-    USE_CREDENTIALS=settings.USE_CREDENTIALS,
-    VALIDATE_CERTS=settings.VALIDATE_CERTS,
-    SUPPRESS_SEND=settings.SUPPRESS_SEND,
+templates = Environment(
+    loader=FileSystemLoader(Path(__file__).resolve().parent.parent / "templates" / "email"),
+    # Bodies are HTML; subjects are plain text and must not be escaped.
+    autoescape=select_autoescape(["html"], default_for_string=False),
+    undefined=StrictUndefined,
 )
 
+# Template id -> (subject, body), compiled once per process.
+EMAIL_TEMPLATES: Dict[str, Tuple[Template, Template]] = {
+    "booking_confirmation": (
+        templates.from_string("Booking Confirmation: {{ event_title }}"),
+        templates.get_template("booking_confirmation.html"),
+    ),
+    "checkout_confirmation": (
+        templates.from_string(
+            "Booking Confirmation: {{ bookings | length }} booking{{ 's' if bookings | length != 1 }}"
+        ),
+        templates.get_template("checkout_confirmation.html"),
+    ),
+}
+
+
+def render_email(template_id: str, context: Dict[str, Any]) -> Tuple[str, str]:
+    """Subject and HTML body of `template_id` for `context`."""
+    subject, body = EMAIL_TEMPLATES[template_id]
+    return subject.render(context), body.render(context)
+
+
+def build_message(email_to: List[EmailStr], subject: str, html_content: str) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = formataddr((settings.MAIL_FROM_NAME, settings.MAIL_FROM))
+    message["To"] = ", ".join(email_to)
+    message["Subject"] = subject
+    message.set_content(html_content, subtype="html")
+    return message
+
+
+class SMTPPool:
+    """
+    Long-lived SMTP connections shared by every send on one event loop.
+
+    Up to `size` connections are opened on demand and handed back after each
+    message, so a busy worker pays for the TCP and TLS handshakes and the
+    login once per connection instead of once per email. A connection that
+    fails is discarded and the message is retried once on a fresh one;
+    connections idle for longer than `max_idle` are replaced before use, since
+    servers drop them silently.
+    """
+
+    def __init__(self, *, size: int, max_idle: float, **smtp_options):
+        self.size = size
+        self.max_idle = max_idle
+        self.smtp_options = smtp_options
+        self._idle: List[Tuple[float, aiosmtplib.SMTP]] = []
+        self._slots = asyncio.Semaphore(size)
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        options = dict(self.smtp_options)
+        username = options.pop("username", None)
+        password = options.pop("password", None)
+        smtp = aiosmtplib.SMTP(**options)
+        await smtp.connect()
+        if username:
+            await smtp.login(username, password)
+        return smtp
+
+    @staticmethod
+    async def _discard(smtp: aiosmtplib.SMTP) -> None:
+        try:
+            await smtp.quit()
+        except Exception:
+            smtp.close()
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[aiosmtplib.SMTP]:
+        async with self._slots:
+            smtp: Optional[aiosmtplib.SMTP] = None
+            while self._idle and smtp is None:
+                idle_since, candidate = self._idle.pop()
+                if candidate.is_connected and time.monotonic() - idle_since < self.max_idle:
+                    smtp = candidate
+                else:
+                    await self._discard(candidate)
+            if smtp is None:
+                smtp = await self._connect()
+            try:
+                yield smtp
+            except BaseException:
+                await self._discard(smtp)
+                raise
+            self._idle.append((time.monotonic(), smtp))
+
+    async def send(self, message: EmailMessage) -> None:
+        try:
+            async with self.connection() as smtp:
+                await smtp.send_message(message)
+        except CONNECTION_ERRORS as exc:
+            logger.warning("SMTP connection lost (%s), retrying on a new one", exc)
+            async with self.connection() as smtp:
+                await smtp.send_message(message)
+
+    async def close(self) -> None:
+        while self._idle:
+            _, smtp = self._idle.pop()
+            await self._discard(smtp)
+
+
+def create_smtp_pool() -> SMTPPool:
+    return SMTPPool(
+        size=settings.SMTP_POOL_SIZE,
+        max_idle=settings.SMTP_POOL_MAX_IDLE_SECONDS,
+        hostname=settings.MAIL_SERVER,
+        port=settings.MAIL_PORT,
+        username=settings.MAIL_USERNAME if settings.USE_CREDENTIALS else None,
+        password=settings.MAIL_PASSWORD if settings.USE_CREDENTIALS else None,
+        start_tls=settings.MAIL_STARTTLS,
+        use_tls=settings.MAIL_SSL_TLS,
+        validate_certs=settings.VALIDATE_CERTS,
+        timeout=settings.SMTP_TIMEOUT_SECONDS,
+    )
+
+
 async def send_email(
+    pool: SMTPPool,
     email_to: List[EmailStr],
     subject: str,
     html_content: str,
 ) -> None:
-    message = MessageSchema(
-        subject=subject,
-        recipients=email_to,
-        body=html_content,
-        subtype=MessageType.html
-    )
-    fm = FastMail(conf)
-    await fm.send_message(message)
+    if settings.SUPPRESS_SEND:
+        return
+    await pool.send(build_message(email_to, subject, html_content))
@@ -0,0 +1,120 @@
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Any, Dict, List, MutableMapping, Sequence, Tuple
+
+# Upper bounds of the histogram buckets; +Inf is implied.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+# Label for requests that matched no route, so unknown paths cannot create
+# unbounded label values.
+UNMATCHED = "<unmatched>"
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: Any) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+
+
+class RequestMetrics:
+    """
+    Per-process HTTP metrics, labelled by method and route template: request
+    counts by status, latency and response size histograms, and requests in
+    flight. Updated from the event loop only, so no locking is needed.
+    """
+
+    def __init__(self):
+        self.in_flight = 0
+        self.requests: Dict[Tuple[str, str, int], int] = defaultdict(int)
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.sizes: Dict[Tuple[str, str], Histogram] = {}
+        # Keyed by id(): routes are unhashable, and live as long as the app.
+        self._templates: Dict[int, str] = {}
+
+    def route_template(self, scope: MutableMapping[str, Any]) -> str:
+        """
+        The matched route's full path template, e.g. /api/v1/events/{id}.
+        Routes of included routers only carry their own part of the template,
+        so the prefix is recovered from the request path once per route.
+        """
+        route = scope.get("route")
+        if route is None:
+            return UNMATCHED
+        template = self._templates.get(id(route))
+        if template is None:
+            path = scope["path"]
+            template = route.path
+            for i, char in enumerate(path):
+                if char == "/" and route.path_regex.match(path[i:]):
+                    template = path[:i] + route.path
+                    break
+            self._templates[id(route)] = template
+        return template
+
+    def observe(
+        self, scope: MutableMapping[str, Any], *, status: int, size: int, seconds: float
+    ) -> None:
+        key = (scope["method"], self.route_template(scope))
+        self.requests[(*key, status)] += 1
+        latency = self.latency.get(key)
+        if latency is None:
+            latency = self.latency[key] = Histogram(LATENCY_BUCKETS)
+            self.sizes[key] = Histogram(SIZE_BUCKETS)
+        latency.observe(seconds)
+        self.sizes[key].observe(size)
+
+    def _histogram_lines(
+        self, name: str, histograms: Dict[Tuple[str, str], Histogram]
+    ) -> List[str]:
+        lines = []
+        for (method, route), histogram in sorted(histograms.items()):
+            labels = _labels(method=method, route=route)
+            cumulative = 0
+            for bound, count in zip((*histogram.bounds, "+Inf"), histogram.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+            lines.append(f"{name}_count{{{labels}}} {cumulative}")
+        return lines
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = [
+            "# HELP http_requests_total HTTP requests by method, route and status.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route, status), count in sorted(self.requests.items()):
+            lines.append(
+                f"http_requests_total{{{_labels(method=method, route=route, status=status)}}} {count}"
+            )
+        lines += [
+            "# HELP http_request_duration_seconds Time to the end of the response body.",
+            "# TYPE http_request_duration_seconds histogram",
+            *self._histogram_lines("http_request_duration_seconds", self.latency),
+            "# HELP http_response_size_bytes Response body bytes as sent, after compression.",
+            "# TYPE http_response_size_bytes histogram",
+            *self._histogram_lines("http_response_size_bytes", self.sizes),
+            "# HELP http_requests_in_flight HTTP requests being served.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+request_metrics = RequestMetrics()
@@ -1,20 +1,92 @@
+import re
 import time
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
-from app.utils.logger import get_logger
+import uuid
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.metrics import RequestMetrics, request_metrics
+from app.utils.logger import get_logger, request_id
 
 logger = get_logger(__name__)
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
-        
-        response = await call_next(request)
-        
-        process_time = time.time() - start_time
-        logger.info(
-            f"Method: {request.method} Path: {request.url.path} "
-            f"Status: {response.status_code} Process Time: {process_time:.4f}s"
-        )
-        
-        return response
+# Client-supplied request ids are kept only if they look like one, so they
+# cannot inject anything into the logs or the response headers.
+REQUEST_ID_PATTERN = re.compile(rb"[A-Za-z0-9._:-]{1,128}")
+
+class MetricsMiddleware:
+    """
+    Records every HTTP request in `metrics` and logs it. Plain ASGI: it only
+    watches the response messages on their way out, without the extra task
+    and body copy of BaseHTTPMiddleware.
+    """
+
+    def __init__(self, app: ASGIApp, metrics: RequestMetrics = request_metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        self.metrics.in_flight += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.metrics.in_flight -= 1
+            process_time = time.perf_counter() - start_time
+            self.metrics.observe(scope, status=status, size=size, seconds=process_time)
+            logger.info(
+                "Method: %s Path: %s Status: %d Process Time: %.4fs",
+                scope["method"],
+                scope["path"],
+                status,
+                process_time,
+            )
+
+
+class RequestIdMiddleware:
+    """
+    Gives every HTTP request an id, taken from the X-Request-ID header when it
+    has one or generated, attaches it to everything logged while the request
+    is served and returns it in the X-Request-ID response header.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        value = None
+        for name, header in scope["headers"]:
+            if name == b"x-request-id":
+                if REQUEST_ID_PATTERN.fullmatch(header):
+                    value = header.decode()
+                break
+        if value is None:
+            value = uuid.uuid4().hex
+        header_value = value.encode()
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), (b"x-request-id", header_value)]
+            await send(message)
+
+        token = request_id.set(value)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id.reset(token)
@@ -1,5 +1,145 @@
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
+import asyncio
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional
 
-limiter = Limiter(key_func=get_remote_address)
+from redis.exceptions import RedisError
+
+from app.core.cache import cache
+from app.core.config import settings
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# KEYS[1] bucket; ARGV[1] capacity, ARGV[2] refill per second, ARGV[3] tokens
+# wanted. Grants up to ARGV[3] whole tokens and returns {granted, seconds until
+# the next token}. Time comes from Redis so every process shares one clock.
+TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local wanted = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local granted = math.min(wanted, math.floor(tokens))
+tokens = tokens - granted
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate * 1000) + 1000)
+return {granted, tostring(math.max(0, 1 - tokens) / rate)}
+"""
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+class RateLimit(NamedTuple):
+    amount: int
+    period: int
+
+    @classmethod
+    def parse(cls, value: str) -> "RateLimit":
+        """Parse "10/minute" (or second, hour, day)."""
+        match = re.fullmatch(r"\s*(\d+)\s*/\s*(second|minute|hour|day)s?\s*", value)
+        if not match or int(match.group(1)) < 1:
+            raise ValueError(f"Invalid rate limit {value!r}")
+        return cls(int(match.group(1)), PERIODS[match.group(2)])
+
+
+class _Lease:
+    __slots__ = ("tokens", "expires", "blocked_until", "lock")
+
+    def __init__(self):
+        self.tokens = 0
+        self.expires = 0.0
+        self.blocked_until = 0.0
+        self.lock = asyncio.Lock()
+
+    def take(self, now: float) -> bool:
+        if self.tokens > 0 and now < self.expires:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class RateLimiter:
+    """
+    Token buckets in Redis, shared by every process.
+
+    A bucket holds up to `amount` tokens and refills at `amount` per `period`.
+    Rather than spending one Redis round trip per request, a process leases a
+    few tokens at a time (at most `lease_size`, and at most a tenth of the
+    bucket, so small limits are not hoarded by one process) and spends them
+    locally for up to `lease_seconds`. Tokens are only ever handed out once,
+    so leasing never admits more than the limit; leased tokens that expire
+    unused make it slightly stricter. A denied key is refused locally until
+    its next token is due. If Redis is unavailable, requests are allowed.
+    """
+
+    def __init__(self, redis, *, lease_size: int, lease_seconds: float, max_keys: int):
+        self.lease_size = lease_size
+        self.lease_seconds = lease_seconds
+        self.max_keys = max_keys
+        self._leases: "OrderedDict[str, _Lease]" = OrderedDict()
+        self._take = redis.register_script(TAKE_SCRIPT)
+
+    def _lease(self, key: str) -> _Lease:
+        lease = self._leases.get(key)
+        if lease is None:
+            lease = self._leases[key] = _Lease()
+            if len(self._leases) > self.max_keys:
+                self._leases.popitem(last=False)
+        else:
+            self._leases.move_to_end(key)
+        return lease
+
+    async def acquire(self, key: str, limit: RateLimit) -> Optional[float]:
+        """
+        Take one token from `key`'s bucket. Returns None when allowed,
+        otherwise the number of seconds until the next token.
+        """
+        lease = self._lease(key)
+        now = time.monotonic()
+        if lease.take(now):
+            return None
+        if now < lease.blocked_until:
+            return lease.blocked_until - now
+        async with lease.lock:
+            # Another request may have refilled the lease while we waited.
+            now = time.monotonic()
+            if lease.take(now):
+                return None
+            size = max(1, min(self.lease_size, limit.amount // 10))
+            try:
+                granted, wait = await self._take(
+                    keys=[f"ratelimit:{key}"],
+                    args=[limit.amount, limit.amount / limit.period, size],
+                )
+            except RedisError as exc:
+                logger.warning("Rate limiter unavailable, allowing %s: %s", key, exc)
+                return None
+            now = time.monotonic()
+            if not granted:
+                lease.blocked_until = now + float(wait)
+                return float(wait)
+            lease.tokens = int(granted) - 1
+            lease.expires = now + self.lease_seconds
+            return None
+
+
+# Limits per endpoint, keyed "<module>.<function>", e.g. "events.read_all_events".
+route_limits: Dict[str, RateLimit] = {
+    route: RateLimit.parse(value) for route, value in settings.RATE_LIMITS.items()
+}
+default_limit: Optional[RateLimit] = (
+    RateLimit.parse(settings.RATE_LIMIT_DEFAULT) if settings.RATE_LIMIT_DEFAULT else None
+)
+
+limiter = RateLimiter(
+    cache.redis,
+    lease_size=settings.RATE_LIMIT_LEASE_SIZE,
+    lease_seconds=settings.RATE_LIMIT_LEASE_SECONDS,
+    max_keys=settings.RATE_LIMIT_LOCAL_MAX_KEYS,
+)
@@ -0,0 +1,56 @@
+from functools import lru_cache
+from typing import Any, Mapping, Optional
+
+from fastapi import Response
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+
+
+@lru_cache(maxsize=None)
+def _adapter(schema: Any) -> TypeAdapter:
+    return TypeAdapter(schema)
+
+
+def dump_json(schema: Any, content: Any) -> bytes:
+    """
+    Validate `content` (ORM objects, dicts, models) against `schema` once and
+    encode it straight to JSON bytes in pydantic-core, without building an
+    intermediate dict or going through json.dumps.
+    """
+    adapter = _adapter(schema)
+    return adapter.dump_json(adapter.validate_python(content, from_attributes=True))
+
+
+def render(
+    schema: Any,
+    content: Any,
+    *,
+    status_code: int = 200,
+    headers: Optional[Mapping[str, str]] = None,
+) -> Response:
+    """
+    Response for `content` serialised as `schema`. Returning a Response makes
+    FastAPI skip its own response_model pass, which is kept on the route for
+    the OpenAPI schema only.
+    """
+    return Response(
+        dump_json(schema, content),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json",
+    )
+
+
+def render_serialized(
+    content: Any,
+    *,
+    status_code: int = 200,
+    headers: Optional[Mapping[str, str]] = None,
+) -> Response:
+    """Response for data that is already in its JSON form, e.g. read from a cache."""
+    return Response(
+        to_json(content),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json",
+    )
@@ -1,3 +1,4 @@
 from .crud_user import user
 from .crud_event import event
 from .crud_booking import booking
+from .crud_outbox import outbox
@@ -1,14 +1,28 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+import base64
+import binascii
+import json
+from datetime import datetime
+from functools import cached_property
+from typing import Any, AsyncIterator, Dict, Generic, List, Optional, Tuple, Type, TypeVar, Union
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import Select, delete, insert, select, tuple_, update
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.sql.dml import UpdateBase
 from app.core.database import Base
 
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
+class InvalidCursorError(ValueError):
+    """A pagination cursor that was not issued by `get_page`."""
+
+
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    # Keyset order used by get_page; must end in a unique column.
+    cursor_columns: Tuple[str, ...] = ("created_at", "id")
+
     def __init__(self, model: Type[ModelType]):
         self.model = model
 
@@ -22,12 +36,102 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         result = await db.execute(select(self.model).offset(skip).limit(limit))
         return result.scalars().all()
 
+    def encode_cursor(self, obj: ModelType) -> str:
+        values = []
+        for name in self.cursor_columns:
+            value = getattr(obj, name)
+            values.append(value.isoformat() if isinstance(value, datetime) else str(value))
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor: str) -> List[Any]:
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+            if not isinstance(values, list) or len(values) != len(self.cursor_columns):
+                raise InvalidCursorError(cursor)
+            decoded = []
+            for name, value in zip(self.cursor_columns, values):
+                python_type = getattr(self.model, name).type.python_type
+                if python_type is datetime:
+                    decoded.append(datetime.fromisoformat(value))
+                else:
+                    decoded.append(python_type(value))
+            return decoded
+        except (binascii.Error, TypeError, ValueError) as exc:
+            raise InvalidCursorError(cursor) from exc
+
+    async def get_page(
+        self,
+        db: AsyncSession,
+        *,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        stmt: Optional[Select] = None,
+    ) -> Tuple[List[ModelType], Optional[str]]:
+        """
+        Keyset pagination over `cursor_columns`. Returns one page of `stmt`
+        (all rows by default) and the cursor of the next page, or None on the
+        last one. Raises InvalidCursorError for malformed cursors.
+        """
+        columns = [getattr(self.model, name) for name in self.cursor_columns]
+        if stmt is None:
+            stmt = select(self.model)
+        if cursor:
+            stmt = stmt.where(tuple_(*columns) > tuple_(*self.decode_cursor(cursor)))
+        result = await db.execute(stmt.order_by(*columns).limit(limit + 1))
+        rows = result.scalars().all()
+        if len(rows) > limit:
+            return rows[:limit], self.encode_cursor(rows[limit - 1])
+        return rows, None
+
+    async def iter_pages(
+        self, db: AsyncSession, *, batch_size: int = 500, stmt: Optional[Select] = None
+    ) -> AsyncIterator[List[ModelType]]:
+        """
+        Walk `stmt` page by page. The session is closed between pages, so
+        neither its identity map nor its connection is held while the caller
+        works through a page.
+        """
+        cursor = None
+        while True:
+            rows, cursor = await self.get_page(db, limit=batch_size, cursor=cursor, stmt=stmt)
+            await db.close()
+            if rows:
+                yield rows
+            if cursor is None:
+                return
+
+    @cached_property
+    def _expression_keys(self) -> List[str]:
+        # Mapped SQL expressions (column_property) that are not table columns.
+        return [
+            prop.key
+            for prop in self.model.__mapper__.column_attrs
+            if prop.key not in self.model.__table__.c
+        ]
+
+    async def _returning_one(self, db: AsyncSession, stmt: UpdateBase) -> Optional[ModelType]:
+        """
+        Run an INSERT, UPDATE or DELETE of one row and return the row as an
+        object. RETURNING the entity leaves out its mapped SQL expressions, so
+        they are returned next to it and set on the object.
+        """
+        keys = self._expression_keys
+        row = (
+            await db.execute(
+                stmt.returning(self.model, *[getattr(self.model, key) for key in keys])
+            )
+        ).first()
+        if row is None:
+            return None
+        obj = row[0]
+        for key, value in zip(keys, row[1:]):
+            set_committed_value(obj, key, value)
+        return obj
+
     async def create(self, db: AsyncSession, *, obj_in: CreateSchemaType) -> ModelType:
-        obj_in_data = obj_in.model_dump()
-        db_obj = self.model(**obj_in_data)
-        db.add(db_obj)
+        """Insert a row, reading it back with RETURNING, and commit."""
+        db_obj = await self._returning_one(db, insert(self.model).values(**obj_in.model_dump()))
         await db.commit()
-        await db.refresh(db_obj)
         return db_obj
 
     async def update(
@@ -37,22 +141,29 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         db_obj: ModelType,
         obj_in: Union[UpdateSchemaType, Dict[str, Any]]
     ) -> ModelType:
-        obj_data = db_obj.__dict__
+        """
+        Write the given fields that are table columns in one UPDATE and commit.
+        RETURNING refreshes `db_obj` in place, so no SELECT follows.
+        """
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
             update_data = obj_in.model_dump(exclude_unset=True)
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
-        db.add(db_obj)
+        columns = self.model.__table__.c
+        values = {field: value for field, value in update_data.items() if field in columns}
+        if not values:
+            return db_obj
+        db_obj = await self._returning_one(
+            db, update(self.model).where(self.model.id == db_obj.id).values(**values)
+        )
         await db.commit()
-        await db.refresh(db_obj)
         return db_obj
 
-    async def remove(self, db: AsyncSession, *, id: Any) -> ModelType:
-        result = await db.execute(select(self.model).filter(self.model.id == id))
-        obj = result.scalars().first()
-        await db.delete(obj)
+    async def remove(self, db: AsyncSession, *, id: Any) -> Optional[ModelType]:
+        """
+        Delete a row in one statement, returning it, or None if there was no
+        such row. Dependent rows go through the foreign keys' ON DELETE.
+        """
+        obj = await self._returning_one(db, delete(self.model).where(self.model.id == id))
         await db.commit()
         return obj
@@ -1,35 +1,466 @@
-from typing import List
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple, Union
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import Row, case, exists, insert, literal, select, true, union_all, update
+from sqlalchemy.orm.attributes import set_committed_value
 from app.crud.base import CRUDBase
-from app.models.booking import Booking
-from app.schemas.booking import BookingCreate, BookingUpdate
+from app.crud.crud_event import event as crud_event
+from app.crud.crud_outbox import outbox as crud_outbox
+from app.models.booking import Booking, BookingStatus
+from app.models.event import Event
+from app.models.outbox import OutboxKind, OutboxMessage
+from app.models.user import User
+from app.schemas.booking import BookingCheckout, BookingCreate, BookingUpdate
 import uuid
 
+
+class BookingError(Exception):
+    """Base class for booking engine failures."""
+
+
+class EventNotFoundError(BookingError):
+    pass
+
+
+class SoldOutError(BookingError):
+    pass
+
+
+class BookingConflictError(BookingError):
+    """The booking was modified concurrently; the caller should retry."""
+
+
+class HotInventoryError(BookingError):
+    """The event's seats are sold from Redis, outside the database transaction."""
+
+
+# Event fields returned alongside a claim so callers don't need a second read.
+EVENT_CLAIM_COLUMNS = (Event.id, Event.title, Event.date, Event.location, Event.description)
+
+# One attendee per booking, as exported to organizers.
+ATTENDEE_COLUMNS = (
+    Booking.id.label("booking_id"),
+    Booking.status,
+    Booking.tickets_count,
+    Booking.guest_name,
+    Booking.guest_email,
+    User.name.label("user_name"),
+    User.email.label("user_email"),
+    Booking.created_at,
+)
+
+
 class CRUDBooking(CRUDBase[Booking, BookingCreate, BookingUpdate]):
-    async def create_with_user(
+    def _claim_statement(self, *, event_id: uuid.UUID, tickets: int, allow_hot: bool = True):
+        # Conditional decrement: the row lock taken by the UPDATE serialises
+        # concurrent claims and the capacity predicate is re-checked after the
+        # lock is acquired, so the check and the decrement cannot interleave.
+        stmt = (
+            update(Event)
+            .where(Event.id == event_id, Event.capacity >= tickets)
+            .values(capacity=Event.capacity - tickets)
+            .returning(*EVENT_CLAIM_COLUMNS)
+        )
+        if not allow_hot:
+            # New seats of hot events are only handed out by the Redis counter.
+            stmt = stmt.where(Event.hot_inventory.is_(False))
+        return stmt
+
+    def _booking_values(
+        self, *, obj_in: BookingCreate, user_id: uuid.UUID
+    ) -> Dict[str, Any]:
+        return {
+            "id": uuid.uuid4(),
+            "user_id": user_id,
+            "event_id": obj_in.event_id,
+            "status": BookingStatus.CONFIRMED,
+            "tickets_count": obj_in.tickets_count,
+            "guest_name": obj_in.user_name,
+            "guest_email": obj_in.user_email,
+            "created_at": datetime.now(timezone.utc),
+        }
+
+    async def reserve(
         self, db: AsyncSession, *, obj_in: BookingCreate, user_id: uuid.UUID
+    ) -> Tuple[Booking, Row]:
+        """
+        Claim seats and insert the booking in a single transaction.
+
+        Returns the new booking and the claimed event's fields. Raises
+        EventNotFoundError or SoldOutError without touching the database again;
+        seats of sharded events are taken from their shards in the same
+        transaction. The booking's confirmation email is committed to the
+        outbox along with it.
+        """
+        values = self._booking_values(obj_in=obj_in, user_id=user_id)
+        try:
+            if db.get_bind().dialect.name == "postgresql":
+                event = await self._reserve_single_statement(
+                    db, values=values, tickets=obj_in.tickets_count
+                )
+            else:
+                event = await self._reserve_in_transaction(
+                    db, values=values, tickets=obj_in.tickets_count
+                )
+        except BookingError:
+            await db.rollback()
+            raise
+        await db.commit()
+        return Booking(**values), event
+
+    async def _reserve_single_statement(
+        self, db: AsyncSession, *, values: Dict[str, Any], tickets: int
+    ) -> Row:
+        # One round trip: the claim and the insert are data-modifying CTEs, and
+        # the outer join against the plain event lookup tells "not found" apart
+        # from "sold out" without a follow-up query.
+        target = (
+            select(*EVENT_CLAIM_COLUMNS, Event.capacity_shards, Event.hot_inventory)
+            .where(Event.id == values["event_id"])
+            .cte("target")
+        )
+        claimed = self._claim_statement(
+            event_id=values["event_id"], tickets=tickets, allow_hot=False
+        ).cte("claimed")
+        # Sharded events keep (almost) nothing on the event row; when the row
+        # claim misses, take the seats from a free shard in the same statement.
+        shard_claimed = crud_event.shard_claim_statement(
+            ~exists(claimed.select()),
+            event_id=values["event_id"],
+            tickets=tickets,
+        ).cte("shard_claimed")
+        source = union_all(
+            select(claimed.c.id.label("event_id")),
+            select(shard_claimed.c.event_id),
+        ).subquery("source")
+        columns = [c for c in values if c != "event_id"]
+        inserted = (
+            insert(Booking)
+            .from_select(
+                columns + ["event_id"],
+                select(
+                    *[literal(values[c], Booking.__table__.c[c].type) for c in columns],
+                    source.c.event_id,
+                ),
+            )
+            .returning(Booking.id)
+            .cte("inserted")
+        )
+        outbox_values = crud_outbox.values(
+            kind=OutboxKind.BOOKING_CONFIRMATION, aggregate_id=None
+        )
+        outbox_columns = [c for c in outbox_values if c != "aggregate_id"]
+        # Not referenced by the outer query; PostgreSQL runs it regardless.
+        outboxed = (
+            insert(OutboxMessage)
+            .from_select(
+                outbox_columns + ["aggregate_id"],
+                select(
+                    *[
+                        literal(outbox_values[c], OutboxMessage.__table__.c[c].type)
+                        for c in outbox_columns
+                    ],
+                    inserted.c.id,
+                ),
+            )
+            .cte("outboxed")
+        )
+        stmt = (
+            select(
+                *target.c,
+                inserted.c.id.label("booking_id"),
+            )
+            .select_from(target)
+            .outerjoin(claimed, true())
+            .outerjoin(inserted, true())
+            .add_cte(outboxed)
+        )
+        row = (await db.execute(stmt)).first()
+        if row is None:
+            raise EventNotFoundError(values["event_id"])
+        if row.booking_id is None:
+            await self._reserve_from_shards(db, event=row, values=values, tickets=tickets)
+        return row
+
+    async def _reserve_in_transaction(
+        self, db: AsyncSession, *, values: Dict[str, Any], tickets: int
+    ) -> Row:
+        # Dialects without writable CTEs (SQLite in development) get the same
+        # semantics from two statements inside the one transaction.
+        event = (
+            await db.execute(
+                self._claim_statement(
+                    event_id=values["event_id"], tickets=tickets, allow_hot=False
+                )
+            )
+        ).first()
+        if event is None:
+            event = (
+                await db.execute(
+                    select(*EVENT_CLAIM_COLUMNS, Event.capacity_shards, Event.hot_inventory)
+                    .where(Event.id == values["event_id"])
+                )
+            ).first()
+            if event is None:
+                raise EventNotFoundError(values["event_id"])
+            await self._reserve_from_shards(db, event=event, values=values, tickets=tickets)
+            return event
+        await db.execute(insert(Booking).values(**values))
+        await crud_outbox.add(
+            db, kind=OutboxKind.BOOKING_CONFIRMATION, aggregate_ids=[values["id"]]
+        )
+        return event
+
+    async def _reserve_from_shards(
+        self, db: AsyncSession, *, event: Row, values: Dict[str, Any], tickets: int
+    ) -> None:
+        # The event row is empty (or never held seats) for sharded events.
+        if event.hot_inventory or not event.capacity_shards:
+            raise SoldOutError(values["event_id"])
+        if not await crud_event.claim_from_shards(
+            db, event_id=values["event_id"], tickets=tickets, shards=event.capacity_shards
+        ):
+            raise SoldOutError(values["event_id"])
+        await db.execute(insert(Booking).values(**values))
+        await crud_outbox.add(
+            db, kind=OutboxKind.BOOKING_CONFIRMATION, aggregate_ids=[values["id"]]
+        )
+
+    async def reserve_many(
+        self,
+        db: AsyncSession,
+        *,
+        event_id: uuid.UUID,
+        requests: Sequence[Tuple[BookingCreate, uuid.UUID]],
+    ) -> List[Union[Tuple[Booking, Row], BookingError]]:
+        """
+        Book several requests for one event in a single transaction. Seats are
+        allocated in request order under the event's row lock and all bookings
+        go in with one multi-row INSERT. Returns, per request, either what
+        `reserve` returns or the BookingError it would have raised.
+        """
+        while True:
+            event = (
+                await db.execute(
+                    select(
+                        *EVENT_CLAIM_COLUMNS,
+                        Event.capacity,
+                        Event.capacity_shards,
+                        Event.hot_inventory,
+                    )
+                    .where(Event.id == event_id)
+                    .with_for_update()
+                )
+            ).first()
+            if event is None:
+                await db.rollback()
+                return [EventNotFoundError(event_id) for _ in requests]
+            if event.hot_inventory or event.capacity_shards:
+                # Seats are not on the event row; book one by one.
+                await db.rollback()
+                results = []
+                for obj_in, user_id in requests:
+                    try:
+                        results.append(await self.reserve(db, obj_in=obj_in, user_id=user_id))
+                    except BookingError as exc:
+                        results.append(exc)
+                return results
+
+            remaining = event.capacity
+            results, rows = [], []
+            for obj_in, user_id in requests:
+                if obj_in.tickets_count > remaining:
+                    results.append(SoldOutError(event_id))
+                    continue
+                values = self._booking_values(obj_in=obj_in, user_id=user_id)
+                remaining -= obj_in.tickets_count
+                rows.append(values)
+                results.append((Booking(**values), event))
+            if rows:
+                taken = event.capacity - remaining
+                claimed = await db.execute(
+                    update(Event)
+                    .where(Event.id == event_id, Event.capacity >= taken)
+                    .values(capacity=Event.capacity - taken)
+                )
+                if not claimed.rowcount:
+                    # Capacity moved without a row lock (SQLite); allocate again.
+                    await db.rollback()
+                    continue
+                await db.execute(insert(Booking), rows)
+                await crud_outbox.add(
+                    db,
+                    kind=OutboxKind.BOOKING_CONFIRMATION,
+                    aggregate_ids=[row["id"] for row in rows],
+                )
+            await db.commit()
+            return results
+
+    async def checkout(
+        self, db: AsyncSession, *, obj_in: BookingCheckout, user_id: uuid.UUID
+    ) -> List[Booking]:
+        """
+        Book every item of a cart in one transaction, or none of them.
+
+        The events are locked in id order, so checkouts of overlapping carts
+        queue behind each other instead of deadlocking. Seats come off the
+        event rows in one UPDATE (or from the shards of sharded events), the
+        bookings go in with one multi-row INSERT, and a single outbox message
+        confirms the whole cart. Raises EventNotFoundError, SoldOutError or
+        HotInventoryError for the first event that cannot be booked, with
+        nothing written.
+        """
+        wanted: Dict[uuid.UUID, int] = {}
+        for item in obj_in.items:
+            wanted[item.event_id] = wanted.get(item.event_id, 0) + item.tickets_count
+        event_ids = sorted(wanted)
+        while True:
+            result = await db.execute(
+                select(Event.id, Event.capacity, Event.capacity_shards, Event.hot_inventory)
+                .where(Event.id.in_(event_ids))
+                .order_by(Event.id)
+                .with_for_update()
+            )
+            events = {event.id: event for event in result}
+            from_rows: Dict[uuid.UUID, int] = {}
+            try:
+                for event_id in event_ids:
+                    event = events.get(event_id)
+                    if event is None:
+                        raise EventNotFoundError(event_id)
+                    if event.hot_inventory:
+                        raise HotInventoryError(event_id)
+                    if event.capacity >= wanted[event_id]:
+                        from_rows[event_id] = wanted[event_id]
+                    elif not event.capacity_shards or not await crud_event.claim_from_shards(
+                        db,
+                        event_id=event_id,
+                        tickets=wanted[event_id],
+                        shards=event.capacity_shards,
+                    ):
+                        raise SoldOutError(event_id)
+            except BookingError:
+                await db.rollback()
+                raise
+            if from_rows:
+                tickets = case(from_rows, value=Event.id)
+                claimed = await db.execute(
+                    update(Event)
+                    .where(Event.id.in_(from_rows), Event.capacity >= tickets)
+                    .values(capacity=Event.capacity - tickets)
+                )
+                if claimed.rowcount != len(from_rows):
+                    # Capacity moved without a row lock (SQLite); allocate again.
+                    await db.rollback()
+                    continue
+            break
+
+        checkout_id = uuid.uuid4()
+        rows = [
+            {
+                **self._booking_values(
+                    obj_in=BookingCreate.model_construct(
+                        event_id=item.event_id,
+                        tickets_count=item.tickets_count,
+                        user_name=obj_in.user_name,
+                        user_email=obj_in.user_email,
+                    ),
+                    user_id=user_id,
+                ),
+                "checkout_id": checkout_id,
+            }
+            for item in obj_in.items
+        ]
+        await db.execute(insert(Booking).values(rows))
+        await crud_outbox.add(
+            db, kind=OutboxKind.CHECKOUT_CONFIRMATION, aggregate_ids=[checkout_id]
+        )
+        await db.commit()
+        return [Booking(**values) for values in rows]
+
+    async def change_tickets(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: Booking,
+        obj_in: Union[BookingUpdate, Dict[str, Any]],
     ) -> Booking:
-        obj_in_data = obj_in.model_dump()
-        if "user_name" in obj_in_data:
-            obj_in_data["guest_name"] = obj_in_data.pop("user_name")
-        if "user_email" in obj_in_data:
-            obj_in_data["guest_email"] = obj_in_data.pop("user_email")
-        db_obj = Booking(**obj_in_data, user_id=user_id)
-        db.add(db_obj)
+        """
+        Apply a booking update, adjusting event capacity by the ticket delta in
+        the same transaction. Raises SoldOutError when the increase does not fit
+        and BookingConflictError if the booking changed since it was read.
+        """
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.model_dump(exclude_unset=True)
+        old_tickets = db_obj.tickets_count
+        ticket_diff = update_data.get("tickets_count", old_tickets) - old_tickets
+        try:
+            if ticket_diff != 0:
+                claimed = (
+                    await db.execute(
+                        self._claim_statement(event_id=db_obj.event_id, tickets=ticket_diff)
+                    )
+                ).first()
+                if claimed is None:
+                    shards = await db.scalar(
+                        select(Event.capacity_shards).where(Event.id == db_obj.event_id)
+                    )
+                    if not shards or not await crud_event.claim_from_shards(
+                        db, event_id=db_obj.event_id, tickets=ticket_diff, shards=shards
+                    ):
+                        raise SoldOutError(db_obj.event_id)
+            row = (
+                await db.execute(
+                    update(Booking)
+                    .where(Booking.id == db_obj.id, Booking.tickets_count == old_tickets)
+                    .values(**update_data)
+                    .returning(*Booking.__table__.c)
+                )
+            ).first()
+            if row is None:
+                raise BookingConflictError(db_obj.id)
+        except BookingError:
+            await db.rollback()
+            raise
         await db.commit()
-        await db.refresh(db_obj)
+        for field, value in row._mapping.items():
+            set_committed_value(db_obj, field, value)
         return db_obj
 
-    async def get_multi_by_user(
-        self, db: AsyncSession, *, user_id: uuid.UUID, skip: int = 0, limit: int = 100
-    ) -> List[Booking]:
-        result = await db.execute(
-            select(Booking)
-            .filter(Booking.user_id == user_id)
-            .offset(skip)
-            .limit(limit)
+    async def get_page_by_user(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: uuid.UUID,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Booking], Optional[str]]:
+        return await self.get_page(
+            db,
+            limit=limit,
+            cursor=cursor,
+            stmt=select(Booking).filter(Booking.user_id == user_id),
+        )
+
+    async def stream_attendees(
+        self, db: AsyncSession, *, event_id: uuid.UUID, chunk_size: int = 1000
+    ) -> AsyncIterator[Sequence[Row]]:
+        """
+        Yield an event's bookings (ATTENDEE_COLUMNS) in booking order, in chunks
+        of `chunk_size` rows read from a server-side cursor. Only one chunk is
+        held in memory, and the next one is not fetched until the caller asks
+        for it.
+        """
+        result = await db.stream(
+            select(*ATTENDEE_COLUMNS)
+            .join(User, User.id == Booking.user_id)
+            .where(Booking.event_id == event_id)
+            .order_by(Booking.created_at, Booking.id)
+            .execution_options(yield_per=chunk_size)
         )
-        return result.scalars().all()
+        async for rows in result.partitions():
+            yield rows
 
 booking = CRUDBooking(Booking)
@@ -1,37 +1,133 @@
-from typing import List
+import random
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import and_, delete, func, insert, literal, literal_column, or_, select, update
 from app.crud.base import CRUDBase
+from app.models.capacity_shard import CapacityShard
 from app.models.event import Event
 from app.schemas.event import EventCreate, EventUpdate
 import uuid
 
+def _like_pattern(word: str) -> str:
+    escaped = word.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
 class CRUDEvent(CRUDBase[Event, EventCreate, EventUpdate]):
+    # Listings run in calendar order.
+    cursor_columns = ("date", "id")
+
     async def create_with_organizer(
         self, db: AsyncSession, *, obj_in: EventCreate, organizer_id: uuid.UUID
     ) -> Event:
-        obj_in_data = obj_in.model_dump()
-        db_obj = Event(**obj_in_data, organizer_id=organizer_id)
-        db.add(db_obj)
+        db_obj = await self._returning_one(
+            db, insert(Event).values(**obj_in.model_dump(), organizer_id=organizer_id)
+        )
         await db.commit()
-        await db.refresh(db_obj)
         return db_obj
 
+    async def insert_many(self, db: AsyncSession, *, rows: Sequence[Dict[str, Any]]) -> None:
+        """
+        Insert complete event rows, every one with the same keys, without
+        committing. On asyncpg they are sent with COPY, which is about twice
+        as fast as a batched INSERT. Other drivers get a Core executemany on
+        the table: the ORM bulk path leaves out None values, which splits rows
+        with and without a description into separate statements.
+        """
+        if not rows:
+            return
+        if db.get_bind().dialect.driver == "asyncpg":
+            columns = list(rows[0])
+            connection = await (await db.connection()).get_raw_connection()
+            await connection.driver_connection.copy_records_to_table(
+                Event.__tablename__,
+                records=[tuple(row[column] for column in columns) for row in rows],
+                columns=columns,
+            )
+        else:
+            await db.execute(insert(Event.__table__), rows)
+
+    def _match_words(
+        self, db: AsyncSession, vector: Any, columns: Sequence[Any], text: str, *, prefix: bool
+    ):
+        """
+        Criterion matching every word of `text`. PostgreSQL matches them as
+        whole words, or as word prefixes with `prefix`, against `vector`
+        through its GIN index; other databases look for each as a substring of
+        any of `columns`.
+        """
+        words = re.findall(r"\w+", text)
+        if not words:
+            return None
+        if db.get_bind().dialect.name == "postgresql":
+            query = " & ".join(f"{word}:*" if prefix else word for word in words)
+            # Inlined rather than bound: a cached generic plan cannot tell a
+            # rare word from a common one, and picks one plan for both.
+            return vector.bool_op("@@")(
+                func.to_tsquery(
+                    literal_column("'simple'::regconfig"), literal(query, literal_execute=True)
+                )
+            )
+        return and_(
+            *[
+                or_(*[column.ilike(_like_pattern(word), escape="\\") for column in columns])
+                for word in words
+            ]
+        )
+
+    async def search(
+        self,
+        db: AsyncSession,
+        *,
+        q: Optional[str] = None,
+        location: Optional[str] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        available: bool = False,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Event], Optional[str]]:
+        """
+        A page of the events matching all given filters, in date order like
+        get_page. `q` searches the title and description by word prefix,
+        `location` the location by whole word; `date_from` and `date_to`
+        bound the date (inclusive); `available` keeps events with seats left.
+        """
+        criteria = []
+        if q:
+            criteria.append(
+                self._match_words(
+                    db, Event.search_vector, (Event.title, Event.description), q, prefix=True
+                )
+            )
+        if location:
+            # Whole words: place names are typed in full, and PostgreSQL
+            # prices prefix lookups too high to use the index for them.
+            criteria.append(
+                self._match_words(db, Event.location_vector, (Event.location,), location, prefix=False)
+            )
+        if date_from:
+            criteria.append(Event.date >= date_from)
+        if date_to:
+            criteria.append(Event.date <= date_to)
+        if available:
+            criteria.append(Event.remaining_capacity > 0)
+        stmt = select(Event).where(*[c for c in criteria if c is not None])
+        return await self.get_page(db, limit=limit, cursor=cursor, stmt=stmt)
+
     async def get_multi_by_organizer(
         self, db: AsyncSession, *, organizer_id: uuid.UUID, skip: int = 0, limit: int = 100
     ) -> List[Event]:
         result = await db.execute(
             select(Event)
             .filter(Event.organizer_id == organizer_id)
+            .order_by(Event.date, Event.id)
             .offset(skip)
             .limit(limit)
         )
         return result.scalars().all()
 
-    async def get_all(self, db: AsyncSession) -> List[Event]:
-        result = await db.execute(select(Event))
-        return result.scalars().all()
-
     async def decrease_capacity(
         self, db: AsyncSession, *, event_id: uuid.UUID, tickets: int
     ) -> Event:
@@ -44,4 +140,168 @@ class CRUDEvent(CRUDBase[Event, EventCreate, EventUpdate]):
         # await db.refresh(event) # Avoid refresh to prevent MissingGreenlet
         return event
 
+    async def _lock_shards(self, db: AsyncSession, *, event_id: uuid.UUID) -> List[int]:
+        sharded = await db.execute(
+            select(CapacityShard.remaining)
+            .where(CapacityShard.event_id == event_id)
+            .with_for_update()
+        )
+        return list(sharded.scalars().all())
+
+    async def _spread_capacity(
+        self, db: AsyncSession, *, event_id: uuid.UUID, shards: int, total: int
+    ) -> None:
+        # Replaces the event's shard rows; the caller holds the event row lock.
+        await db.execute(delete(CapacityShard).where(CapacityShard.event_id == event_id))
+        if shards:
+            base, extra = divmod(total, shards)
+            await db.execute(
+                insert(CapacityShard),
+                [
+                    {"event_id": event_id, "shard": i, "remaining": base + (i < extra)}
+                    for i in range(shards)
+                ],
+            )
+
+    async def update(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: Event,
+        obj_in: Union[EventUpdate, Dict[str, Any]]
+    ) -> Event:
+        """
+        A capacity given for a sharded event is its new total of remaining
+        seats, spread over the shards under the event row lock.
+        """
+        if isinstance(obj_in, dict):
+            update_data = dict(obj_in)
+        else:
+            update_data = obj_in.model_dump(exclude_unset=True)
+        if update_data.get("capacity") is not None:
+            shards = await db.scalar(
+                select(Event.capacity_shards).where(Event.id == db_obj.id).with_for_update()
+            )
+            if shards:
+                await self._lock_shards(db, event_id=db_obj.id)
+                await self._spread_capacity(
+                    db, event_id=db_obj.id, shards=shards, total=update_data["capacity"]
+                )
+                update_data["capacity"] = 0
+        return await super().update(db, db_obj=db_obj, obj_in=update_data)
+
+    async def set_capacity_shards(
+        self, db: AsyncSession, *, event_id: uuid.UUID, shards: int
+    ) -> Optional[Event]:
+        """
+        Spread the event's remaining seats evenly over `shards` counter rows so
+        concurrent bookings stop queueing on the event row. `shards=0` folds the
+        shards back into `Event.capacity`.
+        """
+        event = (
+            await db.execute(select(Event).where(Event.id == event_id).with_for_update())
+        ).scalars().first()
+        if not event:
+            return None
+        total = event.capacity + sum(await self._lock_shards(db, event_id=event_id))
+        await self._spread_capacity(db, event_id=event_id, shards=shards, total=total)
+        await db.execute(
+            update(Event)
+            .where(Event.id == event_id)
+            .values(capacity=0 if shards else total, capacity_shards=shards)
+        )
+        await db.commit()
+        await db.refresh(event)
+        return event
+
+    async def get_remaining_capacity(self, db: AsyncSession, *, event_id: uuid.UUID) -> Optional[int]:
+        return await db.scalar(select(Event.remaining_capacity).where(Event.id == event_id))
+
+    def shard_claim_statement(self, *criteria, event_id: uuid.UUID, tickets: int):
+        """
+        Take seats from a random shard that can cover the request and that no
+        other transaction holds. SKIP LOCKED never waits, so this cannot
+        deadlock; it matches nothing when every eligible shard is busy.
+        """
+        pick = (
+            select(CapacityShard.shard)
+            .where(
+                CapacityShard.event_id == event_id,
+                CapacityShard.remaining >= tickets,
+                *criteria,
+            )
+            .order_by(func.random())
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        return (
+            update(CapacityShard)
+            .where(CapacityShard.event_id == event_id, CapacityShard.shard == pick)
+            .values(remaining=CapacityShard.remaining - tickets)
+            .returning(CapacityShard.event_id)
+        )
+
+    async def _take_from_shard(
+        self, db: AsyncSession, *, event_id: uuid.UUID, shard: Any, tickets: int
+    ) -> bool:
+        result = await db.execute(
+            update(CapacityShard)
+            .where(
+                CapacityShard.event_id == event_id,
+                CapacityShard.shard == shard,
+                CapacityShard.remaining >= tickets,
+            )
+            .values(remaining=CapacityShard.remaining - tickets)
+        )
+        return result.rowcount > 0
+
+    async def claim_from_shards(
+        self, db: AsyncSession, *, event_id: uuid.UUID, tickets: int, shards: int
+    ) -> bool:
+        """
+        Take `tickets` seats from the event's shards without committing.
+        Returns False when the shards are sold out, in which case the caller
+        must roll back.
+        """
+        for _ in range(shards):
+            claimed = await db.execute(self.shard_claim_statement(event_id=event_id, tickets=tickets))
+            if claimed.first() is not None:
+                return True
+            # All eligible shards are busy: queue on one of them. A conditional
+            # UPDATE that fails after waiting keeps its row lock, so the attempt
+            # runs in a savepoint and a miss releases the lock before retrying.
+            result = await db.execute(
+                select(CapacityShard.shard)
+                .where(CapacityShard.event_id == event_id, CapacityShard.remaining >= tickets)
+            )
+            eligible = result.scalars().all()
+            if not eligible:
+                break
+            savepoint = await db.begin_nested()
+            if await self._take_from_shard(
+                db, event_id=event_id, shard=random.choice(eligible), tickets=tickets
+            ):
+                await savepoint.commit()
+                return True
+            await savepoint.rollback()
+        # No single shard covers the request: lock them all in shard order and
+        # split the claim across them.
+        result = await db.execute(
+            select(CapacityShard.shard, CapacityShard.remaining)
+            .where(CapacityShard.event_id == event_id)
+            .order_by(CapacityShard.shard)
+            .with_for_update()
+        )
+        candidates = result.all()
+        if sum(remaining for _, remaining in candidates) < tickets:
+            return False
+        needed = tickets
+        for shard, remaining in candidates:
+            take = min(remaining, needed)
+            if take:
+                await self._take_from_shard(db, event_id=event_id, shard=shard, tickets=take)
+                needed -= take
+        return True
+
 event = CRUDEvent(Event)
@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Sequence
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, insert, select, update
+from app.models.outbox import OutboxKind, OutboxMessage
+import uuid
+
+
+class CRUDOutbox:
+    """
+    Writes go into the caller's transaction and are never committed here, so
+    a message exists exactly when the change that caused it was committed.
+    """
+
+    def values(self, *, kind: OutboxKind, aggregate_id: Any) -> Dict[str, Any]:
+        now = datetime.now(timezone.utc)
+        return {
+            "id": uuid.uuid4(),
+            "kind": kind.value,
+            "aggregate_id": aggregate_id,
+            "attempts": 0,
+            "created_at": now,
+            "available_at": now,
+        }
+
+    async def add(
+        self, db: AsyncSession, *, kind: OutboxKind, aggregate_ids: Iterable[uuid.UUID]
+    ) -> None:
+        rows = [self.values(kind=kind, aggregate_id=i) for i in aggregate_ids]
+        if rows:
+            await db.execute(insert(OutboxMessage), rows)
+
+    async def claim_due(self, db: AsyncSession, *, limit: int) -> List[OutboxMessage]:
+        """
+        Lock up to `limit` messages that are due, oldest first. Rows locked by
+        another relay are skipped, so several relays can drain one outbox.
+        """
+        result = await db.execute(
+            select(OutboxMessage)
+            .where(OutboxMessage.available_at <= datetime.now(timezone.utc))
+            .order_by(OutboxMessage.available_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        return result.scalars().all()
+
+    async def remove(self, db: AsyncSession, *, ids: Sequence[uuid.UUID]) -> None:
+        if ids:
+            await db.execute(delete(OutboxMessage).where(OutboxMessage.id.in_(ids)))
+
+    async def defer(
+        self, db: AsyncSession, *, messages: Sequence[OutboxMessage], max_backoff: int
+    ) -> None:
+        """Schedule another attempt with exponential backoff, capped at `max_backoff` seconds."""
+        now = datetime.now(timezone.utc)
+        for message in messages:
+            delay = min(2 ** message.attempts, max_backoff)
+            await db.execute(
+                update(OutboxMessage)
+                .where(OutboxMessage.id == message.id)
+                .values(attempts=message.attempts + 1, available_at=now + timedelta(seconds=delay))
+            )
+
+
+outbox = CRUDOutbox()
@@ -1,8 +1,8 @@
 from typing import Any, Dict, Optional, Union
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import insert, select
 
-from app.core.security import get_password_hash, verify_password
+from app.core.security import password_hasher
 from app.crud.base import CRUDBase
 from app.models.user import User, UserRole
 from app.schemas.user import UserCreate, UserUpdate
@@ -13,24 +13,32 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         return result.scalars().first()
 
     async def create(self, db: AsyncSession, *, obj_in: UserCreate) -> User:
-        db_obj = User(
-            email=obj_in.email,
-            name=obj_in.name,
-            hashed_password=get_password_hash(obj_in.password),
-            role=UserRole.ORGANIZER if obj_in.is_organizer else UserRole.USER,
-            is_active=obj_in.is_active,
+        db_obj = await self._returning_one(
+            db,
+            insert(User).values(
+                email=obj_in.email,
+                name=obj_in.name,
+                hashed_password=await password_hasher.hash(obj_in.password),
+                role=UserRole.ORGANIZER if obj_in.is_organizer else UserRole.USER,
+                is_active=obj_in.is_active,
+            ),
         )
-        db.add(db_obj)
         await db.commit()
-        await db.refresh(db_obj)
         return db_obj
 
     async def authenticate(self, db: AsyncSession, *, email: str, password: str) -> Optional[User]:
         user = await self.get_by_email(db, email=email)
         if not user:
             return None
-        if not verify_password(password, user.hashed_password):
+        verified, new_hash = await password_hasher.verify_and_update(
+            password, user.hashed_password
+        )
+        if not verified:
             return None
+        if new_hash:
+            # Stored with outdated Argon2 parameters; upgrade while we have the password.
+            user.hashed_password = new_hash
+            await db.commit()
         return user
 
 user = CRUDUser(User)
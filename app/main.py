@@ -1,29 +1,84 @@
-from fastapi import FastAPI
-from slowapi import _rate_limit_exceeded_handler
-from slowapi.errors import RateLimitExceeded
-from slowapi.middleware import SlowAPIMiddleware
+import asyncio
+from contextlib import asynccontextmanager
 
+from fastapi import Depends, FastAPI, Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from app.api import deps
 from app.api.v1.api import api_router
 from app.core.config import settings
-from app.core.ratelimit import limiter
-from app.core.middleware import LoggingMiddleware
-from app.utils.logger import get_logger
+from app.core.database import engine, replica_router, warm_up
+from app.core.security import PasswordHasherBusyError, password_hasher
+from app.core.metrics import request_metrics
+from app.core.middleware import MetricsMiddleware, RequestIdMiddleware
+from app.services.auth_cache import auth_cache
+from app.services.hot_inventory import hot_inventory
+from app.services.outbox import outbox_relay
+from app.utils.logger import configure_logging, get_logger
 
+configure_logging()
 logger = get_logger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.DB_POOL_WARMUP:
+        await warm_up(engine, settings.DB_POOL_WARMUP)
+        for replica in replica_router.engines:
+            await warm_up(replica, settings.DB_POOL_WARMUP)
+    tasks = []
+    if settings.HOT_EVENTS_ENABLED:
+        tasks.append(asyncio.create_task(hot_inventory.run_reconciler()))
+    if settings.AUTH_CACHE_ENABLED:
+        tasks.append(asyncio.create_task(auth_cache.run_listener()))
+    if settings.OUTBOX_RELAY_ENABLED:
+        tasks.append(asyncio.create_task(outbox_relay.run()))
+    yield
+    for task in tasks:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    password_hasher.shutdown()
+    await engine.dispose()
+    await replica_router.dispose()
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan,
 )
 
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-app.add_middleware(SlowAPIMiddleware)
-app.add_middleware(LoggingMiddleware)
+@app.exception_handler(PasswordHasherBusyError)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusyError):
+    logger.warning("Password hashing saturated, rejecting %s", request.url.path)
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Authentication is busy, please retry shortly"},
+        headers={"Retry-After": "1"},
+    )
 
-app.include_router(api_router, prefix=settings.API_V1_STR)
+if settings.RESPONSE_GZIP_MIN_BYTES:
+    app.add_middleware(
+        GZipMiddleware,
+        minimum_size=settings.RESPONSE_GZIP_MIN_BYTES,
+        compresslevel=settings.RESPONSE_GZIP_LEVEL,
+    )
+app.add_middleware(MetricsMiddleware)
+# Outermost, so the request id is set for everything logged below it.
+app.add_middleware(RequestIdMiddleware)
+
+app.include_router(
+    api_router, prefix=settings.API_V1_STR, dependencies=[Depends(deps.rate_limit)]
+)
 
 @app.get("/")
 async def root():
     logger.info("Root endpoint called")
     return {"message": "Welcome to Event Booking"}
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Request metrics of this process in the Prometheus text format."""
+    return PlainTextResponse(request_metrics.render(), media_type="text/plain; version=0.0.4")
@@ -1,3 +1,5 @@
 from .user import User, UserRole
 from .event import Event
+from .capacity_shard import CapacityShard
 from .booking import Booking, BookingStatus
+from .outbox import OutboxMessage, OutboxKind
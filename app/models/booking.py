@@ -1,9 +1,10 @@
 import enum
-from sqlalchemy import DateTime, ForeignKey, Enum, Integer, String, Column
+from sqlalchemy import DateTime, Index, ForeignKey, Enum, Integer, String, Column, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.core.database import Base
 import uuid
 from datetime import datetime, timezone
+from typing import Optional
 
 class BookingStatus(str, enum.Enum):
     CONFIRMED = "confirmed"
@@ -11,15 +12,28 @@ class BookingStatus(str, enum.Enum):
 
 class Booking(Base):
     __tablename__ = "bookings"
+    __table_args__ = (
+        Index("ix_bookings_user_id_created_at_id", "user_id", "created_at", "id"),
+        # Attendee exports read an event's bookings in this order
+        Index("ix_bookings_event_id_created_at_id", "event_id", "created_at", "id"),
+        # Bookings of one checkout, found by the relay for the combined email
+        Index(
+            "ix_bookings_checkout_id",
+            "checkout_id",
+            postgresql_where=text("checkout_id IS NOT NULL"),
+        ),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
-    user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id"), nullable=False)
-    event_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("events.id"), nullable=False)
+    user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    event_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("events.id", ondelete="CASCADE"), nullable=False)
     status: Mapped[BookingStatus] = mapped_column(Enum(BookingStatus), default=BookingStatus.CONFIRMED, nullable=False)
     tickets_count = Column(Integer, default=1)
     guest_name = Column(String, nullable=True)
     guest_email = Column(String, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    # Set on bookings made together through a cart checkout
+    checkout_id: Mapped[Optional[uuid.UUID]] = mapped_column(nullable=True)
 
     user: Mapped["User"] = relationship("User", back_populates="bookings")
     event: Mapped["Event"] = relationship("Event", back_populates="bookings")
@@ -1,12 +1,43 @@
-from sqlalchemy import String, DateTime, ForeignKey, Integer, Text
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import Boolean, Computed, Index, String, DateTime, ForeignKey, Integer, Text, case, false, func, literal_column, select
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Mapped, column_property, mapped_column, relationship
+from sqlalchemy.sql.functions import FunctionElement
 from app.core.database import Base
+from app.models.capacity_shard import CapacityShard
 import uuid
 from datetime import datetime, timezone
-from typing import List
+from typing import List, Optional
+
+
+class text_search_vector(FunctionElement):
+    """The words of a text for full-text search: to_tsvector on PostgreSQL, NULL elsewhere."""
+    type = Text().with_variant(TSVECTOR(), "postgresql")
+    inherit_cache = True
+
+
+@compiles(text_search_vector)
+def _compile_text_search_vector(element, compiler, **kw):
+    return "NULL"
+
+
+@compiles(text_search_vector, "postgresql")
+def _compile_text_search_vector_postgresql(element, compiler, **kw):
+    return f"to_tsvector('simple'::regconfig, {compiler.process(element.clauses, **kw)})"
+
 
 class Event(Base):
     __tablename__ = "events"
+    __table_args__ = (
+        Index("ix_events_date_id", "date", "id"),
+        # An organizer's events in calendar order, and the cascade from users
+        Index("ix_events_organizer_id_date_id", "organizer_id", "date", "id"),
+        # Full-text search on PostgreSQL; see search_vector and location_vector.
+        Index("ix_events_search", "search_vector", postgresql_using="gin").ddl_if(dialect="postgresql"),
+        Index("ix_events_location_search", "location_vector", postgresql_using="gin").ddl_if(
+            dialect="postgresql"
+        ),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
     title: Mapped[str] = mapped_column(String, index=True, nullable=False)
@@ -14,8 +45,42 @@ class Event(Base):
     date: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
     location: Mapped[str] = mapped_column(String, nullable=False)
     capacity: Mapped[int] = mapped_column(Integer, nullable=False)
-    organizer_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id"), nullable=False)
+    organizer_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    # Seats are claimed in Redis and reconciled back (see app.services.hot_inventory)
+    hot_inventory: Mapped[bool] = mapped_column(Boolean, default=False, server_default=false(), nullable=False)
+    # High-demand events spread their seats over this many counter rows
+    capacity_shards: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    # Words of the title and description, and of the location, kept by the
+    # database so searches neither parse every row nor leave the planner
+    # guessing how common a word is. Other databases leave them empty and
+    # search the text columns.
+    search_vector: Mapped[Optional[str]] = mapped_column(
+        text_search_vector.type,
+        Computed(text_search_vector(literal_column("(title || ' ') || coalesce(description, '')"))),
+        deferred=True,
+    )
+    location_vector: Mapped[Optional[str]] = mapped_column(
+        text_search_vector.type, Computed(text_search_vector(literal_column("location"))), deferred=True
+    )
+
+    # Seats left to sell: the event row plus its shards, if any
+    remaining_capacity: Mapped[int] = column_property(
+        case(
+            (
+                capacity_shards > 0,
+                capacity
+                + select(func.coalesce(func.sum(CapacityShard.remaining), 0))
+                .where(CapacityShard.event_id == id)
+                .correlate_except(CapacityShard)
+                .scalar_subquery(),
+            ),
+            else_=capacity,
+        )
+    )
 
     organizer: Mapped["User"] = relationship("User", back_populates="events")
-    bookings: Mapped[List["Booking"]] = relationship("Booking", back_populates="event", cascade="all, delete-orphan")
+    # Deleted with the event by the foreign key's ON DELETE CASCADE
+    bookings: Mapped[List["Booking"]] = relationship(
+        "Booking", back_populates="event", cascade="all, delete-orphan", passive_deletes=True
+    )
@@ -0,0 +1,30 @@
+import enum
+from sqlalchemy import DateTime, Index, Integer, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+from app.core.database import Base
+import uuid
+from datetime import datetime, timezone
+
+class OutboxKind(str, enum.Enum):
+    BOOKING_CONFIRMATION = "booking_confirmation"
+    # aggregate_id is the checkout id shared by the cart's bookings
+    CHECKOUT_CONFIRMATION = "checkout_confirmation"
+
+class OutboxMessage(Base):
+    """
+    A side effect committed together with the change that causes it and
+    delivered afterwards by the relay. Rows are deleted once delivered.
+    """
+    __tablename__ = "outbox"
+    __table_args__ = (
+        # One message per kind and subject, however often the writer retries
+        UniqueConstraint("kind", "aggregate_id", name="uq_outbox_kind_aggregate_id"),
+        Index("ix_outbox_available_at", "available_at"),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
+    kind: Mapped[str] = mapped_column(String(64), nullable=False)
+    aggregate_id: Mapped[uuid.UUID] = mapped_column(nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    available_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
@@ -19,5 +19,10 @@ class User(Base):
     role: Mapped[UserRole] = mapped_column(Enum(UserRole), default=UserRole.USER, nullable=False)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
 
-    events: Mapped[List["Event"]] = relationship("Event", back_populates="organizer", cascade="all, delete-orphan")
-    bookings: Mapped[List["Booking"]] = relationship("Booking", back_populates="user", cascade="all, delete-orphan")
+    # Deleted with the user by the foreign keys' ON DELETE CASCADE
+    events: Mapped[List["Event"]] = relationship(
+        "Event", back_populates="organizer", cascade="all, delete-orphan", passive_deletes=True
+    )
+    bookings: Mapped[List["Booking"]] = relationship(
+        "Booking", back_populates="user", cascade="all, delete-orphan", passive_deletes=True
+    )
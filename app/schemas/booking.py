@@ -1,5 +1,6 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional
+import enum
+from pydantic import BaseModel, EmailStr, Field
+from typing import List, Optional
 from datetime import datetime
 import uuid
 from app.models.booking import BookingStatus
@@ -8,7 +9,7 @@ class BookingBase(BaseModel):
     event_id: uuid.UUID
 
 class BookingCreate(BookingBase):
-    tickets_count: int = 1
+    tickets_count: int = Field(1, ge=1)
     user_name: Optional[str] = None
     user_email: Optional[EmailStr] = None
 
@@ -18,6 +19,15 @@ class BookingUpdate(BaseModel):
     guest_name: Optional[str] = None
     guest_email: Optional[EmailStr] = None
 
+class BookingCheckoutItem(BookingBase):
+    tickets_count: int = Field(1, ge=1)
+
+class BookingCheckout(BaseModel):
+    # Several items may name the same event, e.g. separate ticket groups
+    items: List[BookingCheckoutItem] = Field(min_length=1, max_length=50)
+    user_name: Optional[str] = None
+    user_email: Optional[EmailStr] = None
+
 class BookingInDBBase(BookingBase):
     id: uuid.UUID
     user_id: uuid.UUID
@@ -26,9 +36,14 @@ class BookingInDBBase(BookingBase):
     guest_name: Optional[str] = None
     guest_email: Optional[str] = None
     created_at: datetime
+    checkout_id: Optional[uuid.UUID] = None
     
     class Config:
         from_attributes = True
 
 class Booking(BookingInDBBase):
     pass
+
+class BookingExportFormat(str, enum.Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
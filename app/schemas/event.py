@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import AliasChoices, BaseModel, Field
+from typing import List, Optional
 from datetime import datetime
 import uuid
 
@@ -19,13 +19,31 @@ class EventUpdate(EventBase):
     location: Optional[str] = None
     capacity: Optional[int] = None
 
+class EventCapacityShards(BaseModel):
+    shards: int = Field(ge=0, le=64)
+
 class EventInDBBase(EventBase):
+    # Remaining seats, including those held in capacity shards
+    capacity: int = Field(validation_alias=AliasChoices("remaining_capacity", "capacity"))
     id: uuid.UUID
     organizer_id: uuid.UUID
     created_at: datetime
+    hot_inventory: bool = False
+    capacity_shards: int = 0
     
     class Config:
         from_attributes = True
 
 class Event(EventInDBBase):
     pass
+
+class EventImportRowError(BaseModel):
+    # 1-based position of the record in the upload, not counting a CSV header
+    row: int
+    errors: List[str]
+
+class EventImportResult(BaseModel):
+    imported: int
+    failed: int
+    # The first EVENT_IMPORT_MAX_ERRORS rejected rows
+    errors: List[EventImportRowError]
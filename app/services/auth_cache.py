@@ -0,0 +1,124 @@
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from redis.exceptions import RedisError
+
+from app.core.cache import cache
+from app.core.config import settings
+from app.models.user import User, UserRole
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+INVALIDATION_CHANNEL = "auth:invalidate"
+
+
+class AuthUser:
+    """The authenticated user as seen by endpoints: a detached, read-only record."""
+
+    __slots__ = ("id", "role", "is_active", "email", "name")
+
+    def __init__(self, *, id: uuid.UUID, role: UserRole, is_active: bool, email: str, name: Optional[str]):
+        self.id = id
+        self.role = role
+        self.is_active = is_active
+        self.email = email
+        self.name = name
+
+    @classmethod
+    def from_user(cls, user: User) -> "AuthUser":
+        return cls(
+            id=user.id,
+            role=user.role,
+            is_active=user.is_active,
+            email=user.email,
+            name=user.name,
+        )
+
+
+class AuthCache:
+    """
+    Bounded LRU cache of AuthUser records with a TTL, local to this process.
+
+    Changes to a user are broadcast over Redis pub/sub so every API process
+    drops its copy. Entries are only served while the subscription is up; if
+    it drops, the cache is cleared and bypassed until it is back, since
+    invalidations sent in between would be lost.
+    """
+
+    def __init__(self, redis, *, max_entries: int, ttl_seconds: float):
+        self.redis = redis
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self._entries: "OrderedDict[uuid.UUID, Tuple[float, AuthUser]]" = OrderedDict()
+        self._subscribed = False
+        # Bumped by every invalidation; a lookup that started before one must
+        # not store what it read.
+        self.generation = 0
+
+    def get(self, user_id: uuid.UUID) -> Optional[AuthUser]:
+        if not self._subscribed:
+            return None
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        expires, user = entry
+        if expires < time.monotonic():
+            del self._entries[user_id]
+            return None
+        self._entries.move_to_end(user_id)
+        return user
+
+    def put(self, user: AuthUser, *, generation: int) -> None:
+        if not self._subscribed or generation != self.generation:
+            return
+        self._entries[user.id] = (time.monotonic() + self.ttl, user)
+        self._entries.move_to_end(user.id)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def discard(self, user_id: uuid.UUID) -> None:
+        self.generation += 1
+        self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._entries.clear()
+
+    async def invalidate(self, user_id: uuid.UUID) -> None:
+        """Drop a changed user here and in every other API process."""
+        self.discard(user_id)
+        try:
+            await self.redis.publish(INVALIDATION_CHANNEL, str(user_id))
+        except RedisError as exc:
+            logger.warning("Could not broadcast auth invalidation for %s: %s", user_id, exc)
+
+    async def run_listener(self) -> None:
+        """Apply invalidations from other processes until cancelled."""
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(INVALIDATION_CHANNEL)
+                    self.clear()
+                    self._subscribed = True
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self.discard(uuid.UUID(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Auth cache invalidation listener failed")
+            finally:
+                self._subscribed = False
+                self.clear()
+            await asyncio.sleep(1)
+
+
+auth_cache = AuthCache(
+    cache.redis,
+    max_entries=settings.AUTH_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.AUTH_CACHE_TTL_SECONDS,
+)
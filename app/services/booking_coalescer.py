@@ -0,0 +1,90 @@
+import asyncio
+import uuid
+from typing import Dict, List, Set, Tuple
+
+from sqlalchemy import Row
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.crud import booking as crud_booking
+from app.crud.crud_booking import BookingError
+from app.models.booking import Booking
+from app.schemas.booking import BookingCreate
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+PendingBooking = Tuple[BookingCreate, uuid.UUID, asyncio.Future]
+
+
+class BookingCoalescer:
+    """
+    Micro-batches bookings per event.
+
+    Requests for the same event that arrive within `window_ms` of the first one
+    (or until `max_batch` are waiting) are booked together by
+    `crud_booking.reserve_many`: one transaction, one commit and one multi-row
+    insert for the whole batch. Each caller still gets its own booking or its
+    own sold-out error.
+    """
+
+    def __init__(self, *, window_ms: int, max_batch: int):
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._pending: Dict[uuid.UUID, List[PendingBooking]] = {}
+        self._timers: Dict[uuid.UUID, asyncio.TimerHandle] = {}
+        self._flushes: Set[asyncio.Task] = set()
+
+    async def submit(self, *, obj_in: BookingCreate, user_id: uuid.UUID) -> Tuple[Booking, Row]:
+        """Same contract as `crud_booking.reserve`."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._pending.setdefault(obj_in.event_id, [])
+        batch.append((obj_in, user_id, future))
+        if len(batch) >= self.max_batch:
+            self._flush(obj_in.event_id)
+        elif len(batch) == 1:
+            self._timers[obj_in.event_id] = loop.call_later(
+                self.window, self._flush, obj_in.event_id
+            )
+        return await future
+
+    def _flush(self, event_id: uuid.UUID) -> None:
+        timer = self._timers.pop(event_id, None)
+        if timer:
+            timer.cancel()
+        batch = self._pending.pop(event_id, None)
+        if batch:
+            task = asyncio.create_task(self._book(event_id, batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _book(self, event_id: uuid.UUID, batch: List[PendingBooking]) -> None:
+        try:
+            async with AsyncSessionLocal() as db:
+                results = await crud_booking.reserve_many(
+                    db,
+                    event_id=event_id,
+                    requests=[(obj_in, user_id) for obj_in, user_id, _ in batch],
+                )
+        except Exception as exc:
+            logger.exception("Booking batch of %d for event %s failed", len(batch), event_id)
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        logger.info("Booked batch of %d requests for event %s", len(batch), event_id)
+        for (_, _, future), result in zip(batch, results):
+            # A caller that went away keeps its booking, as with `reserve`.
+            if future.done():
+                continue
+            if isinstance(result, BookingError):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+booking_coalescer = BookingCoalescer(
+    window_ms=settings.BOOKING_COALESCE_WINDOW_MS,
+    max_batch=settings.BOOKING_COALESCE_MAX_BATCH,
+)
@@ -1,11 +1,14 @@
 import uuid
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
-from app.worker import send_email_task
+from app.worker import send_template_email_task
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+BOOKING_CONFIRMATION = "booking_confirmation"
+CHECKOUT_CONFIRMATION = "checkout_confirmation"
+
 
 def queue_booking_confirmation(
     *,
@@ -17,41 +20,71 @@ def queue_booking_confirmation(
     event_location: str,
     event_description: Optional[str],
     tickets_count: int,
+    task_id: Optional[str] = None,
+    producer=None,
 ) -> None:
-    """Compose and enqueue booking confirmation email."""
-    email_subject = f"Booking Confirmation: {event_title}"
-    email_content = f"""
-    <html>
-        <body>
-            <h1>Booking Confirmation</h1>
-            <p>Hi {user_name},</p>
-            <p>You have successfully booked the event: <strong>{event_title}</strong>.</p>
-            <p><strong>Email:</strong> {user_email}</p>
-            <p><strong>Tickets:</strong> {tickets_count}</p>
-            <p><strong>Date:</strong> {event_date}</p>
-            <p><strong>Location:</strong> {event_location}</p>
-            <p><strong>Description:</strong> {event_description or 'N/A'}</p>
-            <p>Thank you for using our service!</p>
-        </body>
-    </html>
     """
+    Enqueue a booking confirmation email; the worker renders it. Publishing
+    errors propagate so the outbox relay can retry.
+    """
+    send_template_email_task.apply_async(
+        (
+            BOOKING_CONFIRMATION,
+            user_email,
+            {
+                "booking_id": str(booking_id),
+                "user_name": user_name,
+                "event_title": event_title,
+                "event_date": str(event_date),
+                "event_location": event_location,
+                "event_description": event_description,
+                "tickets_count": tickets_count,
+            },
+        ),
+        # The default repr copies every argument into the message headers.
+        argsrepr=f"({BOOKING_CONFIRMATION!r}, booking={booking_id})",
+        task_id=task_id,
+        producer=producer,
+    )
+    logger.info(
+        "Email confirmation queued for booking %s to %s for event '%s'",
+        booking_id,
+        user_email,
+        event_title,
+    )
 
-    try:
-        logger.debug("Email content for booking %s: %s", booking_id, email_content)
-        send_email_task.delay(
-            email_to=[user_email],
-            subject=email_subject,
-            html_content=email_content,
-        )
-        logger.info(
-            "Email confirmation queued for booking %s to %s for event '%s'",
-            booking_id,
+
+def queue_checkout_confirmation(
+    *,
+    checkout_id: uuid.UUID,
+    user_email: str,
+    user_name: str,
+    bookings: List[Dict[str, Any]],
+    task_id: Optional[str] = None,
+    producer=None,
+) -> None:
+    """
+    Enqueue one confirmation email for the bookings of a checkout. Each entry
+    of `bookings` carries booking_id, event_title, event_date,
+    event_location and tickets_count.
+    """
+    send_template_email_task.apply_async(
+        (
+            CHECKOUT_CONFIRMATION,
             user_email,
-            event_title,
-        )
-    except Exception as exc:  # pragma: no cover - logging path
-        logger.exception(
-            "Failed to queue email for booking %s: %s",
-            booking_id,
-            exc,
-        )
+            {
+                "checkout_id": str(checkout_id),
+                "user_name": user_name,
+                "bookings": bookings,
+            },
+        ),
+        argsrepr=f"({CHECKOUT_CONFIRMATION!r}, checkout={checkout_id})",
+        task_id=task_id,
+        producer=producer,
+    )
+    logger.info(
+        "Email confirmation queued for checkout %s to %s for %d bookings",
+        checkout_id,
+        user_email,
+        len(bookings),
+    )
@@ -0,0 +1,92 @@
+import uuid
+from typing import Any, Dict, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import Cache, cache
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.crud import event as crud_event
+from app.schemas.event import Event
+
+
+def event_key(event_id: Any) -> str:
+    return f"event:{event_id}"
+
+
+def capacity_key(event_id: Any) -> str:
+    return f"event_capacity:{event_id}"
+
+
+class EventCache:
+    """
+    Read-through cache for single events.
+
+    The event body and its remaining capacity are cached under separate keys.
+    The body lives for EVENT_CACHE_TTL_SECONDS and is dropped whenever the event
+    itself changes. Capacity is dropped by every booking path that moves it, and
+    additionally expires after EVENT_CACHE_CAPACITY_STALENESS_SECONDS, which
+    bounds how stale it can be even when an invalidation is missed or races a
+    concurrent refill. A staleness of 0 always reads capacity from the database.
+
+    `db` may be a replica session. Capacity read there can additionally be
+    behind by the replication lag, but bodies are always filled from the
+    primary: a lagging replica must not pin an outdated copy for the full TTL.
+    """
+
+    def __init__(self, cache: Cache):
+        self.cache = cache
+
+    async def get(self, db: AsyncSession, *, event_id: uuid.UUID) -> Optional[Dict[str, Any]]:
+        if not settings.EVENT_CACHE_ENABLED:
+            event = await crud_event.get(db=db, id=event_id)
+            return Event.model_validate(event).model_dump(mode="json") if event else None
+
+        cache_capacity = settings.EVENT_CACHE_CAPACITY_STALENESS_SECONDS > 0
+        keys = [event_key(event_id)]
+        if cache_capacity:
+            keys.append(capacity_key(event_id))
+        body, *capacity = await self.cache.get_many(keys)
+        capacity = capacity[0] if capacity else None
+
+        if body is None:
+            async with AsyncSessionLocal() as primary:
+                event = await crud_event.get(db=primary, id=event_id)
+            if event is None:
+                return None
+            body = Event.model_validate(event).model_dump(mode="json")
+            capacity = body.pop("capacity")
+            await self.cache.set(event_key(event_id), body, expire=settings.EVENT_CACHE_TTL_SECONDS)
+            if cache_capacity:
+                await self._set_capacity(event_id, capacity)
+        elif capacity is None:
+            capacity = await crud_event.get_remaining_capacity(db, event_id=event_id)
+            if capacity is None:
+                # Deleted under a stale body.
+                await self.invalidate(event_id)
+                return None
+            if cache_capacity:
+                await self._set_capacity(event_id, capacity)
+        return {**body, "capacity": capacity}
+
+    async def _set_capacity(self, event_id: uuid.UUID, capacity: int) -> None:
+        await self.cache.set(
+            capacity_key(event_id),
+            capacity,
+            expire=settings.EVENT_CACHE_CAPACITY_STALENESS_SECONDS,
+        )
+
+    async def invalidate(self, *event_ids: uuid.UUID) -> None:
+        """Drop cached events entirely, after they were updated or deleted."""
+        if settings.EVENT_CACHE_ENABLED and event_ids:
+            await self.cache.delete(
+                *[event_key(i) for i in event_ids], *[capacity_key(i) for i in event_ids]
+            )
+
+    async def invalidate_capacity(self, *event_ids: uuid.UUID) -> None:
+        """Drop cached remaining capacity, after bookings changed it."""
+        if settings.EVENT_CACHE_ENABLED and event_ids:
+            await self.cache.delete(*[capacity_key(i) for i in event_ids])
+
+
+event_cache = EventCache(cache)
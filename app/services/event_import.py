@@ -0,0 +1,216 @@
+import codecs
+import csv
+import io
+import json
+import uuid
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List
+
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.crud import event as crud_event
+from app.schemas.event import EventCreate, EventImportResult, EventImportRowError
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_WHITESPACE = " \t\r\n"
+
+
+class ImportFormatError(ValueError):
+    """The upload cannot be read as a JSON array or a CSV file."""
+
+
+class ImportTooLargeError(ValueError):
+    """The upload holds more than EVENT_IMPORT_MAX_ROWS records."""
+
+
+async def iter_json_array(chunks: AsyncIterator[bytes]) -> AsyncIterator[Any]:
+    """
+    Yield the items of a JSON array as its bytes arrive, holding at most one
+    item and one chunk in memory.
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8-sig")()
+    iterator = chunks.__aiter__()
+    buffer, pos, eof = "", 0, False
+    # open: before "[", first: after "[", item: after ",", next: after an item,
+    # end: after "]"
+    state, count = "open", 0
+
+    async def read() -> None:
+        nonlocal buffer, pos, eof
+        if len(buffer) - pos > settings.EVENT_IMPORT_MAX_RECORD_SIZE:
+            raise ImportFormatError(f"Item {count + 1} is too large or malformed")
+        try:
+            chunk = text.decode(await iterator.__anext__())
+        except StopAsyncIteration:
+            chunk, eof = text.decode(b"", final=True), True
+        except UnicodeDecodeError:
+            raise ImportFormatError("The upload is not valid UTF-8")
+        buffer, pos = buffer[pos:] + chunk, 0
+
+    while True:
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+            pos += 1
+        if pos == len(buffer):
+            if not eof:
+                await read()
+                continue
+            if state != "end":
+                raise ImportFormatError("Unexpected end of the JSON array")
+            return
+        char = buffer[pos]
+        if state == "open":
+            if char != "[":
+                raise ImportFormatError("Expected a JSON array")
+            state, pos = "first", pos + 1
+        elif state == "first" and char == "]":
+            state, pos = "end", pos + 1
+        elif state in ("first", "item"):
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise ImportFormatError(f"Malformed JSON in item {count + 1}")
+                await read()
+                continue
+            if end == len(buffer) and not eof:
+                # A number may go on in the next chunk.
+                await read()
+                continue
+            count += 1
+            yield item
+            state, pos = "next", end
+        elif state == "next":
+            if char not in ",]":
+                raise ImportFormatError(f"Expected ',' or ']' after item {count}")
+            state, pos = ("item" if char == "," else "end"), pos + 1
+        else:
+            raise ImportFormatError("Unexpected data after the JSON array")
+
+
+def _split_records(text: str) -> List[str]:
+    """
+    Split text into CSV records. A quoted field may span lines, so a record
+    ends at the first line break with an even number of quotes before it; an
+    unclosed record is returned last.
+    """
+    records, current = [], ""
+    for line in io.StringIO(text, newline=""):
+        current += line
+        if current.count('"') % 2 == 0:
+            records.append(current)
+            current = ""
+    if current:
+        records.append(current)
+    return records
+
+
+async def iter_csv_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[Dict[str, str]]:
+    """
+    Yield the rows of a CSV file with a header line as dicts, as its bytes
+    arrive. Empty cells are left out, so they count as missing.
+    """
+    text = codecs.getincrementaldecoder("utf-8-sig")()
+    iterator = chunks.__aiter__()
+    pending, header, eof = "", None, False
+    while not eof:
+        try:
+            pending += text.decode(await iterator.__anext__())
+        except StopAsyncIteration:
+            pending += text.decode(b"", final=True)
+            eof = True
+        except UnicodeDecodeError:
+            raise ImportFormatError("The upload is not valid UTF-8")
+        if eof:
+            records, pending = _split_records(pending), ""
+        else:
+            # Keep the unfinished last line, and a record whose quotes are
+            # still open, for the next chunk.
+            cut = pending.rfind("\n") + 1
+            records, pending = _split_records(pending[:cut]), pending[cut:]
+            if records and records[-1].count('"') % 2:
+                pending = records.pop() + pending
+            if len(pending) > settings.EVENT_IMPORT_MAX_RECORD_SIZE:
+                raise ImportFormatError("A CSV record is too large or has an unclosed quote")
+        try:
+            rows = list(csv.reader(records))
+        except csv.Error as exc:
+            raise ImportFormatError(f"Malformed CSV: {exc}")
+        for row in rows:
+            if not row:
+                continue
+            if header is None:
+                header = [name.strip() for name in row]
+                continue
+            yield {name: value for name, value in zip(header, row) if value != ""}
+    if header is None:
+        raise ImportFormatError("The CSV file has no header line")
+
+
+PARSERS = {
+    "application/json": iter_json_array,
+    "text/csv": iter_csv_records,
+}
+
+
+async def import_events(
+    db: AsyncSession, *, records: AsyncIterator[Any], organizer_id: uuid.UUID
+) -> EventImportResult:
+    """
+    Validate `records` one at a time as EventCreate and insert the valid ones
+    for the organizer in batches of EVENT_IMPORT_BATCH_SIZE, committing once
+    at the end. Invalid records are skipped and reported by their 1-based row
+    number, up to EVENT_IMPORT_MAX_ERRORS of them. Errors in the upload itself
+    raise before anything is committed.
+    """
+    created_at = datetime.now(timezone.utc)
+    batch: List[Dict[str, Any]] = []
+    errors: List[EventImportRowError] = []
+    imported = failed = row = 0
+    async for record in records:
+        row += 1
+        if row > settings.EVENT_IMPORT_MAX_ROWS:
+            raise ImportTooLargeError(
+                f"Imports are limited to {settings.EVENT_IMPORT_MAX_ROWS} events"
+            )
+        try:
+            event_in = EventCreate.model_validate(record)
+        except ValidationError as exc:
+            failed += 1
+            if len(errors) < settings.EVENT_IMPORT_MAX_ERRORS:
+                errors.append(
+                    EventImportRowError(
+                        row=row,
+                        errors=[
+                            f"{'.'.join(map(str, error['loc'])) or 'record'}: {error['msg']}"
+                            for error in exc.errors()
+                        ],
+                    )
+                )
+            continue
+        batch.append(
+            {
+                "id": uuid.uuid4(),
+                **event_in.model_dump(),
+                "organizer_id": organizer_id,
+                "created_at": created_at,
+                "hot_inventory": False,
+                "capacity_shards": 0,
+            }
+        )
+        if len(batch) >= settings.EVENT_IMPORT_BATCH_SIZE:
+            await crud_event.insert_many(db, rows=batch)
+            imported += len(batch)
+            batch = []
+    if batch:
+        await crud_event.insert_many(db, rows=batch)
+        imported += len(batch)
+    await db.commit()
+    logger.info(
+        "Imported %d events for organizer %s, %d rows rejected", imported, organizer_id, failed
+    )
+    return EventImportResult(imported=imported, failed=failed, errors=errors)
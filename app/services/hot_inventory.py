@@ -0,0 +1,366 @@
+import asyncio
+import json
+import uuid
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, Optional
+
+from redis.exceptions import ResponseError
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import cache
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.crud.crud_booking import SoldOutError
+from app.crud.crud_outbox import outbox as crud_outbox
+from app.models.booking import Booking, BookingStatus
+from app.models.event import Event
+from app.models.outbox import OutboxKind
+from app.models.user import User
+from app.schemas.booking import BookingCreate
+from app.services.event_cache import event_cache
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+CLAIMS_STREAM = "hot:claims"
+RECONCILER_GROUP = "reconciler"
+# Claims for an event or user deleted before they were reconciled.
+DEAD_CLAIMS_STREAM = "hot:claims:dead"
+
+# KEYS[1] seats counter, KEYS[2] claims stream; ARGV[1] tickets, ARGV[2] payload.
+# Returns -1 when the event is not hot, 0 when sold out, 1 when claimed.
+# An empty payload adjusts the counter without recording a claim (ticket
+# changes on bookings that are already in Postgres).
+CLAIM_SCRIPT = """
+local seats = redis.call('GET', KEYS[1])
+if not seats then return -1 end
+local n = tonumber(ARGV[1])
+if tonumber(seats) < n then return 0 end
+redis.call('DECRBY', KEYS[1], n)
+if ARGV[2] ~= '' then
+    redis.call('XADD', KEYS[2], '*', 'claim', ARGV[2])
+end
+return 1
+"""
+
+
+def seats_key(event_id: Any) -> str:
+    return f"hot:event:{event_id}:seats"
+
+
+class HotInventory:
+    """
+    Opt-in seat inventory for high-traffic events.
+
+    Remaining seats live in a Redis counter that is claimed by a Lua script, so
+    concurrent bookings never queue on the event row. Every claim is appended to
+    a stream which the reconciler drains in batches into ``bookings`` and
+    ``events.capacity``. ``events.capacity`` therefore always equals the Redis
+    counter plus the tickets still waiting in the stream.
+    """
+
+    def __init__(self, redis):
+        self.redis = redis
+        self._claim = redis.register_script(CLAIM_SCRIPT)
+
+    async def enable(self, db: AsyncSession, *, event: Event) -> None:
+        # The flag stops the database engine from selling seats, and the
+        # capacity returned under the row lock includes every committed booking.
+        capacity = await db.scalar(
+            update(Event)
+            .where(Event.id == event.id)
+            .values(hot_inventory=True)
+            .returning(Event.capacity)
+        )
+        await db.commit()
+        await self.redis.set(seats_key(event.id), capacity, nx=True)
+
+    async def disable(self, db: AsyncSession, *, event: Event, timeout: float = 10.0) -> None:
+        """
+        Hand the event back to the database engine. New claims stop as soon as
+        the counter is gone, but ``events.capacity`` is only authoritative once
+        the reconciler has drained this event's claims, so wait for that first.
+        """
+        await self.redis.delete(seats_key(event.id))
+        interval = settings.HOT_EVENTS_RECONCILE_INTERVAL_MS / 1000
+        for _ in range(max(1, int(timeout / interval))):
+            if not (await self.pending_tickets()).get(str(event.id)):
+                break
+            await asyncio.sleep(interval)
+        else:
+            raise TimeoutError(f"Claims for event {event.id} are still being reconciled")
+        await db.execute(
+            update(Event).where(Event.id == event.id).values(hot_inventory=False)
+        )
+        await db.commit()
+
+    async def claim(
+        self,
+        *,
+        obj_in: BookingCreate,
+        user_id: uuid.UUID,
+    ) -> Optional[Booking]:
+        """
+        Claim seats for a booking. Returns None when the event is not hot,
+        raises SoldOutError when the counter cannot cover the request.
+        """
+        booking = Booking(
+            id=uuid.uuid4(),
+            user_id=user_id,
+            event_id=obj_in.event_id,
+            status=BookingStatus.CONFIRMED,
+            tickets_count=obj_in.tickets_count,
+            guest_name=obj_in.user_name,
+            guest_email=obj_in.user_email,
+            created_at=datetime.now(timezone.utc),
+        )
+        payload = json.dumps(
+            {
+                "id": str(booking.id),
+                "user_id": str(user_id),
+                "event_id": str(obj_in.event_id),
+                "tickets_count": obj_in.tickets_count,
+                "guest_name": obj_in.user_name,
+                "guest_email": obj_in.user_email,
+                "created_at": booking.created_at.isoformat(),
+            },
+            separators=(",", ":"),
+        )
+        result = await self._claim(
+            keys=[seats_key(obj_in.event_id), CLAIMS_STREAM],
+            args=[obj_in.tickets_count, payload],
+        )
+        if result == -1:
+            return None
+        if result == 0:
+            raise SoldOutError(obj_in.event_id)
+        return booking
+
+    async def adjust(self, *, event_id: uuid.UUID, tickets: int) -> bool:
+        """
+        Claim (or release, when negative) seats for an existing booking.
+        Returns False when the event is not hot, raises SoldOutError.
+        """
+        result = await self._claim(keys=[seats_key(event_id), CLAIMS_STREAM], args=[tickets, ""])
+        if result == 0:
+            raise SoldOutError(event_id)
+        return result == 1
+
+    @asynccontextmanager
+    async def capacity_change(
+        self, db: AsyncSession, *, event_id: uuid.UUID, capacity: int
+    ) -> AsyncIterator[None]:
+        """
+        Wrap a write of `capacity` to an event so that, if the event is hot, the
+        counter moves by the same amount. The event row stays locked until the
+        write commits, which holds the reconciler off, and the counter is moved
+        back if the write fails. Raises SoldOutError when the counter has fewer
+        seats left than the cut takes away.
+        """
+        row = (
+            await db.execute(
+                select(Event.capacity, Event.hot_inventory)
+                .where(Event.id == event_id)
+                .with_for_update()
+            )
+        ).first()
+        if row is None or not row.hot_inventory:
+            yield
+            return
+        # Positive when seats are taken away, negative when they are added.
+        tickets = row.capacity - capacity
+        adjusted = await self.adjust(event_id=event_id, tickets=tickets)
+        try:
+            yield
+        except BaseException:
+            if adjusted:
+                try:
+                    await self.adjust(event_id=event_id, tickets=-tickets)
+                except SoldOutError:
+                    logger.error(
+                        "Could not take back %d seats added to hot event %s", -tickets, event_id
+                    )
+            raise
+
+    async def _ensure_group(self) -> None:
+        try:
+            await self.redis.xgroup_create(CLAIMS_STREAM, RECONCILER_GROUP, id="0", mkstream=True)
+        except ResponseError as exc:
+            if "BUSYGROUP" not in str(exc):
+                raise
+
+    async def pending_tickets(self) -> Dict[str, int]:
+        """Tickets per event that are claimed in Redis but not yet in Postgres."""
+        pending: Dict[str, int] = defaultdict(int)
+        start = "-"
+        while True:
+            entries = await self.redis.xrange(CLAIMS_STREAM, min=start, count=1000)
+            if not entries:
+                return pending
+            for _, fields in entries:
+                claim = json.loads(fields["claim"])
+                pending[claim["event_id"]] += claim["tickets_count"]
+            start = f"({entries[-1][0]}"
+
+    async def rebuild(self, db: AsyncSession) -> int:
+        """
+        Recreate missing seat counters from the database, e.g. after Redis lost
+        its data. Claims still in the stream are not yet in ``events.capacity``
+        and are subtracted. Returns the number of counters restored.
+        """
+        await self._ensure_group()
+        result = await db.execute(
+            select(Event.id, Event.capacity).where(Event.hot_inventory.is_(True))
+        )
+        events = result.all()
+        pending = await self.pending_tickets()
+        restored = 0
+        for event_id, capacity in events:
+            seats = capacity - pending[str(event_id)]
+            if await self.redis.set(seats_key(event_id), seats, nx=True):
+                logger.warning("Rebuilt hot inventory for event %s with %d seats", event_id, seats)
+                restored += 1
+        return restored
+
+    async def reconcile(self, db: AsyncSession, *, consumer: str, block_ms: int = 0) -> int:
+        """
+        Persist one batch of claims. Entries left unacknowledged by a crashed
+        consumer are picked up again after HOT_EVENTS_CLAIM_IDLE_MS; booking ids
+        make the insert idempotent, so redelivery never double-counts seats.
+        Returns the number of stream entries processed.
+        """
+        batch_size = settings.HOT_EVENTS_RECONCILE_BATCH_SIZE
+        autoclaimed = await self.redis.xautoclaim(
+            CLAIMS_STREAM,
+            RECONCILER_GROUP,
+            consumer,
+            min_idle_time=settings.HOT_EVENTS_CLAIM_IDLE_MS,
+            count=batch_size,
+        )
+        entries = autoclaimed[1]
+        if not entries:
+            response = await self.redis.xreadgroup(
+                RECONCILER_GROUP,
+                consumer,
+                {CLAIMS_STREAM: ">"},
+                count=batch_size,
+                block=block_ms or None,
+            )
+            entries = response[0][1] if response else []
+        if not entries:
+            return 0
+
+        claims = [json.loads(fields["claim"]) for _, fields in entries]
+        # One claim whose event or user is gone would fail the whole insert,
+        # and with it every other event's claims on each pass.
+        event_ids = {uuid.UUID(c["event_id"]) for c in claims}
+        user_ids = {uuid.UUID(c["user_id"]) for c in claims}
+        existing_events = set(
+            (await db.execute(select(Event.id).where(Event.id.in_(event_ids)))).scalars()
+        )
+        existing_users = set(
+            (await db.execute(select(User.id).where(User.id.in_(user_ids)))).scalars()
+        )
+        orphaned = [
+            c
+            for c in claims
+            if uuid.UUID(c["event_id"]) not in existing_events
+            or uuid.UUID(c["user_id"]) not in existing_users
+        ]
+        for claim in orphaned:
+            logger.warning(
+                "Dropping hot claim %s: event %s or user %s no longer exists",
+                claim["id"],
+                claim["event_id"],
+                claim["user_id"],
+            )
+            await self.redis.xadd(
+                DEAD_CLAIMS_STREAM, {"claim": json.dumps(claim, separators=(",", ":"))}
+            )
+        claims = [c for c in claims if c not in orphaned]
+        rows = [
+            {
+                "id": uuid.UUID(c["id"]),
+                "user_id": uuid.UUID(c["user_id"]),
+                "event_id": uuid.UUID(c["event_id"]),
+                "status": BookingStatus.CONFIRMED,
+                "tickets_count": c["tickets_count"],
+                "guest_name": c["guest_name"],
+                "guest_email": c["guest_email"],
+                "created_at": datetime.fromisoformat(c["created_at"]),
+            }
+            for c in claims
+        ]
+        inserted = []
+        if rows:
+            insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+            result = await db.execute(
+                insert(Booking)
+                .values(rows)
+                .on_conflict_do_nothing(index_elements=["id"])
+                .returning(Booking.id, Booking.event_id, Booking.tickets_count)
+            )
+            inserted = result.all()
+        per_event: Dict[uuid.UUID, int] = defaultdict(int)
+        for _, event_id, tickets in inserted:
+            per_event[event_id] += tickets
+        for event_id, tickets in per_event.items():
+            await db.execute(
+                update(Event)
+                .where(Event.id == event_id)
+                .values(capacity=Event.capacity - tickets)
+            )
+        await crud_outbox.add(
+            db,
+            kind=OutboxKind.BOOKING_CONFIRMATION,
+            aggregate_ids=[booking_id for booking_id, _, _ in inserted],
+        )
+        await db.commit()
+
+        entry_ids = [entry_id for entry_id, _ in entries]
+        await self.redis.xack(CLAIMS_STREAM, RECONCILER_GROUP, *entry_ids)
+        await self.redis.xdel(CLAIMS_STREAM, *entry_ids)
+        await event_cache.invalidate_capacity(*per_event)
+        logger.info(
+            "Reconciled %d hot claims (%d new) across %d events",
+            len(entries),
+            len(inserted),
+            len(per_event),
+        )
+        return len(entries)
+
+    async def run_reconciler(self) -> None:
+        """Drain the claims stream until cancelled."""
+        consumer = f"reconciler-{uuid.uuid4().hex[:8]}"
+        async with AsyncSessionLocal() as db:
+            await self.rebuild(db)
+        while True:
+            try:
+                async with AsyncSessionLocal() as db:
+                    await self.reconcile(
+                        db,
+                        consumer=consumer,
+                        block_ms=settings.HOT_EVENTS_RECONCILE_INTERVAL_MS,
+                    )
+            except asyncio.CancelledError:
+                raise
+            except ResponseError as exc:
+                if "NOGROUP" not in str(exc):
+                    logger.exception("Hot inventory reconciliation failed")
+                    await asyncio.sleep(settings.HOT_EVENTS_RECONCILE_INTERVAL_MS / 1000)
+                    continue
+                # Redis restarted without its data: restore counters and group.
+                logger.warning("Claims stream missing, rebuilding hot inventory")
+                async with AsyncSessionLocal() as db:
+                    await self.rebuild(db)
+            except Exception:
+                logger.exception("Hot inventory reconciliation failed")
+                await asyncio.sleep(settings.HOT_EVENTS_RECONCILE_INTERVAL_MS / 1000)
+
+
+hot_inventory = HotInventory(cache.redis)
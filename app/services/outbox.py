@@ -0,0 +1,237 @@
+import asyncio
+import uuid
+from functools import partial
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.crud.crud_outbox import outbox as crud_outbox
+from app.models.booking import Booking, BookingStatus
+from app.models.event import Event
+from app.models.outbox import OutboxKind, OutboxMessage
+from app.models.user import User
+from app.services.booking_notifications import (
+    queue_booking_confirmation,
+    queue_checkout_confirmation,
+)
+from app.utils.logger import configure_logging, get_logger
+
+logger = get_logger(__name__)
+
+# A message and the call that publishes it, or None when there is nothing left
+# to deliver.
+Delivery = Tuple[OutboxMessage, Optional[Callable[..., None]]]
+Handler = Callable[[AsyncSession, Sequence[OutboxMessage]], Awaitable[List[Delivery]]]
+
+
+class OutboxRelay:
+    """
+    Moves committed outbox messages to the Celery broker.
+
+    Due messages are locked in batches (rows locked by another relay are
+    skipped), published over one broker connection from a worker thread, and
+    deleted in the same transaction that locked them. Delivery is at least
+    once: a relay that dies between publishing and committing leaves the rows
+    behind and they are published again. Each message is published with its
+    outbox id as the task id, which the worker uses to drop the duplicate.
+    Messages that could not be published are retried with exponential backoff.
+    """
+
+    def __init__(self):
+        self.handlers: Dict[str, Handler] = {
+            OutboxKind.BOOKING_CONFIRMATION.value: self._booking_confirmations,
+            OutboxKind.CHECKOUT_CONFIRMATION.value: self._checkout_confirmations,
+        }
+
+    def _recipient_columns(self):
+        # Guest details given when booking win over the account's.
+        return (
+            func.coalesce(func.nullif(Booking.guest_email, ""), User.email).label("user_email"),
+            func.coalesce(
+                func.nullif(Booking.guest_name, ""), func.nullif(User.name, ""), "User"
+            ).label("user_name"),
+        )
+
+    async def _booking_confirmations(
+        self, db: AsyncSession, messages: Sequence[OutboxMessage]
+    ) -> List[Delivery]:
+        # Read at relay time: the email shows the booking as it is now, and
+        # bookings cancelled in the meantime are not confirmed at all.
+        rows = await db.execute(
+            select(
+                Booking.id,
+                Booking.status,
+                Booking.tickets_count,
+                *self._recipient_columns(),
+                Event.title,
+                Event.date,
+                Event.location,
+                Event.description,
+            )
+            .join(User, User.id == Booking.user_id)
+            .join(Event, Event.id == Booking.event_id)
+            .where(Booking.id.in_([m.aggregate_id for m in messages]))
+        )
+        bookings = {row.id: row for row in rows}
+        deliveries: List[Delivery] = []
+        for message in messages:
+            row = bookings.get(message.aggregate_id)
+            if row is None or row.status == BookingStatus.CANCELLED:
+                deliveries.append((message, None))
+                continue
+            deliveries.append(
+                (
+                    message,
+                    partial(
+                        queue_booking_confirmation,
+                        booking_id=row.id,
+                        user_email=row.user_email,
+                        user_name=row.user_name,
+                        event_title=row.title,
+                        event_date=row.date,
+                        event_location=row.location,
+                        event_description=row.description,
+                        tickets_count=row.tickets_count,
+                    ),
+                )
+            )
+        return deliveries
+
+    async def _checkout_confirmations(
+        self, db: AsyncSession, messages: Sequence[OutboxMessage]
+    ) -> List[Delivery]:
+        # One email per checkout, listing the bookings still standing.
+        rows = await db.execute(
+            select(
+                Booking.id,
+                Booking.checkout_id,
+                Booking.tickets_count,
+                *self._recipient_columns(),
+                Event.title,
+                Event.date,
+                Event.location,
+            )
+            .join(User, User.id == Booking.user_id)
+            .join(Event, Event.id == Booking.event_id)
+            .where(
+                Booking.checkout_id.in_([m.aggregate_id for m in messages]),
+                Booking.status != BookingStatus.CANCELLED,
+            )
+            .order_by(Booking.created_at, Booking.id)
+        )
+        checkouts: Dict[uuid.UUID, List] = {}
+        for row in rows:
+            checkouts.setdefault(row.checkout_id, []).append(row)
+        deliveries: List[Delivery] = []
+        for message in messages:
+            bookings = checkouts.get(message.aggregate_id)
+            if not bookings:
+                deliveries.append((message, None))
+                continue
+            deliveries.append(
+                (
+                    message,
+                    partial(
+                        queue_checkout_confirmation,
+                        checkout_id=message.aggregate_id,
+                        user_email=bookings[0].user_email,
+                        user_name=bookings[0].user_name,
+                        bookings=[
+                            {
+                                "booking_id": str(row.id),
+                                "event_title": row.title,
+                                "event_date": str(row.date),
+                                "event_location": row.location,
+                                "tickets_count": row.tickets_count,
+                            }
+                            for row in bookings
+                        ],
+                    ),
+                )
+            )
+        return deliveries
+
+    def _publish(self, sends: Sequence[Tuple[uuid.UUID, Callable[..., None]]]) -> List[uuid.UUID]:
+        """Publish in order over one producer; returns the ids that made it."""
+        published: List[uuid.UUID] = []
+        try:
+            with celery_app.producer_or_acquire() as producer:
+                for message_id, send in sends:
+                    send(task_id=str(message_id), producer=producer)
+                    published.append(message_id)
+        except Exception as exc:
+            logger.warning(
+                "Outbox publish stopped after %d of %d messages: %s",
+                len(published),
+                len(sends),
+                exc,
+            )
+        return published
+
+    async def relay(self, db: AsyncSession) -> int:
+        """Relay one batch of due messages. Returns how many were taken."""
+        messages = await crud_outbox.claim_due(db, limit=settings.OUTBOX_RELAY_BATCH_SIZE)
+        if not messages:
+            await db.rollback()
+            return 0
+
+        by_kind: Dict[str, List[OutboxMessage]] = {}
+        for message in messages:
+            by_kind.setdefault(message.kind, []).append(message)
+        done: List[uuid.UUID] = []
+        sends: List[Tuple[uuid.UUID, Callable[..., None]]] = []
+        failed: List[OutboxMessage] = []
+        for kind, batch in by_kind.items():
+            handler = self.handlers.get(kind)
+            if handler is None:
+                logger.error("No outbox handler for %d %r messages", len(batch), kind)
+                failed.extend(batch)
+                continue
+            for message, send in await handler(db, batch):
+                if send is None:
+                    done.append(message.id)
+                else:
+                    sends.append((message.id, send))
+
+        published = set(await asyncio.to_thread(self._publish, sends)) if sends else set()
+        unpublished = {message_id for message_id, _ in sends} - published
+        done.extend(published)
+        failed.extend(m for m in messages if m.id in unpublished)
+        await crud_outbox.remove(db, ids=done)
+        await crud_outbox.defer(
+            db, messages=failed, max_backoff=settings.OUTBOX_RELAY_MAX_BACKOFF_SECONDS
+        )
+        await db.commit()
+        logger.info(
+            "Relayed %d outbox messages (%d published, %d deferred)",
+            len(messages),
+            len(published),
+            len(failed),
+        )
+        return len(messages)
+
+    async def run(self) -> None:
+        """Drain the outbox until cancelled."""
+        while True:
+            try:
+                async with AsyncSessionLocal() as db:
+                    relayed = await self.relay(db)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Outbox relay failed")
+                relayed = 0
+            if relayed < settings.OUTBOX_RELAY_BATCH_SIZE:
+                await asyncio.sleep(settings.OUTBOX_RELAY_INTERVAL_MS / 1000)
+
+
+outbox_relay = OutboxRelay()
+
+
+if __name__ == "__main__":
+    configure_logging()
+    asyncio.run(outbox_relay.run())
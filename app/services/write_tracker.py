@@ -0,0 +1,44 @@
+import uuid
+
+from redis.exceptions import RedisError
+
+from app.core.cache import cache
+from app.core.config import settings
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def write_key(user_id: uuid.UUID) -> str:
+    return f"ryw:{user_id}"
+
+
+class WriteTracker:
+    """
+    Remembers, across API processes, which users wrote within the last
+    READ_YOUR_WRITES_SECONDS so their reads can skip possibly lagging replicas.
+    """
+
+    def __init__(self, redis):
+        self.redis = redis
+
+    async def mark(self, user_id: uuid.UUID) -> None:
+        if not settings.get_replica_urls():
+            return
+        try:
+            await self.redis.set(
+                write_key(user_id), 1, px=int(settings.READ_YOUR_WRITES_SECONDS * 1000)
+            )
+        except RedisError as exc:
+            logger.warning("Could not record write for user %s: %s", user_id, exc)
+
+    async def wrote_recently(self, user_id: uuid.UUID) -> bool:
+        try:
+            return bool(await self.redis.exists(write_key(user_id)))
+        except RedisError as exc:
+            # Can't tell; the primary is always safe.
+            logger.warning("Could not check writes for user %s: %s", user_id, exc)
+            return True
+
+
+write_tracker = WriteTracker(cache.redis)
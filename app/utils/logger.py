@@ -1,16 +1,190 @@
+import atexit
+import copy
+import json
 import logging
+import os
+import queue
+import random
 import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
 
-def get_logger(name: str):
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
-    
-    if not logger.handlers:
-        handler = logging.StreamHandler(sys.stdout)
-        formatter = logging.Formatter(
-            "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-        )
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
-        
-    return logger
+from app.core.config import settings
+
+# Id of the HTTP request being served, set by RequestIdMiddleware and attached
+# to every record logged while serving it.
+request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Attributes every LogRecord has; anything else was passed with `extra=` and
+# is emitted as a field of its own.
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {
+    "message",
+    "asctime",
+    "request_id",
+}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        if record.stack_info:
+            entry["stack_info"] = record.stack_info
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps only a fraction of the INFO and lower records of some loggers.
+    `rates` maps a logger name to the fraction kept for it and its children;
+    warnings and errors always pass.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        # Resolved rate per logger name; there are only as many as modules.
+        self._resolved: Dict[str, float] = {}
+
+    def _rate(self, name: str) -> float:
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition(".")[0]
+        return 1.0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO:
+            return True
+        rate = self._resolved.get(record.name)
+        if rate is None:
+            rate = self._resolved[record.name] = self._rate(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class _QueueHandler(QueueHandler):
+    """
+    Hands records to the writer thread. The caller only merges the message
+    arguments and renders tracebacks, so the record no longer refers to
+    objects that may change; formatting and the write happen on the writer.
+    A full queue drops the record rather than blocking the caller.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _traceback_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        record.request_id = request_id.get()
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        # Called under the handler lock, so the counter needs no lock of its own.
+        try:
+            if self.dropped:
+                self.queue.put_nowait(
+                    self.prepare(
+                        logging.LogRecord(
+                            __name__,
+                            logging.WARNING,
+                            __file__,
+                            0,
+                            "Dropped %d log records while the log writer was behind",
+                            (self.dropped,),
+                            None,
+                        )
+                    )
+                )
+                self.dropped = 0
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _QueueListener(QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # Wait for room so stopping never loses the records still queued.
+        self.queue.put(self._sentinel)
+
+
+_traceback_formatter = logging.Formatter()
+_handler: Optional[_QueueHandler] = None
+_listener: Optional[_QueueListener] = None
+
+
+def configure_logging() -> None:
+    """
+    Send all records through one bounded queue to a writer thread that
+    formats them and writes them to stdout, so logging never waits on stdout.
+    Call once when the process starts; later calls do nothing.
+    """
+    global _handler, _listener
+    if _handler is not None:
+        return
+    stream = logging.StreamHandler(sys.stdout)
+    if settings.LOG_FORMAT == "json":
+        stream.setFormatter(JsonFormatter())
+    else:
+        stream.setFormatter(logging.Formatter(TEXT_FORMAT))
+    _handler = _QueueHandler(queue.Queue(settings.LOG_QUEUE_SIZE))
+    if settings.LOG_SAMPLING:
+        _handler.addFilter(SamplingFilter(settings.LOG_SAMPLING))
+    _listener = _QueueListener(_handler.queue, stream)
+
+    # Other libraries keep the default WARNING threshold; at INFO some of them
+    # (SQLAlchemy's engine among them) would log every statement.
+    logging.getLogger().addHandler(_handler)
+    logging.getLogger("app").setLevel(settings.LOG_LEVEL.upper())
+
+    _listener.start()
+    atexit.register(shutdown_logging)
+    os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+def shutdown_logging() -> None:
+    """Write out the records still queued and stop the writer thread."""
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+
+
+def _restart_after_fork() -> None:
+    # The writer thread does not survive a fork, and it may have held the
+    # queue's lock at the time; the child starts over with a queue of its own.
+    global _listener
+    if _handler is None or _listener is None:
+        return
+    _handler.queue = queue.Queue(settings.LOG_QUEUE_SIZE)
+    _handler.dropped = 0
+    _listener = _QueueListener(_handler.queue, *_listener.handlers)
+    _listener.start()
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(name)
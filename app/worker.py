@@ -1,8 +1,98 @@
+import asyncio
+import os
+from typing import Optional
+
+import redis
+from redis.exceptions import RedisError
+
 from app.core.celery_app import celery_app
-from app.core.email import send_email
-from asgiref.sync import async_to_sync
+from app.core.config import settings
+from app.core.email import SMTPPool, create_smtp_pool, render_email, send_email
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# One event loop and SMTP pool per worker process, kept across tasks so SMTP
+# connections outlive the task that opened them. Created lazily so prefork
+# children never inherit the parent's.
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_pool: Optional[SMTPPool] = None
+_pid: Optional[int] = None
+_redis: Optional[redis.Redis] = None
+
+# How long a send holds its task id: longer than any SMTP attempt, shorter
+# than the broker's redelivery timeout.
+SEND_CLAIM_SECONDS = 300
+
+
+def _run(coro_fn, *args):
+    global _loop, _pool, _pid
+    if _pid != os.getpid():
+        _loop = asyncio.new_event_loop()
+        _pool = None
+        _pid = os.getpid()
+    if _pool is None:
+        _pool = create_smtp_pool()
+    return _loop.run_until_complete(coro_fn(_pool, *args))
+
+
+def _sent_key(task_id: str) -> str:
+    return f"email:sent:{task_id}"
 
+
+def _claim_send(task_id: str) -> bool:
+    """
+    False when `task_id` was already sent, or is being sent by another worker.
+    The outbox relays at least once, so the same message can arrive twice.
+    """
+    global _redis
+    if _redis is None:
+        _redis = redis.Redis.from_url(settings.REDIS_URL)
+    try:
+        return bool(_redis.set(_sent_key(task_id), "sending", nx=True, ex=SEND_CLAIM_SECONDS))
+    except RedisError as exc:
+        logger.warning("Email dedup unavailable, sending %s anyway: %s", task_id, exc)
+        return True
+
+
+def _release_send(task_id: str, *, sent: bool) -> None:
+    try:
+        if sent:
+            _redis.set(_sent_key(task_id), "sent", ex=settings.EMAIL_DEDUP_TTL_SECONDS)
+        else:
+            _redis.delete(_sent_key(task_id))
+    except RedisError as exc:
+        logger.warning("Email dedup update failed for %s: %s", task_id, exc)
+
+
+# Nothing queues this any more. It stays registered so messages enqueued
+# before send_template_email_task was deployed are still delivered, and can
+# go once those queues have drained.
 @celery_app.task(acks_late=True)
 def send_email_task(email_to: list[str], subject: str, html_content: str) -> str:
-    async_to_sync(send_email)(email_to, subject, html_content)
+    _run(send_email, email_to, subject, html_content)
     return "Email sent"
+
+
+@celery_app.task(bind=True, acks_late=True, serializer="msgpack")
+def send_template_email_task(self, template_id: str, email_to: str, context: dict) -> str:
+    """
+    Render `template_id` here rather than in the API, so the broker only
+    carries the template's fields. Deliveries of an already-sent task id are
+    dropped.
+    """
+    subject, html_content = render_email(template_id, {**context, "email_to": email_to})
+    task_id = self.request.id
+    if task_id and not _claim_send(task_id):
+        logger.info("Skipping duplicate email task %s", task_id)
+        return "Duplicate"
+    try:
+        _run(send_email, [email_to], subject, html_content)
+    except BaseException:
+        if task_id:
+            _release_send(task_id, sent=False)
+        raise
+    if task_id:
+        _release_send(task_id, sent=True)
+    return "Email sent"
+
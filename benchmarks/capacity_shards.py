@@ -0,0 +1,102 @@
+"""
+Contention benchmark for sharded event capacity.
+
+Books the same event from many concurrent sessions, first with the capacity on
+the event row (0 shards), then with 1 shard and with N shards, and reports
+bookings per second for each layout. Run against PostgreSQL; SQLite serialises
+all writers and shows no difference.
+
+    uv run python -m benchmarks.capacity_shards --shards 8 --workers 32 --bookings 4000
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete
+
+from app.core.database import AsyncSessionLocal, Base, engine
+from app.crud import booking as crud_booking
+from app.crud import event as crud_event
+from app.crud.crud_booking import SoldOutError
+from app.models.booking import Booking
+from app.models.event import Event
+from app.models.user import User
+from app.schemas.booking import BookingCreate
+
+
+async def setup(bookings: int) -> tuple[uuid.UUID, uuid.UUID]:
+    async with AsyncSessionLocal() as db:
+        user = User(email=f"bench-{uuid.uuid4().hex[:8]}@example.com", hashed_password="x")
+        db.add(user)
+        await db.flush()
+        event = Event(
+            title="Capacity shard benchmark",
+            date=datetime.now(timezone.utc) + timedelta(days=30),
+            location="Bench",
+            capacity=bookings,
+            organizer_id=user.id,
+        )
+        db.add(event)
+        await db.commit()
+        return user.id, event.id
+
+
+async def worker(queue: asyncio.Queue, user_id: uuid.UUID, event_id: uuid.UUID, stats: dict) -> None:
+    booking_in = BookingCreate(event_id=event_id, tickets_count=1)
+    while True:
+        try:
+            queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        async with AsyncSessionLocal() as db:
+            try:
+                await crud_booking.reserve(db, obj_in=booking_in, user_id=user_id)
+                stats["booked"] += 1
+            except SoldOutError:
+                stats["sold_out"] += 1
+
+
+async def run(shards: int, workers: int, bookings: int) -> dict:
+    user_id, event_id = await setup(bookings)
+    async with AsyncSessionLocal() as db:
+        await crud_event.set_capacity_shards(db, event_id=event_id, shards=shards)
+    queue: asyncio.Queue = asyncio.Queue()
+    for _ in range(bookings):
+        queue.put_nowait(None)
+    stats = {"booked": 0, "sold_out": 0}
+    started = time.perf_counter()
+    await asyncio.gather(*[worker(queue, user_id, event_id, stats) for _ in range(workers)])
+    elapsed = time.perf_counter() - started
+    async with AsyncSessionLocal() as db:
+        remaining = await crud_event.get_remaining_capacity(db, event_id=event_id)
+        await db.execute(delete(Booking).where(Booking.event_id == event_id))
+        await db.execute(delete(Event).where(Event.id == event_id))
+        await db.execute(delete(User).where(User.id == user_id))
+        await db.commit()
+    assert remaining == bookings - stats["booked"], "capacity drifted from bookings"
+    return {**stats, "seconds": elapsed, "per_second": stats["booked"] / elapsed}
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--shards", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--bookings", type=int, default=4000)
+    args = parser.parse_args()
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    print(f"{'shards':>6} {'booked':>8} {'sold out':>8} {'seconds':>8} {'booked/s':>10}")
+    for shards in (0, 1, args.shards):
+        result = await run(shards, args.workers, args.bookings)
+        print(
+            f"{shards:>6} {result['booked']:>8} {result['sold_out']:>8} "
+            f"{result['seconds']:>8.2f} {result['per_second']:>10.1f}"
+        )
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
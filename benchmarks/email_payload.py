@@ -0,0 +1,98 @@
+"""
+Broker cost of booking confirmation emails.
+
+Enqueues the same booking confirmations the way the API used to (HTML
+rendered in the request, sent as JSON kwargs to send_email_task) and the way
+it does now (template fields as msgpack to send_template_email_task), then
+reports enqueue latency and the bytes each message would occupy in the Redis
+broker. Publishes go to Celery's in-memory transport, which receives the
+same envelope the Redis transport pushes, so no broker is needed.
+
+    uv run python -m benchmarks.email_payload --messages 2000
+"""
+import argparse
+import logging
+import time
+import uuid
+from datetime import datetime, timezone
+
+from kombu.transport import memory
+from kombu.utils.json import dumps
+
+from app.core.celery_app import celery_app
+from app.services.booking_notifications import queue_booking_confirmation
+from app.worker import send_email_task
+
+SAMPLE = dict(
+    user_email="attendee@example.com",
+    user_name="Ada Lovelace",
+    event_title="Analytical Engines Meetup",
+    event_date=datetime(2030, 5, 17, 18, 30, tzinfo=timezone.utc),
+    event_location="Main hall",
+    event_description="An evening of talks on computing machinery.",
+    tickets_count=2,
+)
+
+
+def queue_rendered(*, booking_id, user_email, user_name, event_title, event_date,
+                   event_location, event_description, tickets_count) -> None:
+    """The previous request path: render in the API, ship the HTML."""
+    email_content = f"""
+    <html>
+        <body>
+            <h1>Booking Confirmation</h1>
+            <p>Hi {user_name},</p>
+            <p>You have successfully booked the event: <strong>{event_title}</strong>.</p>
+            <p><strong>Email:</strong> {user_email}</p>
+            <p><strong>Tickets:</strong> {tickets_count}</p>
+            <p><strong>Date:</strong> {event_date}</p>
+            <p><strong>Location:</strong> {event_location}</p>
+            <p><strong>Description:</strong> {event_description or 'N/A'}</p>
+            <p>Thank you for using our service!</p>
+        </body>
+    </html>
+    """
+    send_email_task.delay(
+        email_to=[user_email],
+        subject=f"Booking Confirmation: {event_title}",
+        html_content=email_content,
+    )
+
+
+class RecordingChannel(memory.Channel):
+    """Records the size of each envelope as kombu.transport.redis would store it."""
+
+    sizes = []
+
+    def _put(self, queue, message, **kwargs):
+        self.sizes.append(len(dumps(message).encode()))
+
+
+def measure(label: str, queue, messages: int) -> None:
+    for _ in range(100):
+        queue(booking_id=uuid.uuid4(), **SAMPLE)
+    RecordingChannel.sizes.clear()
+    started = time.perf_counter()
+    for _ in range(messages):
+        queue(booking_id=uuid.uuid4(), **SAMPLE)
+    elapsed = time.perf_counter() - started
+    sizes = RecordingChannel.sizes
+    print(f"{label:>10} {len(sizes):>8} {elapsed / messages * 1e6:>12.1f} {sum(sizes) / len(sizes):>14.0f} {sum(sizes):>14}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--messages", type=int, default=2000)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    memory.Transport.Channel = RecordingChannel
+    celery_app.conf.broker_url = "memory://"
+
+    print(f"{'path':>10} {'messages':>8} {'enqueue us':>12} {'bytes/message':>14} {'broker bytes':>14}")
+    measure("rendered", queue_rendered, args.messages)
+    measure("template", queue_booking_confirmation, args.messages)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Latency of event search over a large seeded catalogue.
+
+Seeds --events events (a million by default) for a throwaway organizer with
+bulk inserts, vacuums and analyzes the table, then runs each search shape
+--repeat times through crud_event.search: common, rare and prefix words, a
+location, date ranges with and without the seats-left filter, all filters at
+once, and the second page of a broad search. Reports p50/p95/p99 per shape; --explain also
+prints each shape's query plan. The seeded rows are removed at the end.
+Run against PostgreSQL; other databases have no search indexes.
+
+    uv run python -m benchmarks.event_search --events 1000000 --explain
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+from sqlalchemy import delete, event, insert, text
+
+from app.core.database import AsyncSessionLocal, Base, engine
+from app.crud import event as crud_event
+from app.models.user import User, UserRole
+from benchmarks import stats
+
+ADJECTIVES = ["Jazz", "Rock", "Indie", "Classical", "Electronic", "Folk", "Comedy", "Poetry", "Film", "Food"]
+NOUNS = ["Night", "Festival", "Session", "Showcase", "Marathon", "Brunch", "Workshop", "Gala", "Tour", "Meetup"]
+# A word found in about one event in ten thousand.
+RARE = "Quartet"
+CITIES = [f"City{i:03d}" for i in range(300)] + ["Berlin", "Lisbon", "Nairobi", "Osaka", "Toronto"]
+VENUES = ["Hall", "Arena", "Club", "Theatre", "Park", "Gallery"]
+# Made-up words for descriptions, so they have a vocabulary of real size.
+SYLLABLES = ["ka", "lo", "mi", "ra", "su", "te", "vi", "no", "de", "pa", "gu", "be"]
+WORDS = [a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES]
+
+START = datetime(2030, 1, 1, tzinfo=timezone.utc)
+DAYS = 730
+
+SHAPES: Dict[str, Dict[str, Any]] = {
+    "common_word": {"q": "night"},
+    "rare_word": {"q": RARE},
+    "word_prefix": {"q": "class fest"},
+    "location": {"location": "berlin"},
+    "date_week": {"date_from": START + timedelta(days=300), "date_to": START + timedelta(days=307)},
+    "date_week_available": {
+        "date_from": START + timedelta(days=300),
+        "date_to": START + timedelta(days=307),
+        "available": True,
+    },
+    "all_filters": {
+        "q": "jazz",
+        "location": "lisbon",
+        "date_from": START + timedelta(days=100),
+        "date_to": START + timedelta(days=400),
+        "available": True,
+    },
+}
+
+
+def event_row(organizer_id: uuid.UUID, created_at: datetime) -> Dict[str, Any]:
+    title = f"{random.choice(ADJECTIVES)} {random.choice(NOUNS)}"
+    if random.random() < 0.0001:
+        title += f" {RARE}"
+    return {
+        "id": uuid.uuid4(),
+        "title": title,
+        "description": " ".join(
+            [random.choice(ADJECTIVES), random.choice(NOUNS).lower(), *random.choices(WORDS, k=8)]
+        ),
+        "date": START + timedelta(minutes=random.randrange(DAYS * 24 * 60)),
+        "location": f"{random.choice(VENUES)} {random.randrange(1, 50)}, {random.choice(CITIES)}",
+        # About one in five sold out
+        "capacity": max(0, random.randrange(-100, 400)),
+        "organizer_id": organizer_id,
+        "created_at": created_at,
+        "hot_inventory": False,
+        "capacity_shards": 0,
+    }
+
+
+async def seed(events: int, batch_size: int) -> uuid.UUID:
+    organizer_id = uuid.uuid4()
+    created_at = datetime.now(timezone.utc)
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            insert(User).values(
+                id=organizer_id,
+                email=f"search-bench-{organizer_id.hex[:8]}@example.com",
+                hashed_password="x",
+                role=UserRole.ORGANIZER,
+            )
+        )
+        for start in range(0, events, batch_size):
+            rows = [event_row(organizer_id, created_at) for _ in range(min(batch_size, events - start))]
+            await crud_event.insert_many(db, rows=rows)
+        await db.commit()
+    if engine.dialect.name == "postgresql":
+        # As autovacuum would after a bulk load: statistics for the planner,
+        # and the GIN indexes' pending entries merged in.
+        async with engine.connect() as conn:
+            await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.execute(text("VACUUM ANALYZE events"))
+    return organizer_id
+
+
+async def explain(statement: str, parameters: Any) -> None:
+    async with engine.connect() as conn:
+        result = await conn.exec_driver_sql(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters)
+        for (line,) in result:
+            print(f"    {line}")
+
+
+async def run(events: int, repeat: int, batch_size: int, show_plans: bool) -> Dict[str, dict]:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    started = time.perf_counter()
+    organizer_id = await seed(events, batch_size)
+    print(f"seeded {events} events in {time.perf_counter() - started:.1f}s")
+
+    statements: List[Any] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    results: Dict[str, dict] = {}
+    print(f"{'shape':>20} {'rows':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    try:
+        async with AsyncSessionLocal() as db:
+            shapes = dict(SHAPES)
+            _, cursor = await crud_event.search(db, q="night", limit=100)
+            shapes["common_word_page_2"] = {"q": "night", "cursor": cursor}
+            for name, filters in shapes.items():
+                timings = []
+                for _ in range(repeat):
+                    statements.clear()
+                    call_started = time.perf_counter()
+                    rows, _ = await crud_event.search(db, limit=100, **filters)
+                    timings.append(time.perf_counter() - call_started)
+                    db.expunge_all()
+                summary = results[name] = stats.summarize(timings)
+                print(
+                    f"{name:>20} {len(rows):>5} {summary['p50_ms']:>8.2f} "
+                    f"{summary['p95_ms']:>8.2f} {summary['p99_ms']:>8.2f}"
+                )
+                if show_plans:
+                    await explain(*statements[-1])
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+        async with AsyncSessionLocal() as db:
+            # The organizer's events go with it (ON DELETE CASCADE).
+            await db.execute(delete(User).where(User.id == organizer_id))
+            await db.commit()
+        await engine.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--explain", action="store_true", help="print each query plan")
+    parser.add_argument("--output", help="save the results to this JSON file")
+    parser.add_argument("--baseline", help="compare with results saved by an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.events, args.repeat, args.batch_size, args.explain))
+    if args.output:
+        stats.save(
+            args.output,
+            results,
+            benchmark="event_search",
+            database=engine.url.get_backend_name(),
+            args=vars(args),
+        )
+    if args.baseline:
+        regressions = stats.compare(
+            results, stats.load(args.baseline), metrics=("p50_ms", "p95_ms"), tolerance=args.tolerance
+        )
+        if regressions:
+            raise SystemExit(f"slower beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
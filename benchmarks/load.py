@@ -0,0 +1,392 @@
+"""
+End-to-end load benchmark of the booking flow.
+
+Runs app.main:app in-process over ASGI (no server, no sockets), lifespan
+included, against the database in DATABASE_URL and an in-memory fake Redis
+(or REDIS_URL with --redis); Celery messages go to an in-memory broker.
+Users and events are seeded directly in the database and removed afterwards.
+Scenarios, each run by --clients concurrent clients:
+
+    auth         sign up a new user and log in (--auth-operations times)
+    list_events  page through the events
+    read_event   read a random seeded event
+    bookings     book a random event, change the tickets, cancel
+    hot_event    --hot-clients clients book one ticket each of a single event
+                 with --hot-capacity seats, all at once
+
+Prints throughput and p50/p95/p99 latency per operation. hot_event fails the
+run if more tickets were sold than the event had, or if the bookings in the
+database disagree with the seats left. --output saves the results as JSON;
+--baseline compares them with an earlier file and exits non-zero when a
+metric got worse by more than --tolerance. Rate limits are off and only
+errors are logged unless RATE_LIMIT_ENABLED or LOG_LEVEL say otherwise.
+
+    uv run python -m benchmarks.load --output load.json
+    uv run python -m benchmarks.load --scenarios hot_event --hot-clients 5000 --hot-inventory
+    uv run python -m benchmarks.load --baseline load.json
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List
+
+SCENARIOS = ("auth", "list_events", "read_event", "bookings", "hot_event")
+PASSWORD = "load-benchmark-password"
+
+
+class Recorder:
+    """Latency and status codes per operation name."""
+
+    def __init__(self, client):
+        self.client = client
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+        self.elapsed: Dict[str, float] = {}
+
+    async def request(self, name: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        response = await self.client.request(method, url, **kwargs)
+        self.latencies[name].append(time.perf_counter() - started)
+        self.statuses[name][response.status_code] += 1
+        return response
+
+
+async def run_clients(
+    recorder: Recorder,
+    scenario: str,
+    clients: int,
+    operations: int,
+    operation: Callable[[int, int], Awaitable[None]],
+) -> None:
+    """Run `operation(client, n)` `operations` times over `clients` concurrent clients."""
+    counter = iter(range(operations))
+
+    async def client(index: int) -> None:
+        for n in counter:
+            await operation(index, n)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[client(i) for i in range(clients)])
+    recorder.elapsed[scenario] = time.perf_counter() - started
+
+
+async def seed(run_id: str, users: int, events: int, hot_capacity: int):
+    from app.core.database import AsyncSessionLocal
+    from app.core.security import create_access_token, get_password_hash
+    from app.models.event import Event
+    from app.models.user import User, UserRole
+
+    # One hash for everyone: seeding should not take longer than the run.
+    hashed = get_password_hash(PASSWORD)
+    date = datetime.now(timezone.utc) + timedelta(days=30)
+    async with AsyncSessionLocal() as db:
+        organizer = User(
+            email=f"load-{run_id}-organizer@example.com",
+            hashed_password=hashed,
+            role=UserRole.ORGANIZER,
+        )
+        people = [
+            User(email=f"load-{run_id}-user{i}@example.com", hashed_password=hashed, name=f"User {i}")
+            for i in range(users)
+        ]
+        db.add(organizer)
+        db.add_all(people)
+        await db.flush()
+        listed = [
+            Event(
+                title=f"Load event {i}",
+                date=date + timedelta(minutes=i),
+                location="Bench",
+                capacity=1_000_000,
+                organizer_id=organizer.id,
+            )
+            for i in range(events)
+        ]
+        hot = Event(
+            title="Load hot event",
+            date=date,
+            location="Bench",
+            capacity=hot_capacity,
+            organizer_id=organizer.id,
+        )
+        db.add_all([*listed, hot])
+        await db.commit()
+        return (
+            {"Authorization": f"Bearer {create_access_token(organizer.id)}"},
+            [{"Authorization": f"Bearer {create_access_token(user.id)}"} for user in people],
+            [str(event.id) for event in listed],
+            hot.id,
+        )
+
+
+async def cleanup(run_id: str) -> None:
+    from sqlalchemy import delete, select
+
+    from app.core.database import AsyncSessionLocal
+    from app.models.booking import Booking
+    from app.models.event import Event
+    from app.models.outbox import OutboxMessage
+    from app.models.user import User
+
+    users = select(User.id).where(User.email.like(f"load-{run_id}-%"))
+    bookings = select(Booking.id).where(Booking.user_id.in_(users))
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(OutboxMessage).where(OutboxMessage.aggregate_id.in_(bookings)))
+        await db.execute(delete(Booking).where(Booking.user_id.in_(users)))
+        await db.execute(delete(Event).where(Event.organizer_id.in_(users)))
+        await db.execute(delete(User).where(User.email.like(f"load-{run_id}-%")))
+        await db.commit()
+
+
+async def check_hot_event(event_id: uuid.UUID, capacity: int, sold: int) -> Dict[str, int]:
+    """Wait for bookings to reach the database and check no seat was sold twice."""
+    from sqlalchemy import func, select
+
+    from app.core.config import settings
+    from app.core.database import AsyncSessionLocal
+    from app.crud import event as crud_event
+    from app.models.booking import Booking
+    from app.services.hot_inventory import hot_inventory
+
+    if settings.HOT_EVENTS_ENABLED:
+        for _ in range(300):
+            if not (await hot_inventory.pending_tickets()).get(str(event_id)):
+                break
+            await asyncio.sleep(0.1)
+    async with AsyncSessionLocal() as db:
+        booked = await db.scalar(
+            select(func.coalesce(func.sum(Booking.tickets_count), 0)).where(
+                Booking.event_id == event_id
+            )
+        )
+        remaining = await crud_event.get_remaining_capacity(db, event_id=event_id)
+    assert sold <= capacity, f"oversold: {sold} tickets sold for {capacity} seats"
+    assert booked == sold, f"{sold} tickets sold but {booked} booked in the database"
+    assert remaining == capacity - sold, f"{remaining} seats left after selling {sold} of {capacity}"
+    return {"capacity": capacity, "sold": sold, "remaining": remaining}
+
+
+async def run(args) -> Dict[str, Dict]:
+    import httpx
+
+    from app.core.config import settings
+    from app.core.database import Base, engine
+    from app.main import app
+    from benchmarks.stats import summarize
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    run_id = uuid.uuid4().hex[:8]
+    results: Dict[str, Dict] = {}
+    async with app.router.lifespan_context(app):
+        users = max(args.clients, args.hot_clients if "hot_event" in args.scenarios else 0)
+        organizer, tokens, event_ids, hot_id = await seed(
+            run_id, users, args.events, args.hot_capacity
+        )
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://load") as client:
+            recorder = Recorder(client)
+            api = settings.API_V1_STR
+
+            async def auth(index: int, n: int) -> None:
+                credentials = {"email": f"load-{run_id}-signup{n}@example.com", "password": PASSWORD}
+                await recorder.request("auth.signup", "POST", f"{api}/auth/signup", json=credentials)
+                await recorder.request("auth.login", "POST", f"{api}/auth/login", json=credentials)
+
+            cursors: Dict[int, str] = {}
+
+            async def list_events(index: int, n: int) -> None:
+                params = {"limit": args.page_size}
+                if index in cursors:
+                    params["cursor"] = cursors[index]
+                response = await recorder.request(
+                    "list_events.page", "GET", f"{api}/events/", params=params
+                )
+                next_cursor = response.headers.get("x-next-cursor")
+                if next_cursor:
+                    cursors[index] = next_cursor
+                else:
+                    cursors.pop(index, None)
+
+            async def read_event(index: int, n: int) -> None:
+                event_id = random.choice(event_ids)
+                await recorder.request("read_event.get", "GET", f"{api}/events/{event_id}")
+
+            async def bookings(index: int, n: int) -> None:
+                headers = tokens[index]
+                response = await recorder.request(
+                    "bookings.create",
+                    "POST",
+                    f"{api}/bookings/",
+                    headers=headers,
+                    json={"event_id": random.choice(event_ids), "tickets_count": 1},
+                )
+                if response.status_code != 200:
+                    return
+                booking_id = response.json()["id"]
+                await recorder.request(
+                    "bookings.update",
+                    "PUT",
+                    f"{api}/bookings/{booking_id}",
+                    headers=headers,
+                    json={"tickets_count": 2},
+                )
+                await recorder.request(
+                    "bookings.cancel", "DELETE", f"{api}/bookings/{booking_id}", headers=headers
+                )
+
+            async def hot_event() -> None:
+                if args.hot_inventory:
+                    response = await client.post(f"{api}/events/{hot_id}/hot", headers=organizer)
+                    response.raise_for_status()
+                start = asyncio.Event()
+
+                async def book(headers) -> None:
+                    await start.wait()
+                    await recorder.request(
+                        "hot_event.book",
+                        "POST",
+                        f"{api}/bookings/",
+                        headers=headers,
+                        json={"event_id": str(hot_id), "tickets_count": 1},
+                    )
+
+                tasks = [asyncio.create_task(book(tokens[i])) for i in range(args.hot_clients)]
+                await asyncio.sleep(0)
+                started = time.perf_counter()
+                start.set()
+                await asyncio.gather(*tasks)
+                recorder.elapsed["hot_event"] = time.perf_counter() - started
+                sold = recorder.statuses["hot_event.book"][200]
+                results["hot_event.check"] = await check_hot_event(hot_id, args.hot_capacity, sold)
+
+            try:
+                for scenario in args.scenarios:
+                    print(f"running {scenario}")
+                    if scenario == "auth":
+                        await run_clients(recorder, scenario, args.clients, args.auth_operations, auth)
+                    elif scenario == "hot_event":
+                        await hot_event()
+                    else:
+                        operation = {
+                            "list_events": list_events,
+                            "read_event": read_event,
+                            "bookings": bookings,
+                        }[scenario]
+                        await run_clients(recorder, scenario, args.clients, args.operations, operation)
+            finally:
+                await cleanup(run_id)
+
+    for name, latencies in recorder.latencies.items():
+        statuses = recorder.statuses[name]
+        results[name] = {
+            **summarize(latencies, elapsed=recorder.elapsed[name.split(".")[0]]),
+            "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        }
+    return results
+
+
+def report(results: Dict[str, Dict]) -> None:
+    print(
+        f"{'operation':>20} {'requests':>8} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'p99 ms':>8}  statuses"
+    )
+    for name, result in results.items():
+        if "count" not in result:
+            continue
+        statuses = " ".join(f"{status}:{count}" for status, count in result["statuses"].items())
+        print(
+            f"{name:>20} {result['count']:>8} {result['per_second']:>9.1f} {result['p50_ms']:>8.1f} "
+            f"{result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f}  {statuses}"
+        )
+    check = results.get("hot_event.check")
+    if check:
+        print(
+            f"hot event: {check['sold']} of {check['capacity']} seats sold, "
+            f"{check['remaining']} left, none oversold"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--operations", type=int, default=2000)
+    parser.add_argument("--auth-operations", type=int, default=100)
+    parser.add_argument("--events", type=int, default=500)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--hot-clients", type=int, default=2000)
+    parser.add_argument("--hot-capacity", type=int, default=500)
+    parser.add_argument("--hot-inventory", action="store_true", help="sell the hot event from Redis")
+    parser.add_argument("--redis", action="store_true", help="use REDIS_URL instead of a fake")
+    parser.add_argument("--output", help="save the results to this JSON file")
+    parser.add_argument("--baseline", help="compare with results saved by an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+    args.scenarios = [s for s in args.scenarios.split(",") if s]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    # Settings are read on import, so these go first. All the load comes from
+    # one client address, which the rate limits would throttle.
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    os.environ.setdefault("LOG_LEVEL", "ERROR")
+    if args.hot_inventory:
+        os.environ["HOT_EVENTS_ENABLED"] = "true"
+
+    # Every Redis user takes the shared client when it is imported.
+    from app.core.cache import cache
+
+    if not args.redis:
+        import fakeredis
+
+        cache.redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+    from app.core.celery_app import celery_app
+
+    celery_app.conf.broker_url = "memory://"
+
+    from app.core.config import settings
+    from app.core.database import engine
+    from benchmarks import stats
+
+    results = asyncio.run(run(args))
+    report(results)
+    if args.output:
+        stats.save(
+            args.output,
+            results,
+            benchmark="load",
+            database=engine.url.get_backend_name(),
+            redis="redis" if args.redis else "fake",
+            settings={
+                name: getattr(settings, name)
+                for name in (
+                    "HOT_EVENTS_ENABLED",
+                    "BOOKING_COALESCE_ENABLED",
+                    "EVENT_CACHE_ENABLED",
+                    "AUTH_CACHE_ENABLED",
+                    "RATE_LIMIT_ENABLED",
+                    "DB_POOL_SIZE",
+                )
+            },
+            args=vars(args),
+        )
+    if args.baseline:
+        regressions = stats.compare(
+            results,
+            stats.load(args.baseline),
+            metrics=("per_second", "p50_ms", "p95_ms", "p99_ms"),
+            tolerance=args.tolerance,
+        )
+        if regressions:
+            raise SystemExit(f"regressed beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
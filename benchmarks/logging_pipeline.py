@@ -0,0 +1,80 @@
+"""
+Time the caller spends in logging calls when stdout is slow.
+
+Logs --records lines through the previous setup (a StreamHandler on the
+module logger, writing in the caller) and through the queued pipeline of
+configure_logging(), to a stream that sleeps --write-ms per write, and
+reports the caller's time per record and the longest single call, i.e. how
+long an event loop would stall, and how many lines were written. Queued
+records beyond LOG_QUEUE_SIZE are dropped, not waited for; a line saying how
+many is queued once there is room again.
+
+    uv run python -m benchmarks.logging_pipeline --records 2000 --write-ms 1
+"""
+import argparse
+import logging
+import sys
+import time
+
+from app.utils import logger as app_logger
+
+
+class SlowStream:
+    """A stdout that blocks like a log driver under pressure."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.writes = 0
+
+    def write(self, data: str) -> int:
+        time.sleep(self.delay)
+        self.writes += 1
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+
+def measure(log: logging.Logger, records: int):
+    longest = 0.0
+    started = time.perf_counter()
+    for i in range(records):
+        call_started = time.perf_counter()
+        log.info("Booking %d created for event %s", i, "bench")
+        longest = max(longest, time.perf_counter() - call_started)
+    return (time.perf_counter() - started) / records * 1e6, longest * 1e3
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--records", type=int, default=2000)
+    parser.add_argument("--write-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    print(f"{'pipeline':>9} {'us/record':>10} {'longest ms':>11} {'written':>8}")
+
+    # The previous get_logger(): its own synchronous handler per module.
+    stream = SlowStream(args.write_ms / 1000)
+    direct = logging.getLogger("benchmarks.direct")
+    direct.setLevel(logging.INFO)
+    direct.propagate = False
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter(app_logger.TEXT_FORMAT))
+    direct.addHandler(handler)
+    per_record, longest = measure(direct, args.records)
+    print(f"{'direct':>9} {per_record:>10.1f} {longest:>11.2f} {stream.writes:>8}")
+
+    stream = SlowStream(args.write_ms / 1000)
+    real_stdout, sys.stdout = sys.stdout, stream
+    try:
+        app_logger.configure_logging()
+    finally:
+        sys.stdout = real_stdout
+    queued = logging.getLogger("app.benchmarks")
+    per_record, longest = measure(queued, args.records)
+    app_logger.shutdown_logging()
+    print(f"{'queued':>9} {per_record:>10.1f} {longest:>11.2f} {stream.writes:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,475 @@
+"""
+Microbenchmarks of the hot paths under the endpoints.
+
+Each benchmark times one operation in isolation: CRUDBase get, create, update
+and remove on events, a page of a user's bookings, validating the Event and
+Booking response schemas from ORM rows, issuing an access token, resolving
+the current user from a token (auth cache hit and miss), and password hashing
+and verification. The crud.*, schema.* and auth.current_user* benchmarks use
+DATABASE_URL and remove what they seed (the schema benchmarks validate rows
+loaded from it); access tokens and password hashing need no services.
+
+Operations run in samples long enough to time reliably (--sample-ms, found by
+doubling the loop count), with the garbage collector off, after one warm-up
+sample. The median of --repeat samples is reported with its spread: the
+interquartile range as a percentage of the median, and database benchmarks
+with their round trips per operation (statements plus commits). --output
+saves the results as JSON; --baseline compares the medians and round trips
+with an earlier file and exits non-zero when either grew by more than
+--tolerance.
+
+    uv run python -m benchmarks.micro --list
+    uv run python -m benchmarks.micro schema.event auth.current_user --output micro.json
+    uv run python -m benchmarks.micro --baseline micro.json
+"""
+import argparse
+import asyncio
+import gc
+import inspect
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Tuple, Type
+
+from fastapi.security import HTTPAuthorizationCredentials
+from pydantic import TypeAdapter
+from sqlalchemy import delete, event, insert, select
+
+from app.api import deps
+from app.core.database import AsyncSessionLocal, Base, engine
+from app.core.security import create_access_token, get_password_hash, verify_password
+from app.crud import booking as crud_booking
+from app.crud import event as crud_event
+from app.models.booking import Booking
+from app.models.event import Event
+from app.models.user import User, UserRole
+from app.schemas.booking import Booking as BookingSchema
+from app.schemas.event import Event as EventSchema
+from app.schemas.event import EventCreate
+from app.services.auth_cache import auth_cache
+from benchmarks import stats
+
+PASSWORD = "micro-benchmark-password"
+
+
+class EventRow(EventCreate):
+    # CRUDBase.create builds the model from the schema alone.
+    organizer_id: uuid.UUID
+
+
+class RoundTrips:
+    """Statements and commits sent over the engine's connections."""
+
+    def __init__(self):
+        self.count = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._statement)
+        event.listen(engine.sync_engine, "commit", self._commit)
+
+    def _statement(self, *args) -> None:
+        self.count += 1
+
+    def _commit(self, *args) -> None:
+        self.count += 1
+
+
+round_trips = RoundTrips()
+
+
+class Fixture:
+    """Rows shared by the database benchmarks, seeded once per run."""
+
+    def __init__(self):
+        self.run_id = uuid.uuid4().hex[:8]
+        self.date = datetime.now(timezone.utc) + timedelta(days=30)
+        self.organizer_id, self.user_id = uuid.uuid4(), uuid.uuid4()
+
+    def event_values(self, title: str) -> dict:
+        return {
+            "id": uuid.uuid4(),
+            "title": title,
+            "date": self.date,
+            "location": "Bench",
+            "capacity": 100,
+            "organizer_id": self.organizer_id,
+        }
+
+    async def setup(self, bookings: int) -> None:
+        hashed = get_password_hash(PASSWORD)
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                insert(User),
+                [
+                    {
+                        "id": self.organizer_id,
+                        "email": f"micro-{self.run_id}-organizer@example.com",
+                        "hashed_password": hashed,
+                        "role": UserRole.ORGANIZER,
+                    },
+                    {
+                        "id": self.user_id,
+                        "email": f"micro-{self.run_id}-user@example.com",
+                        "hashed_password": hashed,
+                        "role": UserRole.USER,
+                    },
+                ],
+            )
+            event = self.event_values("Micro benchmark event")
+            self.event_id = event["id"]
+            await db.execute(insert(Event), [event])
+            await db.execute(
+                insert(Booking),
+                [
+                    {
+                        "id": uuid.uuid4(),
+                        "user_id": self.user_id,
+                        "event_id": self.event_id,
+                        "tickets_count": 1,
+                        "created_at": self.date - timedelta(seconds=i),
+                    }
+                    for i in range(bookings)
+                ],
+            )
+            await db.commit()
+
+    async def teardown(self) -> None:
+        users = select(User.id).where(User.email.like(f"micro-{self.run_id}-%"))
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(Booking).where(Booking.user_id.in_(users)))
+            await db.execute(delete(Event).where(Event.organizer_id.in_(users)))
+            await db.execute(delete(User).where(User.id.in_(users)))
+            await db.commit()
+
+
+class Benchmark:
+    """
+    One timed operation. `setup` runs once, `prepare` before every sample
+    (untimed, told how many operations follow), and `op` is what is timed;
+    it may be a plain function or a coroutine function.
+    """
+
+    name = ""
+    uses_db = False
+
+    def __init__(self, fixture: Fixture):
+        self.fixture = fixture
+
+    async def setup(self) -> None:
+        pass
+
+    async def prepare(self, number: int) -> None:
+        pass
+
+    def op(self):
+        raise NotImplementedError
+
+    async def teardown(self) -> None:
+        pass
+
+
+class DatabaseBenchmark(Benchmark):
+    uses_db = True
+
+    async def setup(self) -> None:
+        self.db = AsyncSessionLocal()
+
+    async def teardown(self) -> None:
+        await self.db.close()
+
+
+class CrudGet(DatabaseBenchmark):
+    name = "crud.get"
+
+    async def op(self):
+        await crud_event.get(self.db, id=self.fixture.event_id)
+
+
+class CrudCreate(DatabaseBenchmark):
+    name = "crud.create"
+
+    async def setup(self) -> None:
+        await super().setup()
+        self.obj_in = EventRow(
+            title="Micro created event",
+            date=self.fixture.date,
+            location="Bench",
+            capacity=100,
+            organizer_id=self.fixture.organizer_id,
+        )
+
+    async def op(self):
+        await crud_event.create(self.db, obj_in=self.obj_in)
+
+
+class CrudUpdate(DatabaseBenchmark):
+    name = "crud.update"
+
+    async def setup(self) -> None:
+        await super().setup()
+        self.event = await crud_event.get(self.db, id=self.fixture.event_id)
+        self.n = 0
+
+    async def op(self):
+        self.n += 1
+        await crud_event.update(self.db, db_obj=self.event, obj_in={"location": f"Bench {self.n}"})
+
+
+class CrudRemove(DatabaseBenchmark):
+    name = "crud.remove"
+
+    async def prepare(self, number: int) -> None:
+        rows = [self.fixture.event_values("Micro removed event") for _ in range(number)]
+        await self.db.execute(insert(Event), rows)
+        await self.db.commit()
+        self.ids = [row["id"] for row in rows]
+
+    async def op(self):
+        await crud_event.remove(self.db, id=self.ids.pop())
+
+
+class BookingsPage(DatabaseBenchmark):
+    name = "crud.get_page_by_user"
+
+    async def op(self):
+        await crud_booking.get_page_by_user(self.db, user_id=self.fixture.user_id, limit=100)
+        # A new request starts with an empty identity map.
+        self.db.expunge_all()
+
+
+class SchemaBenchmark(DatabaseBenchmark):
+    model: Type[Base]
+    schema: type
+    many = False
+
+    async def setup(self) -> None:
+        await super().setup()
+        column = Booking.user_id if self.model is Booking else Event.id
+        value = self.fixture.user_id if self.model is Booking else self.fixture.event_id
+        rows = (await self.db.execute(select(self.model).where(column == value))).scalars().all()
+        if self.many:
+            self.adapter = TypeAdapter(List[self.schema])
+            self.rows = rows
+        else:
+            self.row = rows[0]
+
+    def op(self):
+        if self.many:
+            self.adapter.validate_python(self.rows)
+        else:
+            self.schema.model_validate(self.row)
+
+
+class EventSchemaBenchmark(SchemaBenchmark):
+    name = "schema.event"
+    model = Event
+    schema = EventSchema
+
+
+class BookingSchemaBenchmark(SchemaBenchmark):
+    name = "schema.booking"
+    model = Booking
+    schema = BookingSchema
+
+
+class BookingListSchemaBenchmark(SchemaBenchmark):
+    name = "schema.bookings_list"
+    model = Booking
+    schema = BookingSchema
+    many = True
+
+
+class AccessToken(Benchmark):
+    name = "auth.create_access_token"
+
+    def op(self):
+        create_access_token(self.fixture.user_id)
+
+
+class CurrentUser(DatabaseBenchmark):
+    """JWT decode plus the auth cache; `cached = False` loads the user each time."""
+
+    name = "auth.current_user"
+    cached = True
+
+    async def setup(self) -> None:
+        await super().setup()
+        # The cache serves entries only while its invalidation listener is
+        # subscribed; there is no listener here, so stand in for one.
+        auth_cache._subscribed = True
+        self.token = HTTPAuthorizationCredentials(
+            scheme="Bearer", credentials=create_access_token(self.fixture.user_id)
+        )
+        await deps.get_current_user(db=self.db, token=self.token)
+
+    async def teardown(self) -> None:
+        auth_cache._subscribed = False
+        auth_cache.clear()
+        await super().teardown()
+
+    async def op(self):
+        if not self.cached:
+            auth_cache.discard(self.fixture.user_id)
+        await deps.get_current_user(db=self.db, token=self.token)
+        if not self.cached:
+            self.db.expunge_all()
+
+
+class CurrentUserUncached(CurrentUser):
+    name = "auth.current_user_uncached"
+    cached = False
+
+
+class PasswordHash(Benchmark):
+    name = "password.hash"
+
+    def op(self):
+        get_password_hash(PASSWORD)
+
+
+class PasswordVerify(Benchmark):
+    name = "password.verify"
+
+    async def setup(self) -> None:
+        self.hashed = get_password_hash(PASSWORD)
+
+    def op(self):
+        verify_password(PASSWORD, self.hashed)
+
+
+BENCHMARKS: Dict[str, Type[Benchmark]] = {
+    benchmark.name: benchmark
+    for benchmark in (
+        CrudGet,
+        CrudCreate,
+        CrudUpdate,
+        CrudRemove,
+        BookingsPage,
+        EventSchemaBenchmark,
+        BookingSchemaBenchmark,
+        BookingListSchemaBenchmark,
+        AccessToken,
+        CurrentUser,
+        CurrentUserUncached,
+        PasswordHash,
+        PasswordVerify,
+    )
+}
+
+
+async def sample(benchmark: Benchmark, number: int) -> Tuple[float, float]:
+    """Seconds and database round trips per operation over `number` operations."""
+    await benchmark.prepare(number)
+    op = benchmark.op
+    gc.collect()
+    gc.disable()
+    trips = round_trips.count
+    try:
+        if inspect.iscoroutinefunction(op):
+            started = time.perf_counter()
+            for _ in range(number):
+                await op()
+        else:
+            started = time.perf_counter()
+            for _ in range(number):
+                op()
+        elapsed = time.perf_counter() - started
+        return elapsed / number, (round_trips.count - trips) / number
+    finally:
+        gc.enable()
+
+
+async def measure(benchmark: Benchmark, repeat: int, sample_seconds: float) -> dict:
+    number = 1
+    while True:
+        per_op, _ = await sample(benchmark, number)
+        if per_op * number >= sample_seconds or number >= 1 << 20:
+            break
+        number *= 2
+    await sample(benchmark, number)
+    measured = [await sample(benchmark, number) for _ in range(repeat)]
+    samples = sorted(seconds for seconds, _ in measured)
+    median = statistics.median(samples)
+    iqr = stats.percentile(samples, 75) - stats.percentile(samples, 25)
+    return {
+        "number": number,
+        "repeat": repeat,
+        "median_us": median * 1e6,
+        "min_us": samples[0] * 1e6,
+        "iqr_pct": iqr / median * 100 if median else 0.0,
+        "round_trips": statistics.median(trips for _, trips in measured),
+    }
+
+
+async def run(names: List[str], repeat: int, sample_seconds: float, bookings: int) -> Dict[str, dict]:
+    fixture = Fixture()
+    uses_db = any(BENCHMARKS[name].uses_db for name in names)
+    if uses_db:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        await fixture.setup(bookings)
+    print(
+        f"{'benchmark':>28} {'loops':>7} {'median us':>11} {'min us':>11} {'iqr %':>6} "
+        f"{'trips':>6}"
+    )
+    results: Dict[str, dict] = {}
+    try:
+        for name in names:
+            benchmark = BENCHMARKS[name](fixture)
+            await benchmark.setup()
+            try:
+                result = results[name] = await measure(benchmark, repeat, sample_seconds)
+            finally:
+                await benchmark.teardown()
+            print(
+                f"{name:>28} {result['number']:>7} {result['median_us']:>11.1f} "
+                f"{result['min_us']:>11.1f} {result['iqr_pct']:>6.1f} "
+                f"{result['round_trips']:>6.1f}"
+            )
+    finally:
+        if uses_db:
+            await fixture.teardown()
+        await engine.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("benchmarks", nargs="*", help="names to run; all by default")
+    parser.add_argument("--list", action="store_true", help="list the benchmarks and exit")
+    parser.add_argument("--repeat", type=int, default=15)
+    parser.add_argument("--sample-ms", type=float, default=50.0)
+    parser.add_argument("--bookings", type=int, default=100, help="bookings on the paged user")
+    parser.add_argument("--output", help="save the results to this JSON file")
+    parser.add_argument("--baseline", help="compare with results saved by an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args()
+    if args.list:
+        print("\n".join(BENCHMARKS))
+        return
+    names = args.benchmarks or list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+    results = asyncio.run(run(names, args.repeat, args.sample_ms / 1000, args.bookings))
+    if args.output:
+        stats.save(
+            args.output,
+            results,
+            benchmark="micro",
+            database=engine.url.get_backend_name(),
+            args=vars(args),
+        )
+    if args.baseline:
+        regressions = stats.compare(
+            results,
+            stats.load(args.baseline),
+            metrics=("median_us", "round_trips"),
+            tolerance=args.tolerance,
+        )
+        if regressions:
+            raise SystemExit(f"slower beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Per-request overhead of the request middleware.
+
+Calls a minimal FastAPI app directly over ASGI (no server, no sockets) bare,
+wrapped in the previous BaseHTTPMiddleware logger, and wrapped in
+MetricsMiddleware, and reports the time per request and what each middleware
+adds on top of the bare app. Log output is discarded unless --log is given,
+so the numbers compare the middleware mechanics.
+
+    uv run python -m benchmarks.middleware --requests 20000
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+from fastapi import APIRouter, FastAPI, Request
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core.metrics import RequestMetrics
+from app.core.middleware import MetricsMiddleware
+from app.utils.logger import configure_logging, get_logger
+
+logger = get_logger("benchmarks.middleware")
+
+
+class LoggingMiddleware(BaseHTTPMiddleware):
+    """The middleware this replaced."""
+
+    async def dispatch(self, request: Request, call_next):
+        start_time = time.time()
+        response = await call_next(request)
+        process_time = time.time() - start_time
+        logger.info(
+            f"Method: {request.method} Path: {request.url.path} "
+            f"Status: {response.status_code} Process Time: {process_time:.4f}s"
+        )
+        return response
+
+
+def make_app(middleware=None) -> FastAPI:
+    app = FastAPI()
+    router = APIRouter()
+
+    @router.get("/{id}")
+    async def read_item(id: int):
+        return {"id": id}
+
+    app.include_router(router, prefix="/api/v1/items")
+    if middleware is not None:
+        app.add_middleware(middleware)
+    return app
+
+
+async def call(app, path: str) -> None:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 1),
+        "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def measure(app, requests: int) -> float:
+    for i in range(200):
+        await call(app, f"/api/v1/items/{i}")
+    started = time.perf_counter()
+    for i in range(requests):
+        await call(app, f"/api/v1/items/{i}")
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--log", action="store_true", help="keep per-request log lines")
+    args = parser.parse_args()
+    if args.log:
+        configure_logging()
+        logging.getLogger("benchmarks").setLevel(logging.INFO)
+    else:
+        logging.disable(logging.INFO)
+
+    metrics = RequestMetrics()
+
+    class Metrics(MetricsMiddleware):
+        def __init__(self, app):
+            super().__init__(app, metrics)
+
+    bare = await measure(make_app(), args.requests)
+    print(f"{'middleware':>17} {'us/request':>11} {'overhead us':>12}")
+    print(f"{'none':>17} {bare:>11.1f} {'':>12}")
+    for label, middleware in (("BaseHTTP logger", LoggingMiddleware), ("MetricsMiddleware", Metrics)):
+        per_request = await measure(make_app(middleware), args.requests)
+        print(f"{label:>17} {per_request:>11.1f} {per_request - bare:>12.1f}")
+    print(f"recorded routes: {sorted({route for _, route, _ in metrics.requests})}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
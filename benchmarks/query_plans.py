@@ -0,0 +1,349 @@
+"""
+Query plan audit of the CRUD layer over a seeded dataset.
+
+Seeds --users users (one in ten an organizer), --events events, --bookings
+bookings and an outbox backlog, analyzes the tables, then calls each CRUD
+operation the endpoints rely on while recording every statement it sends.
+Each statement is run through EXPLAIN (it is not executed again), and the
+audit fails when a plan reads a table of more than --min-rows rows with a
+sequential scan. It also fails when a foreign key's columns do not lead an
+index of their table: every cascading delete looks rows up by them, and
+EXPLAIN does not show those lookups. The seeded rows are removed at the end.
+The default sizes are large enough for index plans to win; on much smaller
+tables a sequential scan can be the cheaper plan.
+
+Runs against DATABASE_URL, PostgreSQL or SQLite (EXPLAIN QUERY PLAN).
+--verbose prints every statement with its plan.
+
+    uv run python -m benchmarks.query_plans
+    uv run python -m benchmarks.query_plans --events 200000 --bookings 1000000 --verbose
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Tuple
+
+from sqlalchemy import delete, event, func, inspect, insert, or_, select, text, union
+
+from app.core.database import AsyncSessionLocal, Base, engine
+from app.crud import booking as crud_booking
+from app.crud import event as crud_event
+from app.crud import outbox as crud_outbox
+from app.crud import user as crud_user
+from app.models.booking import Booking
+from app.models.outbox import OutboxKind, OutboxMessage
+from app.models.user import User, UserRole
+from app.schemas.booking import BookingCheckout, BookingCreate
+from benchmarks.event_search import DAYS, START, event_row
+
+BATCH_SIZE = 10_000
+
+
+class Dataset:
+    """The seeded rows, and the ones the audited operations work on."""
+
+    def __init__(self, users: int, events: int, bookings: int):
+        self.run_id = uuid.uuid4().hex[:8]
+        self.random = random.Random(0)
+        self.user_ids = [uuid.uuid4() for _ in range(users)]
+        self.organizer_ids = self.user_ids[: max(2, users // 10)]
+        self.attendee_ids = self.user_ids[len(self.organizer_ids) :]
+        self.event_ids = [uuid.uuid4() for _ in range(events)]
+        self.bookings = bookings
+
+    def email(self, i: int) -> str:
+        return f"plans-{self.run_id}-{i}@example.com"
+
+    async def seed(self) -> None:
+        now = datetime.now(timezone.utc)
+        # Also tells the seeded outbox messages apart at teardown
+        self.backlog_due = now + timedelta(days=1)
+        organizers = set(self.organizer_ids)
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                insert(User),
+                [
+                    {
+                        "id": user_id,
+                        "email": self.email(i),
+                        "hashed_password": "x",
+                        "role": UserRole.ORGANIZER if user_id in organizers else UserRole.USER,
+                    }
+                    for i, user_id in enumerate(self.user_ids)
+                ],
+            )
+            for start in range(0, len(self.event_ids), BATCH_SIZE):
+                rows = []
+                for i, event_id in enumerate(self.event_ids[start : start + BATCH_SIZE], start):
+                    # Round robin, so the first two events have different organizers
+                    row = event_row(self.organizer_ids[i % len(self.organizer_ids)], now)
+                    rows.append({**row, "id": event_id, "capacity": 1000})
+                await crud_event.insert_many(db, rows=rows)
+            self.booking_ids = []
+            for start in range(0, self.bookings, BATCH_SIZE):
+                rows = [
+                    {
+                        "id": uuid.uuid4(),
+                        "user_id": self.random.choice(self.attendee_ids),
+                        "event_id": self.random.choice(self.event_ids),
+                        "tickets_count": 1,
+                        "created_at": now - timedelta(seconds=self.random.randrange(DAYS * 86400)),
+                    }
+                    for _ in range(min(BATCH_SIZE, self.bookings - start))
+                ]
+                await db.execute(insert(Booking), rows)
+                # A backlog of confirmations, due later so the audit leaves it alone
+                await db.execute(
+                    insert(OutboxMessage),
+                    [
+                        {
+                            **crud_outbox.values(
+                                kind=OutboxKind.BOOKING_CONFIRMATION, aggregate_id=row["id"]
+                            ),
+                            "available_at": self.backlog_due,
+                        }
+                        for row in rows[::10]
+                    ],
+                )
+                if not self.booking_ids:
+                    self.booking_ids = [row["id"] for row in rows[:2]]
+                    self.user_id, self.event_id = rows[0]["user_id"], rows[0]["event_id"]
+            await db.commit()
+        async with engine.connect() as conn:
+            await conn.execution_options(isolation_level="AUTOCOMMIT")
+            if engine.dialect.name == "postgresql":
+                await conn.execute(text("VACUUM ANALYZE"))
+            else:
+                await conn.execute(text("ANALYZE"))
+
+    async def teardown(self) -> None:
+        users = select(User.id).where(User.email.like(f"plans-{self.run_id}-%"))
+        bookings = select(Booking).where(Booking.user_id.in_(users)).subquery()
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                delete(OutboxMessage).where(
+                    or_(
+                        OutboxMessage.available_at == self.backlog_due,
+                        # Queued by the audited bookings
+                        OutboxMessage.aggregate_id.in_(
+                            union(select(bookings.c.id), select(bookings.c.checkout_id))
+                        ),
+                    )
+                )
+            )
+            await db.execute(delete(User).where(User.id.in_(users)))
+            await db.commit()
+
+
+# Each operation gets a fresh session and the dataset. Removals run last.
+Operation = Callable[[Any, Dataset], Awaitable[Any]]
+
+
+async def _event_page_2(db, data: Dataset) -> None:
+    _, cursor = await crud_event.get_page(db, limit=100)
+    await crud_event.get_page(db, limit=100, cursor=cursor)
+
+
+async def _event_update(db, data: Dataset) -> None:
+    event = await crud_event.get(db, id=data.event_id)
+    await crud_event.update(db, db_obj=event, obj_in={"location": "Hall 101"})
+
+
+async def _stream_attendees(db, data: Dataset) -> None:
+    async for _ in crud_booking.stream_attendees(db, event_id=data.event_id):
+        pass
+
+
+async def _change_tickets(db, data: Dataset) -> None:
+    booking = await crud_booking.get(db, id=data.booking_ids[0])
+    await crud_booking.change_tickets(db, db_obj=booking, obj_in={"tickets_count": 2})
+
+
+async def _outbox_relay(db, data: Dataset) -> None:
+    messages = await crud_outbox.claim_due(db, limit=100)
+    await crud_outbox.defer(db, messages=messages[:1], max_backoff=60)
+    await crud_outbox.remove(db, ids=[message.id for message in messages[1:]])
+    # The seeded backlog is not due; leave whatever the app queued in place.
+    await db.rollback()
+
+
+OPERATIONS: List[Tuple[str, Operation]] = [
+    ("user.get", lambda db, data: crud_user.get(db, id=data.user_id)),
+    ("user.get_by_email", lambda db, data: crud_user.get_by_email(db, email=data.email(0))),
+    ("event.get", lambda db, data: crud_event.get(db, id=data.event_id)),
+    ("event.get_page", lambda db, data: crud_event.get_page(db, limit=100)),
+    ("event.get_page_2", _event_page_2),
+    (
+        "event.get_multi_by_organizer",
+        lambda db, data: crud_event.get_multi_by_organizer(db, organizer_id=data.organizer_ids[0]),
+    ),
+    ("event.search_words", lambda db, data: crud_event.search(db, q="jazz fest", limit=100)),
+    ("event.search_location", lambda db, data: crud_event.search(db, location="berlin", limit=100)),
+    (
+        "event.search_dates",
+        lambda db, data: crud_event.search(
+            db, date_from=START, date_to=START + timedelta(days=7), available=True, limit=100
+        ),
+    ),
+    (
+        "event.get_remaining_capacity",
+        lambda db, data: crud_event.get_remaining_capacity(db, event_id=data.event_id),
+    ),
+    ("event.update", _event_update),
+    (
+        "booking.get_page_by_user",
+        lambda db, data: crud_booking.get_page_by_user(db, user_id=data.user_id, limit=100),
+    ),
+    ("booking.stream_attendees", _stream_attendees),
+    (
+        "booking.reserve",
+        lambda db, data: crud_booking.reserve(
+            db, obj_in=BookingCreate(event_id=data.event_id), user_id=data.user_id
+        ),
+    ),
+    (
+        "booking.checkout",
+        lambda db, data: crud_booking.checkout(
+            db,
+            obj_in=BookingCheckout(
+                items=[{"event_id": data.event_id}, {"event_id": data.event_ids[-1]}]
+            ),
+            user_id=data.user_id,
+        ),
+    ),
+    ("booking.change_tickets", _change_tickets),
+    ("outbox.relay", _outbox_relay),
+    ("booking.remove", lambda db, data: crud_booking.remove(db, id=data.booking_ids[1])),
+    ("event.remove", lambda db, data: crud_event.remove(db, id=data.event_ids[1])),
+    ("user.remove", lambda db, data: crud_user.remove(db, id=data.organizer_ids[-1])),
+]
+
+_AUDITED = re.compile(r"\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\b", re.IGNORECASE)
+
+
+async def capture(operation: Operation, data: Dataset) -> List[Tuple[str, Any]]:
+    """The statements `operation` sends, in order, without repeats."""
+    statements: Dict[str, Any] = {}
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and _AUDITED.match(statement):
+            statements.setdefault(statement, parameters)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        async with AsyncSessionLocal() as db:
+            await operation(db, data)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+    return list(statements.items())
+
+
+def _postgresql_seq_scans(plan: Dict[str, Any]) -> Iterator[str]:
+    if plan["Node Type"] == "Seq Scan":
+        yield plan["Relation Name"]
+    for child in plan.get("Plans", []):
+        yield from _postgresql_seq_scans(child)
+
+
+async def explain(statement: str, parameters: Any) -> Tuple[List[str], List[str]]:
+    """The plan of a statement as text lines, and the tables it scans sequentially."""
+    async with engine.connect() as conn:
+        if engine.dialect.name == "postgresql":
+            lines = (
+                await conn.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+            ).scalars().all()
+            document = (
+                await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+            ).scalar()
+            if isinstance(document, str):
+                document = json.loads(document)
+            return lines, list(_postgresql_seq_scans(document[0]["Plan"]))
+        rows = (await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)).all()
+        lines = [row[-1] for row in rows]
+        # "SCAN <table>" without "USING ... INDEX" reads the whole table.
+        scans = [m.group(1) for m in map(re.compile(r"SCAN (\w+)$").match, lines) if m]
+        return lines, scans
+
+
+def unindexed_foreign_keys(sync_conn) -> List[str]:
+    """Foreign keys of the app's tables whose columns no index starts with."""
+    inspector = inspect(sync_conn)
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        prefixes = [inspector.get_pk_constraint(table.name)["constrained_columns"]]
+        prefixes += [index["column_names"] for index in inspector.get_indexes(table.name)]
+        prefixes += [unique["column_names"] for unique in inspector.get_unique_constraints(table.name)]
+        for foreign_key in inspector.get_foreign_keys(table.name):
+            columns = foreign_key["constrained_columns"]
+            if not any(set(prefix[: len(columns)]) == set(columns) for prefix in prefixes):
+                missing.append(f"{table.name}({', '.join(columns)})")
+    return missing
+
+
+async def table_sizes() -> Dict[str, int]:
+    async with engine.connect() as conn:
+        return {
+            table.name: await conn.scalar(select(func.count()).select_from(table))
+            for table in Base.metadata.sorted_tables
+        }
+
+
+async def run(users: int, events: int, bookings: int, min_rows: int, verbose: bool) -> List[str]:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    data = Dataset(users, events, bookings)
+    await data.seed()
+    problems = []
+    try:
+        sizes = await table_sizes()
+        print(f"seeded {', '.join(f'{name} {rows}' for name, rows in sizes.items())}")
+        print(f"{'operation':>30} {'statements':>10}  sequential scans")
+        for name, operation in OPERATIONS:
+            statements = await capture(operation, data)
+            found = []
+            for statement, parameters in statements:
+                lines, scans = await explain(statement, parameters)
+                # Unknown names are aliases; count them as large tables.
+                large = [table for table in scans if sizes.get(table, min_rows + 1) > min_rows]
+                found += large
+                if verbose:
+                    print(f"\n{statement}")
+                    for line in lines:
+                        print(f"    {line}")
+            print(f"{name:>30} {len(statements):>10}  {', '.join(found) or '-'}")
+            if found:
+                problems.append(f"{name} scans {', '.join(sorted(set(found)))}")
+        async with engine.connect() as conn:
+            missing = await conn.run_sync(unindexed_foreign_keys)
+        for foreign_key in missing:
+            print(f"foreign key without an index: {foreign_key}")
+            problems.append(f"{foreign_key} has no index")
+    finally:
+        await data.teardown()
+        await engine.dispose()
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--events", type=int, default=50_000)
+    parser.add_argument("--bookings", type=int, default=200_000)
+    parser.add_argument(
+        "--min-rows", type=int, default=1000, help="tables this small may be scanned"
+    )
+    parser.add_argument("--verbose", action="store_true", help="print every statement's plan")
+    args = parser.parse_args()
+
+    problems = asyncio.run(run(args.users, args.events, args.bookings, args.min_rows, args.verbose))
+    if problems:
+        raise SystemExit(f"query plan audit failed: {'; '.join(problems)}")
+    print("no sequential scans of large tables")
+
+
+if __name__ == "__main__":
+    main()
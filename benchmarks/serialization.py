@@ -0,0 +1,85 @@
+"""
+Serialization benchmark for event list responses.
+
+Serialises a list of in-memory Event rows the way FastAPI does for routes
+with a response_model (validate, dump to a dict, json.dumps) and the way
+app.core.responses does (validate, dump to JSON bytes in pydantic-core), and
+reports time and bytes per response, with and without gzip at
+RESPONSE_GZIP_LEVEL.
+
+    uv run python -m benchmarks.serialization --events 10000 --rounds 10
+"""
+import argparse
+import gzip
+import json
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List
+
+from pydantic import TypeAdapter
+
+from app.core.config import settings
+from app.core.responses import dump_json
+from app.models.event import Event as EventModel
+from app.schemas.event import Event
+
+
+def make_events(count: int) -> List[EventModel]:
+    organizer_id = uuid.uuid4()
+    now = datetime.now(timezone.utc)
+    events = []
+    for i in range(count):
+        event = EventModel(
+            id=uuid.uuid4(),
+            title=f"Event {i}",
+            description="A benchmark event with a short description.",
+            date=now + timedelta(days=i % 365),
+            location="Main hall",
+            capacity=500,
+            organizer_id=organizer_id,
+            created_at=now,
+            hot_inventory=False,
+            capacity_shards=0,
+        )
+        event.remaining_capacity = 500
+        events.append(event)
+    return events
+
+
+def response_model_path(events: List[EventModel]) -> bytes:
+    adapter = TypeAdapter(List[Event])
+    content = adapter.dump_python(adapter.validate_python(events, from_attributes=True), mode="json")
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def render_path(events: List[EventModel]) -> bytes:
+    return dump_json(List[Event], events)
+
+
+def measure(label: str, path: Callable[[List[EventModel]], bytes], events: List[EventModel], rounds: int) -> None:
+    body = path(events)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        body = path(events)
+    elapsed = (time.perf_counter() - started) / rounds
+    compressed = gzip.compress(body, compresslevel=settings.RESPONSE_GZIP_LEVEL)
+    print(f"{label:>16} {elapsed * 1000:>10.1f} {len(body):>12} {len(compressed):>12}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--events", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    events = make_events(args.events)
+    print(f"{'path':>16} {'ms/resp':>10} {'bytes':>12} {'gzip bytes':>12}")
+    measure("response_model", response_model_path, events, args.rounds)
+    measure("render", render_path, events, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Email throughput benchmark against a local SMTP stand-in.
+
+Starts a minimal SMTP server on localhost (optionally offering STARTTLS with a
+throwaway self-signed certificate) that accepts and counts messages, then
+sends the same number of emails one connection per message, as the worker
+used to, and through the worker's SMTPPool. Reports messages per second as
+seen by the stand-in.
+
+    uv run python -m benchmarks.smtp --messages 500 --tls
+"""
+import argparse
+import asyncio
+import datetime
+import ssl
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+import aiosmtplib
+
+from app.core.email import SMTPPool, build_message
+
+
+class StandInSMTP:
+    """Accepts any mail over SMTP and counts it; speaks just enough of the protocol for aiosmtplib."""
+
+    def __init__(self, tls: Optional[ssl.SSLContext]):
+        self.tls = tls
+        self.received = 0
+        self.connections = 0
+        # Connections to close on their next command, as servers do with idle ones.
+        self.hang_ups = 0
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        writer.write(b"220 stand-in ESMTP\r\n")
+        secure = False
+        while line := await reader.readline():
+            if self.hang_ups:
+                self.hang_ups -= 1
+                break
+            command = line.decode().strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                extensions = ["250-stand-in", "250-AUTH PLAIN LOGIN"]
+                if self.tls and not secure:
+                    extensions.append("250-STARTTLS")
+                extensions.append("250 8BITMIME")
+                writer.write(("\r\n".join(extensions) + "\r\n").encode())
+            elif command == "STARTTLS":
+                writer.write(b"220 ready\r\n")
+                await writer.drain()
+                await writer.start_tls(self.tls)
+                secure = True
+                continue
+            elif command.startswith("AUTH"):
+                writer.write(b"235 ok\r\n")
+            elif command == "DATA":
+                writer.write(b"354 go ahead\r\n")
+                await writer.drain()
+                while (await reader.readline()) != b".\r\n":
+                    pass
+                self.received += 1
+                writer.write(b"250 queued\r\n")
+            elif command == "QUIT":
+                writer.write(b"221 bye\r\n")
+                await writer.drain()
+                break
+            else:
+                writer.write(b"250 ok\r\n")
+            await writer.drain()
+        writer.close()
+
+
+def self_signed_context() -> ssl.SSLContext:
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now)
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    directory = Path(tempfile.mkdtemp())
+    (directory / "cert.pem").write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+    (directory / "key.pem").write_bytes(
+        key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+    )
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(directory / "cert.pem", directory / "key.pem")
+    return context
+
+
+async def measure(label: str, server: StandInSMTP, messages: int, send) -> None:
+    received, connections = server.received, server.connections
+    started = time.perf_counter()
+    await send()
+    elapsed = time.perf_counter() - started
+    delivered = server.received - received
+    print(
+        f"{label:>12} {delivered:>9} {server.connections - connections:>11} "
+        f"{elapsed:>8.2f} {delivered / elapsed:>10.1f}"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--tls", action="store_true", help="negotiate STARTTLS on every connection")
+    args = parser.parse_args()
+
+    server = StandInSMTP(self_signed_context() if args.tls else None)
+    listener = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+    port = listener.sockets[0].getsockname()[1]
+    options = dict(
+        hostname="127.0.0.1",
+        port=port,
+        username="bench",
+        password="bench",
+        start_tls=args.tls,
+        validate_certs=False,
+    )
+    message = build_message(["attendee@example.com"], "Booking Confirmation", "<p>Hi</p>" * 50)
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def per_message() -> None:
+        async def one() -> None:
+            async with semaphore:
+                await aiosmtplib.send(message, **options)
+
+        await asyncio.gather(*[one() for _ in range(args.messages)])
+
+    pool = SMTPPool(size=args.concurrency, max_idle=60, **options)
+
+    async def pooled() -> None:
+        await asyncio.gather(*[pool.send(message) for _ in range(args.messages)])
+
+    print(f"{'mode':>12} {'delivered':>9} {'connections':>11} {'seconds':>8} {'msgs/s':>10}")
+    await measure("per-message", server, args.messages, per_message)
+    await measure("pooled", server, args.messages, pooled)
+    await pool.close()
+    listener.close()
+    await listener.wait_closed()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
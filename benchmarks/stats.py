@@ -0,0 +1,110 @@
+"""
+Summaries, result files and baseline comparison shared by the benchmarks.
+
+Results are saved as JSON, one entry per measured operation, alongside the
+commit, Python version and settings they were taken with. Comparing a run with
+a saved baseline prints the change of every shared metric and flags those
+that got worse by more than the tolerance.
+"""
+import json
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+# Metrics where a higher value is better; for every other one lower is.
+HIGHER_IS_BETTER = {"per_second"}
+
+
+def percentile(ordered: Sequence[float], q: float) -> float:
+    """The q-th percentile (0-100) of sorted values, interpolating between ranks."""
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(seconds: Sequence[float], *, elapsed: Optional[float] = None) -> Dict[str, float]:
+    """Latency percentiles in milliseconds, and throughput when `elapsed` is given."""
+    ordered = sorted(seconds)
+    summary = {
+        "count": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000 if ordered else 0.0,
+        "p50_ms": percentile(ordered, 50) * 1000,
+        "p95_ms": percentile(ordered, 95) * 1000,
+        "p99_ms": percentile(ordered, 99) * 1000,
+        "max_ms": ordered[-1] * 1000 if ordered else 0.0,
+    }
+    if elapsed is not None:
+        summary["per_second"] = len(ordered) / elapsed if elapsed else 0.0
+    return summary
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save(path: str, results: Dict[str, Dict[str, Any]], **meta: Any) -> None:
+    document = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            **meta,
+        },
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2, default=str)
+        f.write("\n")
+
+
+def load(path: str) -> Dict[str, Dict[str, Any]]:
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+def compare(
+    results: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    *,
+    metrics: Sequence[str],
+    tolerance: float,
+) -> List[str]:
+    """
+    Print each metric's change against the baseline and return the
+    "<name> <metric>" of those that regressed by more than `tolerance`
+    (a fraction, 0.1 for 10%).
+    """
+    regressions = []
+    print(f"{'name':>28} {'metric':>10} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        for metric in metrics:
+            if metric not in result or not before.get(metric):
+                continue
+            change = result[metric] / before[metric] - 1
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            flag = "  REGRESSED" if worse > tolerance else ""
+            print(
+                f"{name:>28} {metric:>10} {before[metric]:>10.3f} {result[metric]:>10.3f} "
+                f"{change:>+8.1%}{flag}"
+            )
+            if flag:
+                regressions.append(f"{name} {metric}")
+    return regressions
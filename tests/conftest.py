@@ -0,0 +1,119 @@
+import os
+import tempfile
+import uuid
+from typing import AsyncIterator, Dict
+
+# Settings are read on import, so the environment goes first. The suite runs
+# on a throwaway SQLite file and an in-memory Redis; nothing else is needed.
+_workdir = tempfile.mkdtemp(prefix="event-booking-tests-")
+for name, value in {
+    "DATABASE_URL": f"sqlite+aiosqlite:///{_workdir}/test.db",
+    "POSTGRES_USER": "test",
+    "POSTGRES_PASSWORD": "test",
+    "POSTGRES_SERVER": "localhost",
+    "POSTGRES_DB": "test",
+    "SECRET_KEY": "test-secret",
+    "REDIS_URL": "redis://localhost:6379/0",
+    "MAIL_USERNAME": "test",
+    "MAIL_PASSWORD": "test",
+    "MAIL_FROM": "noreply@example.com",
+    "MAIL_SERVER": "localhost",
+    "SUPPRESS_SEND": "1",
+    "RATE_LIMIT_ENABLED": "false",
+    "OUTBOX_RELAY_ENABLED": "false",
+    "DB_POOL_WARMUP": "0",
+    "LOG_LEVEL": "ERROR",
+}.items():
+    os.environ.setdefault(name, value)
+
+import fakeredis
+import httpx
+import pytest
+
+# Every Redis user takes the shared client when it is imported.
+from app.core.cache import cache
+
+cache.redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+
+from app.core.config import settings
+from app.core.database import Base, engine
+from app.core.security import password_hasher
+from app.main import app
+
+API = settings.API_V1_STR
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _shutdown_password_hasher():
+    yield
+    password_hasher.shutdown()
+
+
+@pytest.fixture
+async def database() -> AsyncIterator[None]:
+    """Fresh tables and an empty Redis for every test."""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    await cache.redis.flushall()
+    yield
+    await engine.dispose()
+
+
+@pytest.fixture
+async def client(database) -> AsyncIterator[httpx.AsyncClient]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+async def _signup(client: httpx.AsyncClient, *, is_organizer: bool) -> Dict[str, str]:
+    email = f"{uuid.uuid4().hex}@example.com"
+    credentials = {"email": email, "password": "password"}
+    response = await client.post(
+        f"{API}/auth/signup", json={**credentials, "is_organizer": is_organizer}
+    )
+    assert response.status_code == 200, response.text
+    response = await client.post(f"{API}/auth/login", json=credentials)
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def signup(client):
+    """Register a new account and return its Authorization header."""
+
+    async def create(*, is_organizer: bool = False) -> Dict[str, str]:
+        return await _signup(client, is_organizer=is_organizer)
+
+    return create
+
+
+@pytest.fixture
+async def organizer(signup) -> Dict[str, str]:
+    return await signup(is_organizer=True)
+
+
+@pytest.fixture
+async def user(signup) -> Dict[str, str]:
+    return await signup()
+
+
+@pytest.fixture
+def create_event(client, organizer):
+    async def create(capacity: int, **fields) -> str:
+        response = await client.post(
+            f"{API}/events/",
+            headers=organizer,
+            json={
+                "title": "Concert",
+                "date": "2030-01-01T19:00:00Z",
+                "location": "Hall",
+                "capacity": capacity,
+                **fields,
+            },
+        )
+        assert response.status_code == 200, response.text
+        return response.json()["id"]
+
+    return create
@@ -0,0 +1,40 @@
+import asyncio
+import uuid
+
+from jose import jwt
+
+from app.core.cache import cache
+from app.core.config import settings
+from app.models.user import UserRole
+from app.services.auth_cache import AuthCache, AuthUser
+
+API = settings.API_V1_STR
+
+
+async def test_user_changes_are_dropped_by_other_processes(client, organizer, user):
+    user_id = uuid.UUID(jwt.get_unverified_claims(user["Authorization"].split()[1])["sub"])
+    # The cache of another API process, listening on the same Redis.
+    other = AuthCache(cache.redis, max_entries=10, ttl_seconds=60)
+    listener = asyncio.create_task(other.run_listener())
+    try:
+        while not other._subscribed:
+            await asyncio.sleep(0.01)
+        other.put(
+            AuthUser(id=user_id, role=UserRole.USER, is_active=True, email="u@example.com", name=None),
+            generation=other.generation,
+        )
+        assert other.get(user_id) is not None
+
+        response = await client.put(
+            f"{API}/users/{user_id}", headers=organizer, json={"is_active": False}
+        )
+        assert response.status_code == 200, response.text
+
+        for _ in range(100):
+            if other.get(user_id) is None:
+                break
+            await asyncio.sleep(0.01)
+        assert other.get(user_id) is None
+    finally:
+        listener.cancel()
+        await asyncio.gather(listener, return_exceptions=True)
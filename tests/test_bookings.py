@@ -0,0 +1,98 @@
+import asyncio
+import uuid
+from collections import Counter
+
+from app.api import deps
+from app.core.cache import cache
+from app.core.config import settings
+from app.core.database import Base, ReplicaRouter
+
+API = settings.API_V1_STR
+
+
+async def remaining(client, event_id: str) -> int:
+    response = await client.get(f"{API}/events/{event_id}")
+    assert response.status_code == 200, response.text
+    return response.json()["capacity"]
+
+
+async def booked_tickets(client, headers) -> int:
+    response = await client.get(f"{API}/bookings/", headers=headers)
+    assert response.status_code == 200, response.text
+    return sum(booking["tickets_count"] for booking in response.json())
+
+
+async def test_concurrent_bookings_do_not_oversell(client, user, create_event):
+    event_id = await create_event(capacity=10)
+
+    responses = await asyncio.gather(*[
+        client.post(f"{API}/bookings/", headers=user, json={"event_id": event_id})
+        for _ in range(30)
+    ])
+
+    assert Counter(r.status_code for r in responses) == {200: 10, 400: 20}
+    assert await remaining(client, event_id) == 0
+    assert await booked_tickets(client, user) == 10
+
+
+async def test_booking_missing_event_is_404(client, user):
+    response = await client.post(
+        f"{API}/bookings/", headers=user, json={"event_id": str(uuid.uuid4())}
+    )
+
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Event not found"
+
+
+async def test_booking_sold_out_event_is_400(client, user, create_event):
+    event_id = await create_event(capacity=2)
+
+    response = await client.post(
+        f"{API}/bookings/", headers=user, json={"event_id": event_id, "tickets_count": 3}
+    )
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Not enough tickets available"
+    assert await remaining(client, event_id) == 2
+
+
+async def test_booking_needs_at_least_one_ticket(client, user, create_event):
+    event_id = await create_event(capacity=5)
+
+    for tickets_count in (0, -3):
+        response = await client.post(
+            f"{API}/bookings/",
+            headers=user,
+            json={"event_id": event_id, "tickets_count": tickets_count},
+        )
+        assert response.status_code == 422
+    assert await remaining(client, event_id) == 5
+    assert await booked_tickets(client, user) == 0
+
+
+async def test_reads_follow_writes_and_skip_dead_replicas(
+    client, user, create_event, tmp_path, monkeypatch
+):
+    # A replica that has not caught up at all, and one that is down.
+    lagging = f"sqlite+aiosqlite:///{tmp_path}/replica.db"
+    dead = f"sqlite+aiosqlite:///{tmp_path}/missing/replica.db"
+    router = ReplicaRouter([dead, lagging], retry_seconds=60)
+    async with router.engines[1].begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    monkeypatch.setattr(settings, "DATABASE_REPLICA_URLS", f"{dead},{lagging}")
+    monkeypatch.setattr(deps, "replica_router", router)
+    event_id = await create_event(capacity=5)
+
+    try:
+        response = await client.post(
+            f"{API}/bookings/", headers=user, json={"event_id": event_id}
+        )
+        assert response.status_code == 200, response.text
+        # Inside the read-your-writes window the primary serves the read.
+        assert await booked_tickets(client, user) == 1
+
+        await cache.redis.delete(*await cache.redis.keys("ryw:*"))
+        assert await booked_tickets(client, user) == 0
+        assert router._down_until[0] > 0
+    finally:
+        await router.dispose()
@@ -0,0 +1,74 @@
+import uuid
+
+from app.core.config import settings
+
+API = settings.API_V1_STR
+
+
+async def remaining(client, event_id: str) -> int:
+    response = await client.get(f"{API}/events/{event_id}")
+    assert response.status_code == 200, response.text
+    return response.json()["capacity"]
+
+
+async def booked_tickets(client, headers) -> int:
+    response = await client.get(f"{API}/bookings/", headers=headers)
+    assert response.status_code == 200, response.text
+    return sum(booking["tickets_count"] for booking in response.json())
+
+
+async def test_checkout_books_every_item(client, user, create_event):
+    first = await create_event(capacity=5)
+    second = await create_event(capacity=1)
+
+    response = await client.post(
+        f"{API}/bookings/checkout",
+        headers=user,
+        json={"items": [
+            {"event_id": first, "tickets_count": 2},
+            {"event_id": second, "tickets_count": 1},
+        ]},
+    )
+
+    assert response.status_code == 200, response.text
+    bookings = response.json()
+    assert [b["event_id"] for b in bookings] == [first, second]
+    assert len({b["checkout_id"] for b in bookings}) == 1
+    assert await remaining(client, first) == 3
+    assert await remaining(client, second) == 0
+
+
+async def test_checkout_with_sold_out_item_books_nothing(client, user, create_event):
+    first = await create_event(capacity=5)
+    second = await create_event(capacity=1)
+
+    response = await client.post(
+        f"{API}/bookings/checkout",
+        headers=user,
+        json={"items": [
+            {"event_id": first, "tickets_count": 2},
+            {"event_id": second, "tickets_count": 2},
+        ]},
+    )
+
+    assert response.status_code == 400
+    assert second in response.json()["detail"]
+    assert await remaining(client, first) == 5
+    assert await remaining(client, second) == 1
+    assert await booked_tickets(client, user) == 0
+
+
+async def test_checkout_with_missing_event_books_nothing(client, user, create_event):
+    first = await create_event(capacity=5)
+    missing = str(uuid.uuid4())
+
+    response = await client.post(
+        f"{API}/bookings/checkout",
+        headers=user,
+        json={"items": [{"event_id": first}, {"event_id": missing}]},
+    )
+
+    assert response.status_code == 404
+    assert missing in response.json()["detail"]
+    assert await remaining(client, first) == 5
+    assert await booked_tickets(client, user) == 0
@@ -0,0 +1,122 @@
+import asyncio
+import uuid
+from typing import List
+
+import pytest
+
+from app.core.config import settings
+from app.crud import booking as crud_booking
+from app.services.booking_coalescer import booking_coalescer
+
+API = settings.API_V1_STR
+
+
+async def remaining(client, event_id: str) -> int:
+    response = await client.get(f"{API}/events/{event_id}")
+    assert response.status_code == 200, response.text
+    return response.json()["capacity"]
+
+
+async def booked_tickets(client, headers) -> int:
+    response = await client.get(f"{API}/bookings/", headers=headers)
+    assert response.status_code == 200, response.text
+    return sum(booking["tickets_count"] for booking in response.json())
+
+
+@pytest.fixture
+def batches(monkeypatch) -> List[int]:
+    """Sizes of the batches the coalescer books, in order."""
+    sizes: List[int] = []
+    reserve_many = crud_booking.reserve_many
+
+    async def recording_reserve_many(db, *, event_id, requests):
+        sizes.append(len(requests))
+        return await reserve_many(db, event_id=event_id, requests=requests)
+
+    monkeypatch.setattr(crud_booking, "reserve_many", recording_reserve_many)
+    return sizes
+
+
+async def test_coalesced_requests_get_their_own_result(
+    client, signup, create_event, batches, monkeypatch
+):
+    monkeypatch.setattr(settings, "BOOKING_COALESCE_ENABLED", True)
+    # Wide enough for every request below to make it into one batch.
+    monkeypatch.setattr(booking_coalescer, "window", 0.5)
+    event_id = await create_event(capacity=5)
+    users = [await signup() for _ in range(4)]
+
+    # However the batch is ordered, these cannot all fit.
+    tickets = [3, 2, 4, 1]
+    responses = await asyncio.gather(*[
+        client.post(
+            f"{API}/bookings/",
+            headers=headers,
+            json={"event_id": event_id, "tickets_count": count},
+        )
+        for headers, count in zip(users, tickets)
+    ])
+
+    assert batches == [4]
+    sold = 0
+    for headers, count, response in zip(users, tickets, responses):
+        if response.status_code == 200:
+            assert response.json()["tickets_count"] == count
+            assert await booked_tickets(client, headers) == count
+            sold += count
+        else:
+            assert response.status_code == 400
+            assert response.json()["detail"] == "Not enough tickets available"
+            assert await booked_tickets(client, headers) == 0
+    assert 0 < sold <= 5
+    assert await remaining(client, event_id) == 5 - sold
+
+
+async def test_coalesced_requests_for_missing_event_are_404(client, user, monkeypatch):
+    monkeypatch.setattr(settings, "BOOKING_COALESCE_ENABLED", True)
+
+    responses = await asyncio.gather(*[
+        client.post(f"{API}/bookings/", headers=user, json={"event_id": str(uuid.uuid4())})
+        for _ in range(3)
+    ])
+
+    assert [r.status_code for r in responses] == [404, 404, 404]
+
+
+async def test_full_batches_do_not_wait_for_the_window(
+    client, signup, create_event, batches, monkeypatch
+):
+    monkeypatch.setattr(settings, "BOOKING_COALESCE_ENABLED", True)
+    monkeypatch.setattr(booking_coalescer, "window", 30)
+    monkeypatch.setattr(booking_coalescer, "max_batch", 2)
+    event_id = await create_event(capacity=5)
+    users = [await signup() for _ in range(2)]
+
+    responses = await asyncio.wait_for(
+        asyncio.gather(*[
+            client.post(f"{API}/bookings/", headers=headers, json={"event_id": event_id})
+            for headers in users
+        ]),
+        timeout=5,
+    )
+
+    assert [r.status_code for r in responses] == [200, 200]
+    assert batches == [2]
+    assert await remaining(client, event_id) == 3
+
+
+async def test_requests_after_the_window_are_a_new_batch(
+    client, user, create_event, batches, monkeypatch
+):
+    monkeypatch.setattr(settings, "BOOKING_COALESCE_ENABLED", True)
+    monkeypatch.setattr(booking_coalescer, "window", 0.05)
+    event_id = await create_event(capacity=5)
+
+    for _ in range(2):
+        response = await client.post(
+            f"{API}/bookings/", headers=user, json={"event_id": event_id}
+        )
+        assert response.status_code == 200, response.text
+
+    assert batches == [1, 1]
+    assert await booked_tickets(client, user) == 2
@@ -0,0 +1,152 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, List
+import uuid
+
+import pytest
+from sqlalchemy import event, inspect
+
+from app.core.database import AsyncSessionLocal, engine
+from app.crud import booking as crud_booking
+from app.crud import event as crud_event
+from app.crud import user as crud_user
+from app.schemas.booking import BookingCreate
+from app.schemas.event import EventCreate
+from app.schemas.user import UserCreate
+
+
+class EventRow(EventCreate):
+    # CRUDBase.create builds the model from the schema alone.
+    organizer_id: uuid.UUID
+
+
+@contextmanager
+def statements() -> Iterator[List[str]]:
+    """SQL statements sent over the engine's connections inside the block."""
+    sent: List[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany) -> None:
+        sent.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        yield sent
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+
+@pytest.fixture
+async def db(database):
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+async def organizer(db):
+    return await crud_user.create(
+        db, obj_in=UserCreate(email="organizer@example.com", password="password", is_organizer=True)
+    )
+
+
+@pytest.fixture
+def event_in():
+    return EventCreate(
+        title="Concert",
+        date=datetime.now(timezone.utc) + timedelta(days=30),
+        location="Hall",
+        capacity=100,
+    )
+
+
+def assert_loaded(obj) -> None:
+    # Any column left unloaded, deferred ones aside, would cost another SELECT.
+    state = inspect(obj)
+    columns = {prop.key for prop in state.mapper.column_attrs if not prop.deferred}
+    assert not state.unloaded & columns
+
+
+async def test_user_create_is_one_statement(db):
+    with statements() as sent:
+        user = await crud_user.create(
+            db, obj_in=UserCreate(email="user@example.com", password="password")
+        )
+
+    assert len(sent) == 1
+    assert_loaded(user)
+    assert user.email == "user@example.com"
+
+
+async def test_create_is_one_statement(db, organizer, event_in):
+    with statements() as sent:
+        created = await crud_event.create(
+            db, obj_in=EventRow(**event_in.model_dump(), organizer_id=organizer.id)
+        )
+
+    assert len(sent) == 1
+    assert_loaded(created)
+    assert created.remaining_capacity == 100
+
+
+async def test_event_create_is_one_statement(db, organizer, event_in):
+    with statements() as sent:
+        created = await crud_event.create_with_organizer(
+            db, obj_in=event_in, organizer_id=organizer.id
+        )
+
+    assert len(sent) == 1
+    assert_loaded(created)
+    assert created.organizer_id == organizer.id
+    assert created.remaining_capacity == 100
+
+
+async def test_update_is_one_statement(db, organizer, event_in):
+    created = await crud_event.create_with_organizer(db, obj_in=event_in, organizer_id=organizer.id)
+
+    with statements() as sent:
+        updated = await crud_event.update(db, db_obj=created, obj_in={"location": "Park"})
+
+    assert len(sent) == 1
+    assert_loaded(updated)
+    assert updated.location == "Park"
+    assert updated.remaining_capacity == 100
+
+
+async def test_user_update_is_one_statement(db, organizer):
+    with statements() as sent:
+        updated = await crud_user.update(db, db_obj=organizer, obj_in={"name": "Organizer"})
+
+    assert len(sent) == 1
+    assert updated.name == "Organizer"
+
+
+async def test_remove_is_one_statement(db, organizer, event_in):
+    created = await crud_event.create_with_organizer(db, obj_in=event_in, organizer_id=organizer.id)
+
+    with statements() as sent:
+        removed = await crud_event.remove(db, id=created.id)
+
+    assert len(sent) == 1
+    assert_loaded(removed)
+    assert removed.id == created.id
+    assert removed.remaining_capacity == 100
+    assert await crud_event.get(db, id=created.id) is None
+
+
+@pytest.mark.skipif(
+    engine.dialect.name != "postgresql",
+    reason="SQLite books in a transaction of several statements",
+)
+async def test_booking_reserve_is_one_statement(db, organizer, event_in):
+    created = await crud_event.create_with_organizer(db, obj_in=event_in, organizer_id=organizer.id)
+    user = await crud_user.create(
+        db, obj_in=UserCreate(email="user@example.com", password="password")
+    )
+
+    with statements() as sent:
+        booking, _ = await crud_booking.reserve(
+            db, obj_in=BookingCreate(event_id=created.id, tickets_count=2), user_id=user.id
+        )
+
+    assert len(sent) == 1
+    assert booking.tickets_count == 2
+    assert await crud_event.get_remaining_capacity(db, event_id=created.id) == 98
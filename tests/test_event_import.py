@@ -0,0 +1,153 @@
+import json
+from typing import Any, AsyncIterator, List
+
+import pytest
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.event import Event
+from app.services.event_import import ImportFormatError, iter_csv_records, iter_json_array
+
+API = settings.API_V1_STR
+
+CSV = (
+    "title,date,location,capacity,description\n"
+    "Concert,2030-01-01T19:00:00Z,Hall,100,\n"
+    'Talk,2030-02-01T10:00:00Z,"Room 1, floor 2",30,"Doors open at 9.\n'
+    'Bring a ""badge""."\n'
+)
+
+
+async def chunked(data: bytes, size: int) -> AsyncIterator[bytes]:
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+async def collect(records: AsyncIterator[Any]) -> List[Any]:
+    return [record async for record in records]
+
+
+async def event_count() -> int:
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(select(func.count(Event.id)))
+
+
+@pytest.mark.parametrize("size", [1, 3, 1024])
+async def test_json_items_split_across_chunks(size):
+    data = b'[{"title": "Concert", "capacity": 100}, 12345, "a,]b"]'
+
+    assert await collect(iter_json_array(chunked(data, size))) == [
+        {"title": "Concert", "capacity": 100},
+        12345,
+        "a,]b",
+    ]
+
+
+@pytest.mark.parametrize(
+    "data, message",
+    [
+        (b'{"title": "Concert"}', "Expected a JSON array"),
+        (b'[{"title": "Concert"}', "Unexpected end of the JSON array"),
+        (b'[{"title": "Concert"} {"title": "Talk"}]', "Expected ',' or ']' after item 1"),
+        (b'[{"title": "Concert"}, {"title": }]', "Malformed JSON in item 2"),
+        (b"[1] 2", "Unexpected data after the JSON array"),
+    ],
+)
+async def test_malformed_json_is_rejected(data, message):
+    with pytest.raises(ImportFormatError, match=message):
+        await collect(iter_json_array(chunked(data, 4)))
+
+
+@pytest.mark.parametrize("size", [1, 7, 1024])
+async def test_csv_quoted_fields_may_span_lines_and_chunks(size):
+    records = await collect(iter_csv_records(chunked(CSV.encode(), size)))
+
+    assert records == [
+        {
+            "title": "Concert",
+            "date": "2030-01-01T19:00:00Z",
+            "location": "Hall",
+            "capacity": "100",
+        },
+        {
+            "title": "Talk",
+            "date": "2030-02-01T10:00:00Z",
+            "location": "Room 1, floor 2",
+            "capacity": "30",
+            "description": 'Doors open at 9.\nBring a "badge".',
+        },
+    ]
+
+
+async def test_records_over_the_size_limit_are_rejected(monkeypatch):
+    monkeypatch.setattr(settings, "EVENT_IMPORT_MAX_RECORD_SIZE", 16)
+    item = json.dumps({"title": "x" * 64}).encode()
+
+    with pytest.raises(ImportFormatError, match="Item 1 is too large"):
+        await collect(iter_json_array(chunked(b"[" + item + b"]", 8)))
+    with pytest.raises(ImportFormatError, match="too large or has an unclosed quote"):
+        await collect(iter_csv_records(chunked(b'title\n"' + b"x" * 64 + b"\n", 8)))
+
+
+async def test_import_skips_invalid_rows(client, organizer):
+    response = await client.post(
+        f"{API}/events/import",
+        headers={**organizer, "Content-Type": "application/json"},
+        content=json.dumps([
+            {"title": "Concert", "date": "2030-01-01T19:00:00Z", "location": "Hall", "capacity": 100},
+            {"title": "Talk", "date": "not a date", "location": "Room", "capacity": 30},
+            "not an event",
+            {"title": "Fair", "date": "2030-03-01T10:00:00Z", "location": "Park", "capacity": 500},
+        ]),
+    )
+
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert (result["imported"], result["failed"]) == (2, 2)
+    assert [error["row"] for error in result["errors"]] == [2, 3]
+    assert result["errors"][0]["errors"][0].startswith("date:")
+    assert await event_count() == 2
+
+
+async def test_import_from_a_multipart_csv_upload(client, organizer):
+    response = await client.post(
+        f"{API}/events/import",
+        headers=organizer,
+        files={"file": ("events.csv", CSV.encode(), "application/octet-stream")},
+    )
+
+    assert response.status_code == 200, response.text
+    assert response.json() == {"imported": 2, "failed": 0, "errors": []}
+    assert await event_count() == 2
+
+
+async def test_malformed_uploads_import_nothing(client, organizer, monkeypatch):
+    # The first row is inserted before the error turns up.
+    monkeypatch.setattr(settings, "EVENT_IMPORT_BATCH_SIZE", 1)
+    valid = {"title": "Concert", "date": "2030-01-01T19:00:00Z", "location": "Hall", "capacity": 100}
+
+    response = await client.post(
+        f"{API}/events/import",
+        headers={**organizer, "Content-Type": "application/json"},
+        content=json.dumps([valid, valid])[:-1].encode(),
+    )
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Unexpected end of the JSON array"
+    assert await event_count() == 0
+
+
+async def test_imports_over_the_row_limit_import_nothing(client, organizer, monkeypatch):
+    monkeypatch.setattr(settings, "EVENT_IMPORT_MAX_ROWS", 2)
+    monkeypatch.setattr(settings, "EVENT_IMPORT_BATCH_SIZE", 1)
+    rows = "".join(f"Concert {n},2030-01-01T19:00:00Z,Hall,100\n" for n in range(3))
+
+    response = await client.post(
+        f"{API}/events/import",
+        headers={**organizer, "Content-Type": "text/csv"},
+        content=f"title,date,location,capacity\n{rows}".encode(),
+    )
+
+    assert response.status_code == 413
+    assert await event_count() == 0
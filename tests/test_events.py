@@ -0,0 +1,153 @@
+import asyncio
+import uuid
+
+from sqlalchemy import update
+
+from app.core.cache import cache
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.crud import event as crud_event
+from app.models.event import Event
+from app.services.event_cache import capacity_key, event_key
+from app.services.hot_inventory import DEAD_CLAIMS_STREAM, hot_inventory, seats_key
+
+API = settings.API_V1_STR
+
+
+async def remaining(client, event_id: str) -> int:
+    response = await client.get(f"{API}/events/{event_id}")
+    assert response.status_code == 200, response.text
+    return response.json()["capacity"]
+
+
+async def test_capacity_edits_move_the_hot_counter(
+    client, organizer, user, create_event, monkeypatch
+):
+    monkeypatch.setattr(settings, "HOT_EVENTS_ENABLED", True)
+    event_id = await create_event(capacity=10)
+    response = await client.post(f"{API}/events/{event_id}/hot", headers=organizer)
+    assert response.status_code == 200, response.text
+    response = await client.post(
+        f"{API}/bookings/", headers=user, json={"event_id": event_id, "tickets_count": 3}
+    )
+    assert response.status_code == 200, response.text
+
+    # 3 seats are claimed in Redis but not yet reconciled into the event.
+    response = await client.put(
+        f"{API}/events/{event_id}", headers=organizer, json={"capacity": 15}
+    )
+    assert response.status_code == 200, response.text
+    assert await cache.redis.get(seats_key(event_id)) == "12"
+
+    response = await client.put(
+        f"{API}/events/{event_id}", headers=organizer, json={"capacity": 2}
+    )
+    assert response.status_code == 409
+    assert await cache.redis.get(seats_key(event_id)) == "12"
+    assert await remaining(client, event_id) == 15
+
+    async with AsyncSessionLocal() as db:
+        await hot_inventory.rebuild(db)
+        assert await hot_inventory.reconcile(db, consumer="test") == 1
+    assert await remaining(client, event_id) == 12
+    assert await cache.redis.get(seats_key(event_id)) == "12"
+
+
+async def test_capacity_edits_on_sharded_events_set_the_total(
+    client, organizer, user, create_event
+):
+    event_id = await create_event(capacity=10)
+    response = await client.put(
+        f"{API}/events/{event_id}/shards", headers=organizer, json={"shards": 3}
+    )
+    assert response.status_code == 200, response.text
+    response = await client.post(
+        f"{API}/bookings/", headers=user, json={"event_id": event_id, "tickets_count": 2}
+    )
+    assert response.status_code == 200, response.text
+
+    response = await client.put(
+        f"{API}/events/{event_id}", headers=organizer, json={"capacity": 20}
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["capacity"] == 20
+    assert response.json()["capacity_shards"] == 3
+    assert await remaining(client, event_id) == 20
+
+    response = await client.put(
+        f"{API}/events/{event_id}/shards", headers=organizer, json={"shards": 0}
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["capacity"] == 20
+
+
+async def test_deleted_hot_events_do_not_block_reconciling_others(
+    client, organizer, user, create_event, monkeypatch
+):
+    monkeypatch.setattr(settings, "HOT_EVENTS_ENABLED", True)
+    gone, kept = await create_event(capacity=10), await create_event(capacity=10)
+    for event_id in (gone, kept):
+        response = await client.post(f"{API}/events/{event_id}/hot", headers=organizer)
+        assert response.status_code == 200, response.text
+        response = await client.post(
+            f"{API}/bookings/", headers=user, json={"event_id": event_id, "tickets_count": 2}
+        )
+        assert response.status_code == 200, response.text
+
+    # The event goes while its claim is still in the stream.
+    async with AsyncSessionLocal() as db:
+        await crud_event.remove(db, id=uuid.UUID(gone))
+        await hot_inventory.rebuild(db)
+        assert await hot_inventory.reconcile(db, consumer="test") == 2
+    assert await cache.redis.xlen(DEAD_CLAIMS_STREAM) == 1
+    assert await remaining(client, kept) == 8
+
+    response = await client.delete(f"{API}/events/{kept}", headers=organizer)
+    assert response.status_code == 200, response.text
+    assert await cache.redis.get(seats_key(kept)) is None
+
+
+async def test_cached_events_follow_edits_and_bookings(
+    client, organizer, user, create_event, monkeypatch
+):
+    monkeypatch.setattr(settings, "EVENT_CACHE_CAPACITY_STALENESS_SECONDS", 1)
+    event_id = await create_event(capacity=10)
+    assert await remaining(client, event_id) == 10
+    assert await cache.redis.exists(event_key(event_id), capacity_key(event_id)) == 2
+
+    response = await client.put(
+        f"{API}/events/{event_id}", headers=organizer, json={"title": "Opera"}
+    )
+    assert response.status_code == 200, response.text
+    response = await client.get(f"{API}/events/{event_id}")
+    assert response.json()["title"] == "Opera"
+
+    response = await client.post(
+        f"{API}/bookings/", headers=user, json={"event_id": event_id, "tickets_count": 3}
+    )
+    assert response.status_code == 200, response.text
+    assert await remaining(client, event_id) == 7
+
+    # A change that skips invalidation shows until the capacity expires.
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(Event).where(Event.id == uuid.UUID(event_id)).values(capacity=5))
+        await db.commit()
+    assert await remaining(client, event_id) == 7
+    await asyncio.sleep(1.1)
+    assert await remaining(client, event_id) == 5
+
+
+async def test_streaming_all_events_is_rate_limited_per_user(
+    client, user, signup, monkeypatch
+):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+
+    for _ in range(10):
+        response = await client.get(f"{API}/events/all", headers=user)
+        assert response.status_code == 200, response.text
+    response = await client.get(f"{API}/events/all", headers=user)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+    response = await client.get(f"{API}/events/all", headers=await signup())
+    assert response.status_code == 200, response.text
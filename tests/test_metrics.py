@@ -0,0 +1,24 @@
+from app.core.config import settings
+
+API = settings.API_V1_STR
+
+
+async def test_cache_metrics_are_for_organizers_only(client, organizer, user):
+    response = await client.get(f"{API}/metrics/cache")
+    assert response.status_code == 401
+    response = await client.get(f"{API}/metrics/cache", headers=user)
+    assert response.status_code == 403
+
+    response = await client.get(f"{API}/metrics/cache", headers=organizer)
+    assert response.status_code == 200, response.text
+
+
+async def test_db_metrics_are_for_organizers_only(client, organizer, user):
+    response = await client.get(f"{API}/metrics/db")
+    assert response.status_code == 401
+    response = await client.get(f"{API}/metrics/db", headers=user)
+    assert response.status_code == 403
+
+    response = await client.get(f"{API}/metrics/db", headers=organizer)
+    assert response.status_code == 200, response.text
+    assert "primary" in response.json()
@@ -0,0 +1,149 @@
+from datetime import datetime, timezone
+from typing import List
+
+import fakeredis
+import pytest
+from sqlalchemy import select
+
+from app import worker
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, engine
+from app.crud.crud_outbox import outbox as crud_outbox
+from app.models.outbox import OutboxMessage
+from app.services.outbox import outbox_relay
+from app.worker import send_template_email_task
+
+API = settings.API_V1_STR
+
+
+@pytest.fixture
+def published(monkeypatch) -> List[str]:
+    """Task ids published to an in-memory broker."""
+    task_ids: List[str] = []
+    apply_async = send_template_email_task.apply_async
+
+    def recording_apply_async(*args, **kwargs):
+        result = apply_async(*args, **kwargs)
+        task_ids.append(kwargs["task_id"])
+        return result
+
+    monkeypatch.setitem(celery_app.conf, "broker_url", "memory://")
+    monkeypatch.setattr(send_template_email_task, "apply_async", recording_apply_async)
+    return task_ids
+
+
+async def outbox_messages() -> List[OutboxMessage]:
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(select(OutboxMessage))).scalars().all()
+
+
+async def book(client, headers, event_id: str) -> None:
+    response = await client.post(
+        f"{API}/bookings/", headers=headers, json={"event_id": event_id}
+    )
+    assert response.status_code == 200, response.text
+
+
+async def test_relayed_messages_are_removed(client, user, create_event, published):
+    await book(client, user, await create_event(capacity=5))
+    [message] = await outbox_messages()
+
+    async with AsyncSessionLocal() as db:
+        assert await outbox_relay.relay(db) == 1
+
+    assert published == [str(message.id)]
+    assert await outbox_messages() == []
+
+
+async def test_failed_publishes_are_retried_with_backoff(
+    client, user, create_event, monkeypatch
+):
+    def unreachable_broker(*args, **kwargs):
+        raise ConnectionError("broker unreachable")
+
+    monkeypatch.setitem(celery_app.conf, "broker_url", "memory://")
+    monkeypatch.setattr(send_template_email_task, "apply_async", unreachable_broker)
+    await book(client, user, await create_event(capacity=5))
+
+    async with AsyncSessionLocal() as db:
+        assert await outbox_relay.relay(db) == 1
+        # Not due again until the backoff has passed.
+        assert await outbox_relay.relay(db) == 0
+
+    [message] = await outbox_messages()
+    assert message.attempts == 1
+    # SQLite hands datetimes back without their timezone.
+    available_at = message.available_at.replace(tzinfo=message.available_at.tzinfo or timezone.utc)
+    assert available_at > datetime.now(timezone.utc)
+
+
+@pytest.mark.skipif(
+    engine.dialect.name != "postgresql",
+    reason="SQLite has no row locks to skip",
+)
+async def test_claim_due_skips_rows_locked_by_another_relay(client, user, create_event):
+    event_id = await create_event(capacity=5)
+    for _ in range(2):
+        await book(client, user, event_id)
+
+    async with AsyncSessionLocal() as first, AsyncSessionLocal() as second:
+        [locked] = await crud_outbox.claim_due(first, limit=1)
+        [other] = await crud_outbox.claim_due(second, limit=10)
+        assert other.id != locked.id
+        assert await crud_outbox.claim_due(second, limit=10) == [other]
+        await first.rollback()
+        await second.rollback()
+
+
+@pytest.fixture
+def sends(monkeypatch) -> List[tuple]:
+    """Emails the worker sends, with its dedup keys in an in-memory Redis."""
+    sent: List[tuple] = []
+
+    def recording_run(coro_fn, *args):
+        sent.append(args)
+
+    monkeypatch.setattr(worker, "_redis", fakeredis.FakeRedis())
+    monkeypatch.setattr(worker, "_run", recording_run)
+    return sent
+
+
+def send(task_id: str):
+    return send_template_email_task.apply(
+        (
+            "booking_confirmation",
+            "attendee@example.com",
+            {
+                "booking_id": "b",
+                "user_name": "Attendee",
+                "event_title": "Concert",
+                "event_date": "2030-01-01",
+                "event_location": "Hall",
+                "event_description": None,
+                "tickets_count": 1,
+            },
+        ),
+        task_id=task_id,
+    )
+
+
+def test_redelivered_email_tasks_are_sent_once(sends):
+    assert send("message-1").get() == "Email sent"
+    assert send("message-1").get() == "Duplicate"
+    assert send("message-2").get() == "Email sent"
+
+    assert len(sends) == 2
+
+
+def test_failed_sends_release_their_task_id(sends, monkeypatch):
+    def failing_run(coro_fn, *args):
+        raise ConnectionError("smtp unreachable")
+
+    with monkeypatch.context() as m:
+        m.setattr(worker, "_run", failing_run)
+        with pytest.raises(ConnectionError):
+            send("message-1").get()
+
+    assert send("message-1").get() == "Email sent"
+    assert len(sends) == 1
@@ -0,0 +1,72 @@
+import base64
+import json
+from typing import Dict, List, Optional
+
+import pytest
+
+from app.core.config import settings
+
+API = settings.API_V1_STR
+
+
+def cursor_of(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+GARBAGE_CURSORS = [
+    "garbage!",
+    cursor_of({"date": "2030-01-01"}),
+    cursor_of(["2030-01-01T19:00:00+00:00"]),
+    cursor_of(["yesterday", "not-a-uuid"]),
+]
+
+
+async def read_all(client, url: str, headers: Optional[Dict[str, str]] = None) -> List[dict]:
+    rows: List[dict] = []
+    cursor = None
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        response = await client.get(url, headers=headers, params=params)
+        assert response.status_code == 200, response.text
+        rows.extend(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return rows
+
+
+async def test_events_with_the_same_date_are_paged_by_id(client, create_event):
+    created = [await create_event(capacity=10) for _ in range(7)]
+    created += [
+        await create_event(capacity=10, date="2029-06-01T19:00:00Z"),
+        await create_event(capacity=10, date="2031-01-01T19:00:00Z"),
+    ]
+
+    events = await read_all(client, f"{API}/events/")
+
+    ids = [event["id"] for event in events]
+    assert sorted(ids) == sorted(created)
+    assert ids[0] == created[7] and ids[-1] == created[8]
+    assert len(set(ids)) == len(ids)
+
+
+async def test_bookings_are_paged_without_gaps(client, user, create_event):
+    event_id = await create_event(capacity=20)
+    booked = []
+    for _ in range(8):
+        response = await client.post(
+            f"{API}/bookings/", headers=user, json={"event_id": event_id}
+        )
+        assert response.status_code == 200, response.text
+        booked.append(response.json()["id"])
+
+    bookings = await read_all(client, f"{API}/bookings/", headers=user)
+
+    assert [booking["id"] for booking in bookings] == booked
+
+
+@pytest.mark.parametrize("cursor", GARBAGE_CURSORS)
+async def test_garbage_cursors_are_400(client, user, cursor):
+    for url in (f"{API}/events/", f"{API}/bookings/"):
+        response = await client.get(url, headers=user, params={"cursor": cursor})
+        assert response.status_code == 400, url
+        assert response.json()["detail"] == "Invalid cursor"
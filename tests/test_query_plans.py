@@ -0,0 +1,49 @@
+import pytest
+
+from app.core.database import Base, engine
+from benchmarks.query_plans import (
+    OPERATIONS,
+    Dataset,
+    capture,
+    explain,
+    table_sizes,
+    unindexed_foreign_keys,
+)
+
+# Smaller than the benchmark's defaults, still past the point where a
+# sequential scan of these tables would be the cheaper plan.
+USERS, EVENTS, BOOKINGS = 2_000, 10_000, 40_000
+MIN_ROWS = 1000
+
+
+@pytest.fixture(scope="module")
+async def dataset():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    data = Dataset(USERS, EVENTS, BOOKINGS)
+    await data.seed()
+    data.sizes = await table_sizes()
+    yield data
+    await data.teardown()
+    await engine.dispose()
+
+
+# Run in the order listed: the removals at the end change the dataset.
+@pytest.mark.parametrize(
+    "operation", [operation for _, operation in OPERATIONS], ids=[name for name, _ in OPERATIONS]
+)
+async def test_operation_does_not_scan_large_tables(dataset, operation):
+    statements = await capture(operation, dataset)
+
+    assert statements
+    for statement, parameters in statements:
+        lines, scans = await explain(statement, parameters)
+        # Unknown names are aliases; count them as large tables.
+        large = [table for table in scans if dataset.sizes.get(table, MIN_ROWS + 1) > MIN_ROWS]
+        assert not large, "\n".join([statement, *lines])
+
+
+async def test_foreign_keys_are_indexed(dataset):
+    async with engine.connect() as conn:
+        assert await conn.run_sync(unindexed_foreign_keys) == []
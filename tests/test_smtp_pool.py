@@ -0,0 +1,64 @@
+import asyncio
+
+import aiosmtplib
+import pytest
+
+from app.core.email import SMTPPool, build_message
+from benchmarks.smtp import StandInSMTP
+
+
+@pytest.fixture
+async def smtp_server():
+    server = StandInSMTP(None)
+    listener = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+    server.port = listener.sockets[0].getsockname()[1]
+    yield server
+    listener.close()
+    await listener.wait_closed()
+
+
+@pytest.fixture
+async def pool(smtp_server):
+    pool = SMTPPool(
+        size=1,
+        max_idle=60,
+        hostname="127.0.0.1",
+        port=smtp_server.port,
+        username="test",
+        password="test",
+        start_tls=False,
+        timeout=5,
+    )
+    yield pool
+    await pool.close()
+
+
+def message():
+    return build_message(["attendee@example.com"], "Booking Confirmation", "<p>Hi</p>")
+
+
+async def test_pool_reuses_its_connection(smtp_server, pool):
+    for _ in range(3):
+        await pool.send(message())
+
+    assert smtp_server.received == 3
+    assert smtp_server.connections == 1
+
+
+async def test_pool_reconnects_and_retries_once_after_a_drop(smtp_server, pool):
+    await pool.send(message())
+    smtp_server.hang_ups = 1
+
+    await pool.send(message())
+
+    assert smtp_server.received == 2
+    assert smtp_server.connections == 2
+
+
+async def test_pool_gives_up_after_one_retry(smtp_server, pool):
+    await pool.send(message())
+    smtp_server.hang_ups = 2
+
+    with pytest.raises(aiosmtplib.SMTPServerDisconnected):
+        await pool.send(message())
+    assert smtp_server.received == 1